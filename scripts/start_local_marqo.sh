@@ -15,6 +15,7 @@ docker rm -f marqo 2>/dev/null || true
 # -d detaches docker from process (so subprocess does not wait for it)
 # ${@:+"$@"} adds ALL args (past $1) if any exist.
 
+START_TIME=$(date +%s.%N)
 set -x
 docker run -d --name marqo --privileged -p 8882:8882 --add-host host.docker.internal:host-gateway \
     -e MARQO_MAX_CPU_MODEL_MEMORY=1.6 \
@@ -30,10 +31,10 @@ set +x
 docker logs -f marqo &
 LOGS_PID=$!
 
-# wait for marqo to start
-until [[ $(curl -v --silent --insecure http://localhost:8882 2>&1 | grep Marqo) ]]; do
-    sleep 0.1;
-done;
+# wait for marqo to start, and print how long each startup phase took
+python3 "$(dirname "$0")/wait_for_marqo.py" --container marqo --started-at "$START_TIME" -- ${@:+"$@"}
+MARQO_READY=$?
 
 # Kill the `docker logs` command (so subprocess does not wait for it)
-kill $LOGS_PID
\ No newline at end of file
+kill $LOGS_PID
+exit $MARQO_READY
@@ -3,26 +3,56 @@
 It can be used in Marqo local runs to start Vespa outside the Marqo docker container. This requires
 that the host machine has docker installed.
 
-We generate a schema.sd file and a services.xml file and put them in a zip file. We then deploy the zip file
-using the REST API. After that, we check if Vespa is up and running. If it is, we can start Marqo.
+We generate a schema.sd file and a services.xml file and put them in an in-memory zip file. We then deploy the
+zip file using the REST API. After that, we check if Vespa is up and running. If it is, we can start Marqo.
 
-All the files are created in a directory called vespa_dummy_application_package. This directory is removed and
-the zip file is removed after the application package is deployed.
+There are no fixed sleeps: the config server and the query/document API are probed concurrently as soon as the
+container is started, with short polls that back off while Vespa is starting, and each step starts as soon as the
+previous one is ready. The time each phase took (container up, config server ready, deployed or deploy skipped,
+serving) is printed.
+
+Nothing is written to disk. The package's content hash is written into services.xml as an XML comment, and the
+deployment is skipped when the active application has the same hash. This is the case when the script is rerun with
+--reuse-container against a container it already deployed to.
 
 Note: Vespa CLI is not needed as we use the REST API to deploy the application package.
 """
 
+import argparse
+import hashlib
+import io
 import os
-import shutil
-import subprocess
+import re
 import textwrap
+import threading
 import time
 import sys
+import zipfile
+from typing import Dict, Optional, Tuple
 
 import requests
 
+# The scripts are run as `python scripts/<name>.py`, so the repo root is put on the path to import the other scripts
+# and the test harness as packages, the way the tests import them
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from scripts.startup_probes import PhaseLog, container_status, poll_until
+
+CONFIG_SERVER_URL = "http://localhost:19071"
+QUERY_URL = "http://localhost:8080"
+# The services.xml of the active application, as served by the config server
+ACTIVE_SERVICES_XML_PATH = ("/application/v2/tenant/default/application/default/environment/prod/region/default/"
+                            "instance/default/content/services.xml")
+# The XML comment in services.xml that holds the package's content hash
+PACKAGE_HASH_COMMENT = "application-package-hash"
+
 
-def start_vespa() -> None:
+def start_vespa(reuse_container: bool = False) -> None:
+    if reuse_container and container_status("vespa") == "running":
+        print("Reusing the running vespa container.")
+        return
     os.system("docker rm -f vespa 2>/dev/null || true")
     os.system("docker run --detach "
               "--name vespa "
@@ -90,133 +120,206 @@ def get_test_vespa_client_schema_content() -> str:
     """)
 
 
-def generate_application_package() -> str:
-    base_dir = "vespa_dummy_application_package"
-    subdirs = ["schemas"]
-    files = {
-        "schemas": ["test_vespa_client.sd"],
-        "": ["services.xml"]
-    }
-    # Content for the files
-    content_for_services_xml = get_services_xml_content()
-    content_for_test_vespa_client_sd = get_test_vespa_client_schema_content()
-    # Create the directories and files, and write content
-    os.makedirs(base_dir, exist_ok=True)
-    for subdir in subdirs:
-        os.makedirs(os.path.join(base_dir, subdir), exist_ok=True)
-        for file in files[subdir]:
-            file_path = os.path.join(base_dir, subdir, file)
-            with open(file_path, 'w') as f:
-                if file == "test_vespa_client.sd":
-                    f.write(content_for_test_vespa_client_sd)
-    for file in files[""]:
-        file_path = os.path.join(base_dir, file)
-        with open(file_path, 'w') as f:
-            if file == "services.xml":
-                f.write(content_for_services_xml)
-    os.chdir(base_dir)
-    shutil.make_archive('../' + base_dir, 'zip', ".")
-    os.chdir("..")
-    zip_file_path = f"{base_dir}.zip"
-
-    if os.path.isfile(zip_file_path):
-        print(f"Zip file created successfully: {zip_file_path}")
-        # Remove the base directory
-        shutil.rmtree(base_dir)
-        print(f"Directory {base_dir} removed.")
-        return zip_file_path
-    else:
-        print("Failed to create the zip file.")
-
-
-def deploy_application_package(zip_file_path: str, max_retries: int = 5, backoff_factor: float = 0.5) -> None:
-    # URL and headers
-    url = "http://localhost:19071/application/v2/tenant/default/prepareandactivate"
-    headers = {
-        "Content-Type": "application/zip"
+def application_package_files() -> Dict[str, str]:
+    """The files of the application package, by their path in the package."""
+    return {
+        "services.xml": get_services_xml_content(),
+        "schemas/test_vespa_client.sd": get_test_vespa_client_schema_content(),
     }
 
-    # Ensure the zip file exists
-    if not os.path.isfile(zip_file_path):
-        print("Zip file does not exist.")
-        return
 
-    print("Start deploying the application package...")
+def package_hash(files: Dict[str, str]) -> str:
+    """A hash of the package's file names and contents, which does not depend on zip timestamps."""
+    digest = hashlib.sha256()
+    for name in sorted(files):
+        digest.update(name.encode() + b"\0" + files[name].encode() + b"\0")
+    return digest.hexdigest()
 
-    # Attempt to send the request with retries
-    for attempt in range(max_retries):
-        try:
-            with open(zip_file_path, 'rb') as zip_file:
-                response = requests.post(url, headers=headers, data=zip_file)
-            print(response.text)
-            break  # Success, exit the retry loop
-        except requests.exceptions.RequestException as e:
-            print(f"Attempt {attempt + 1} failed due to a request error: {e}")
-            if attempt < max_retries - 1:
-                # Calculate sleep time using exponential backoff
-                sleep_time = backoff_factor * (2 ** attempt)
-                print(f"Retrying in {sleep_time} seconds...")
-                time.sleep(sleep_time)
-            else:
-                print("Max retries reached. Aborting.")
-                return
-
-    # Cleanup
-    os.remove(zip_file_path)
-    print("Zip file removed.")
-
-
-def is_vespa_up(waiting_time: int = 60) -> bool:
-    for _ in range(waiting_time):
-        document_url = "http://localhost:8080"
-        try:
-            document_request = requests.get(document_url)
-            if document_request.status_code == 200:
-                print(f"Vespa is up and running! You can start Marqo. Make sure you set the Vespa environment variable")
-                return True
-        except requests.exceptions.ConnectionError:
-            pass
-        time.sleep(1)
 
-    print(f"Vespa is not up and running after {waiting_time}s")
+def generate_application_package() -> Tuple[bytes, str]:
+    """Builds the application package as an in-memory zip and returns it with its content hash.
 
+    The hash is written into services.xml as an XML comment, so that the hash of the active application can be
+    read back from the config server.
+    """
+    files = application_package_files()
+    content_hash = package_hash(files)
+    declaration, _, rest = files["services.xml"].partition("\n")
+    files["services.xml"] = f"{declaration}\n<!-- {PACKAGE_HASH_COMMENT}: {content_hash} -->\n{rest}"
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as package:
+        for name in sorted(files):
+            # A fixed timestamp keeps the zip itself identical across builds
+            package.writestr(zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0)), files[name])
+    print(f"Application package built in memory ({buffer.tell()} bytes, hash {content_hash[:12]})")
+    return buffer.getvalue(), content_hash
 
-def wait_vespa_container_running(max_wait_time: int = 60):
-    start_time = time.time()
-    # Check if the container is running
-    while True:
-        if time.time() - start_time > max_wait_time:
-            print("Maximum wait time exceeded. Vespa container may not be running.")
-            break
 
-        try:
-            output = subprocess.check_output(["docker", "inspect", "--format", "{{.State.Status}}", "vespa"])
-            if output.decode().strip() == "running":
-                print("Vespa container is up and running.")
-                break
-        except subprocess.CalledProcessError:
-            pass
+def active_package_hash(config_url: str = CONFIG_SERVER_URL) -> Optional[str]:
+    """The hash in the services.xml of the active application, or None if there is none or it has no hash."""
+    try:
+        response = requests.get(f"{config_url}{ACTIVE_SERVICES_XML_PATH}", timeout=10)
+    except requests.exceptions.RequestException:
+        return None
+    if response.status_code != 200:
+        return None
+    match = re.search(rf"<!-- {PACKAGE_HASH_COMMENT}: ([0-9a-f]+) -->", response.text)
+    return match.group(1) if match else None
+
+
+def _is_healthy(url: str) -> bool:
+    """Whether a Vespa state API health endpoint reports the service as up."""
+    try:
+        response = requests.get(f"{url}/state/v1/health", timeout=2)
+        return response.status_code == 200 and response.json().get("status", {}).get("code") == "up"
+    except (requests.exceptions.RequestException, ValueError):
+        return False
+
+
+class VespaReadiness:
+    """Waits for the Vespa container, its config server and its query/document endpoint, as soon as each is up.
+
+    The config server (19071) and the query/document container (8080) are probed concurrently in background
+    threads from the moment start_probes is called, and each sets an event when it answers. Callers wait on
+    the events, so the application package is deployed as soon as the config server is up and Vespa is
+    reported as serving as soon as the container is, with no fixed sleeps. Every phase is timed in a PhaseLog.
+    """
+
+    def __init__(self, config_url: str = CONFIG_SERVER_URL, query_url: str = QUERY_URL, container: str = "vespa",
+                 timeout_s: float = 300.0):
+        self.config_url = config_url
+        self.query_url = query_url
+        self.container = container
+        self.deadline = time.monotonic() + timeout_s
+        self.log = PhaseLog()
+        self.config_ready = threading.Event()
+        self.serving = threading.Event()
+        self._stopped = False
+        self._wakes = []
+        self._threads = []
+
+    def _probe(self, url: str, ready: threading.Event, wake: threading.Event) -> None:
+        if poll_until(lambda: self._stopped or _is_healthy(url), self.deadline, wake) and not self._stopped:
+            ready.set()
+
+    def start_probes(self) -> None:
+        for url, ready in ((self.config_url, self.config_ready), (self.query_url, self.serving)):
+            wake = threading.Event()
+            thread = threading.Thread(target=self._probe, args=(url, ready, wake), daemon=True)
+            thread.start()
+            self._wakes.append(wake)
+            self._threads.append(thread)
+
+    def wake_probes(self) -> None:
+        for wake in self._wakes:
+            wake.set()
+
+    def mark_deployed(self, skipped: bool = False) -> None:
+        # A skipped deploy is its own phase, so that it is not timed as a deploy
+        self.log.mark("deploy skipped (unchanged)" if skipped else "deployed")
+        # The query API comes up shortly after a deployment, or is already up, so stop backing off
+        self.wake_probes()
+
+    def stop(self) -> None:
+        self._stopped = True
+        self.wake_probes()
+        for thread in self._threads:
+            thread.join()
+
+    def _container_running(self) -> bool:
+        return container_status(self.container) == "running"
+
+    def wait_container_running(self) -> None:
+        if not poll_until(self._container_running, self.deadline):
+            raise TimeoutError(f"The {self.container} container is not running")
+        self.log.mark("container up")
+
+    def _wait(self, event: threading.Event, phase: str, what: str) -> None:
+        if not event.wait(max(0.0, self.deadline - time.monotonic())):
+            raise TimeoutError(f"{what} is not up after {self.log.summary() or 'starting'}")
+        self.log.mark(phase)
+
+    def wait_config_server(self) -> None:
+        self._wait(self.config_ready, "config server ready", f"The config server at {self.config_url}")
+
+    def wait_serving(self) -> None:
+        self._wait(self.serving, "serving", f"The query and document API at {self.query_url}")
+
+
+def deploy_application_package(package: bytes, content_hash: str, readiness: VespaReadiness) -> bool:
+    """Deploys the application package, retrying while the config server is still starting its deploy API.
+
+    Nothing is deployed if the active application already has the package's content hash. Returns whether the
+    package was deployed.
+    """
+    if active_package_hash(readiness.config_url) == content_hash:
+        print("The active application package is unchanged, skipping prepareandactivate.")
+        readiness.mark_deployed(skipped=True)
+        return False
+
+    url = f"{readiness.config_url}/application/v2/tenant/default/prepareandactivate"
+    headers = {
+        "Content-Type": "application/zip"
+    }
+
+    print("Start deploying the application package...")
+    errors = []
 
-        print("Waiting for Vespa container to start...")
-        time.sleep(5)
+    def deploy() -> bool:
+        try:
+            response = requests.post(url, headers=headers, data=package, timeout=60)
+        except requests.exceptions.RequestException as e:
+            errors.append(str(e))
+            return False
+        if response.status_code >= 500:
+            errors.append(response.text)
+            return False
+        print(response.text)
+        if not response.ok:
+            raise RuntimeError(f"The application package was rejected: {response.text}")
+        return True
+
+    if not poll_until(deploy, readiness.deadline, initial_interval=0.2, max_interval=2.0):
+        raise TimeoutError(f"Failed to deploy the application package: {errors[-1] if errors else 'timed out'}")
+    readiness.mark_deployed()
+    return True
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Start Vespa in docker and deploy a dummy application package.")
+    parser.add_argument("--reuse-container", action="store_true",
+                        help="Keep a running vespa container instead of recreating it. The package is then only "
+                             "deployed if it changed.")
+    parser.add_argument("--no-docker", action="store_true",
+                        help="Do not start a container, and deploy to a Vespa that is already starting or running, "
+                             "e.g. scripts/vespa_standin.py")
+    parser.add_argument("--config-url", default=CONFIG_SERVER_URL)
+    parser.add_argument("--query-url", default=QUERY_URL)
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds to wait for Vespa to be serving")
+    args = parser.parse_args()
+    readiness = VespaReadiness(args.config_url, args.query_url, timeout_s=args.timeout)
     try:
         # Start Vespa
-        start_vespa()
-        # Wait for the container is pulled and running
-        wait_vespa_container_running()
+        if not args.no_docker:
+            start_vespa(args.reuse_container)
+        # Probe the config server and the query API from now on, while the image is pulled and started
+        readiness.start_probes()
+        if not args.no_docker:
+            readiness.wait_container_running()
         # Generate the application package
-        zip_file_path = generate_application_package()
-        # Deploy the application package
-        time.sleep(10)
-        deploy_application_package(zip_file_path)
+        package, content_hash = generate_application_package()
+        # Deploy the application package as soon as the config server is up
+        readiness.wait_config_server()
+        deploy_application_package(package, content_hash, readiness)
         # Check if Vespa is up and running
-        is_vespa_up()
+        readiness.wait_serving()
+        print(f"Vespa is up and running! You can start Marqo. Make sure you set the Vespa environment variable")
+        print(f"Vespa startup: {readiness.log.summary()}")
     except Exception as e:
         print(f"An error occurred when staring vespa: {e}")
         sys.exit(1)
+    finally:
+        readiness.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,65 @@
+"""Helpers shared by the scripts that start services and wait for them: start_vespa.py and wait_for_marqo.py.
+
+The scripts put the repo root on the path and import this module as `scripts.startup_probes`, as the tests do.
+"""
+import subprocess
+import threading
+import time
+from typing import Callable, Optional
+
+
+def container_status(container: str) -> Optional[str]:
+    """The docker status of a container (e.g. "running" or "exited"), or None if it does not exist or docker is not
+    available."""
+    try:
+        output = subprocess.check_output(["docker", "inspect", "--format", "{{.State.Status}}", container],
+                                         stderr=subprocess.DEVNULL)
+        return output.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class PhaseLog:
+    """Records how long after the start each startup phase was reached, and prints it as it happens."""
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self.phases = []
+
+    def mark(self, phase: str) -> float:
+        elapsed = time.monotonic() - self.start
+        self.phases.append((phase, elapsed))
+        print(f"[{elapsed:7.2f}s] {phase}")
+        return elapsed
+
+    def summary(self) -> str:
+        previous = 0.0
+        parts = []
+        for phase, elapsed in self.phases:
+            parts.append(f"{phase} at {elapsed:.2f}s (+{elapsed - previous:.2f}s)")
+            previous = elapsed
+        return ", ".join(parts)
+
+
+def poll_until(probe: Callable[[], bool], deadline: float, wake: Optional[threading.Event] = None,
+               initial_interval: float = 0.05, max_interval: float = 1.0) -> bool:
+    """Calls probe until it returns True or the deadline (time.monotonic) passes.
+
+    The interval starts short, so that a service that is almost up is seen at once, and grows by half on every
+    failed probe up to max_interval, so that a slow start is not hammered. Setting wake probes again at once and
+    restarts from the short interval, e.g. when something happened that should make the service come up soon.
+    """
+    interval = initial_interval
+    while True:
+        if probe():
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        if wake is not None and wake.wait(min(interval, remaining)):
+            wake.clear()
+            interval = initial_interval
+            continue
+        if wake is None:
+            time.sleep(min(interval, remaining))
+        interval = min(max_interval, interval * 1.5)
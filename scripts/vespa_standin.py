@@ -0,0 +1,373 @@
+"""A local stand-in for the Vespa config server (19071) and query/document API (8080), without Docker.
+
+It serves what start_vespa.py and Marqo's local startup rely on, so that the deploy and readiness logic and its
+timing can be tested and benchmarked in seconds:
+    - /state/v1/health on both ports
+    - POST /application/v2/tenant/default/prepareandactivate, which validates the zipped application package
+      (services.xml and the schemas/*.sd files) and activates it
+    - GET of the active application's files under .../instance/default/content/
+    - /document/v1/{namespace}/{document type}/docid/{id} (PUT, POST, GET, DELETE), kept in memory, for the
+      document types of the active application
+
+Startup is simulated with delays: the config server only accepts connections config_delay_s seconds after start,
+and the query/document API activation_delay_s seconds after an application is activated, as a Vespa container does.
+Failure modes are the first deploy_failures deploys failing with 503 (the deploy API still starting), slow deploys
+(deploy_latency_s) and never_serve, where the query/document API never comes up after a deploy.
+
+    python scripts/vespa_standin.py --config-delay 3 --activation-delay 1
+    python scripts/start_vespa.py --no-docker
+
+It is not a Vespa implementation: schemas are checked for their structure and field types only, and there is no
+search.
+"""
+import argparse
+import io
+import json
+import re
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+from xml.etree import ElementTree
+
+DEPLOY_PATH = "/application/v2/tenant/default/prepareandactivate"
+CONTENT_PATH = "/application/v2/tenant/default/application/default/environment/prod/region/default/instance/default/" \
+               "content/"
+_PRIMITIVE_TYPES = {"string", "int", "long", "float", "double", "bool", "byte", "position", "raw", "uri",
+                    "predicate"}
+_FIELD = re.compile(r"\bfield\s+([\w.]+)\s+type\s+([^{\n]+?)\s*\{")
+
+
+class VespaStandinError(Exception):
+    """An error returned as a Vespa error response."""
+
+    def __init__(self, status: int, error_code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.error_code = error_code
+        self.message = message
+
+    def to_dict(self) -> Dict:
+        return {"error-code": self.error_code, "message": self.message}
+
+
+def _invalid(message: str) -> VespaStandinError:
+    return VespaStandinError(400, "INVALID_APPLICATION_PACKAGE", f"Invalid application package: {message}")
+
+
+def _valid_type(field_type: str) -> bool:
+    field_type = field_type.replace(" ", "")
+    if field_type in _PRIMITIVE_TYPES or re.fullmatch(r"tensor(<\w+>)?\(.+\)", field_type):
+        return True
+    match = re.fullmatch(r"(array|weightedset|reference)<(.+)>", field_type)
+    if match:
+        return match.group(1) == "reference" or _valid_type(match.group(2))
+    match = re.fullmatch(r"map<([^,]+),(.+)>", field_type)
+    return bool(match) and _valid_type(match.group(1)) and _valid_type(match.group(2))
+
+
+def validate_schema(name: str, content: str) -> None:
+    """Checks that a .sd file defines a schema called name with a document of the same name, that its braces
+    balance and that its fields have known types."""
+    depth = 0
+    for character in content:
+        depth += {"{": 1, "}": -1}.get(character, 0)
+        if depth < 0:
+            raise _invalid(f"schemas/{name}.sd has an unmatched `}}`")
+    if depth:
+        raise _invalid(f"schemas/{name}.sd has {depth} unclosed `{{`")
+    if not re.match(rf"\s*schema\s+{re.escape(name)}\s*(inherits\s+\w+\s*)?\{{", content):
+        raise _invalid(f"schemas/{name}.sd must define `schema {name}`")
+    if not re.search(rf"\bdocument\s+{re.escape(name)}\s*(inherits\s+\w+\s*)?\{{", content):
+        raise _invalid(f"schema {name} must have a `document {name}`")
+    for field, field_type in _FIELD.findall(content):
+        if not _valid_type(field_type):
+            raise _invalid(f"field {field} in schema {name} has unknown type `{field_type}`")
+
+
+def validate_application_package(package: bytes) -> Tuple[Dict[str, bytes], List[str]]:
+    """Validates a zipped application package and returns its files and document types."""
+    try:
+        with zipfile.ZipFile(io.BytesIO(package)) as archive:
+            files = {name: archive.read(name) for name in archive.namelist() if not name.endswith("/")}
+    except zipfile.BadZipFile as e:
+        raise _invalid(f"not a zip file: {e}")
+    if "services.xml" not in files:
+        raise _invalid("services.xml is missing")
+    try:
+        services = ElementTree.fromstring(files["services.xml"])
+    except ElementTree.ParseError as e:
+        raise _invalid(f"services.xml is not valid XML: {e}")
+    if services.tag != "services":
+        raise _invalid(f"the root element of services.xml must be <services>, got <{services.tag}>")
+    if services.find("container") is None and services.find("content") is None:
+        raise _invalid("services.xml must have a <container> or a <content> cluster")
+
+    schemas = {name[len("schemas/"):-len(".sd")]: content for name, content in files.items()
+               if name.startswith("schemas/") and name.endswith(".sd")}
+    for name, content in schemas.items():
+        validate_schema(name, content.decode())
+    document_types = []
+    for content in services.findall("content"):
+        for document in content.findall("documents/document"):
+            document_type = document.get("type")
+            if document_type not in schemas:
+                raise _invalid(f"content cluster {content.get('id')} has document type {document_type}, which has "
+                               f"no schemas/{document_type}.sd")
+            if document.get("mode") not in ("index", "streaming", "store-only"):
+                raise _invalid(f"document type {document_type} has unknown mode `{document.get('mode')}`")
+            document_types.append(document_type)
+    return files, document_types
+
+
+class StandinVespa:
+    """The state of the stand-in: the active application, the documents and the startup timeline.
+
+    Args:
+        config_delay_s: how long after start the config server accepts connections
+        activation_delay_s: how long after an application is activated the query/document API is up
+        deploy_latency_s: how long a deploy takes
+        deploy_failures: the number of deploys that fail with 503 before the deploy API works
+        never_serve: the query/document API never comes up
+    """
+
+    def __init__(self, config_delay_s: float = 0.0, activation_delay_s: float = 0.0, deploy_latency_s: float = 0.0,
+                 deploy_failures: int = 0, never_serve: bool = False):
+        self.config_delay_s = config_delay_s
+        self.activation_delay_s = activation_delay_s
+        self.deploy_latency_s = deploy_latency_s
+        self.deploy_failures = deploy_failures
+        self.never_serve = never_serve
+        self.started_at = time.monotonic()
+        self.activated_at: Optional[float] = None
+        self.session_id = 0
+        self.deploys = 0
+        self.files: Dict[str, bytes] = {}
+        self.document_types: List[str] = []
+        self.documents: Dict[Tuple[str, str], Dict] = {}
+        # (event, seconds since start): deploy requests and their outcomes, for timing the deploy logic
+        self.events: List[Tuple[str, float]] = []
+        self.lock = threading.Lock()
+
+    def _event(self, event: str) -> None:
+        self.events.append((event, round(time.monotonic() - self.started_at, 4)))
+
+    def serving(self) -> bool:
+        return (not self.never_serve and self.activated_at is not None and
+                time.monotonic() >= self.activated_at + self.activation_delay_s)
+
+    def deploy(self, package: bytes) -> Dict:
+        with self.lock:
+            self.deploys += 1
+            self._event("deploy requested")
+            if self.deploy_failures:
+                self.deploy_failures -= 1
+                self._event("deploy failed")
+                raise VespaStandinError(503, "OUT_OF_CAPACITY", "The deploy API is not ready yet")
+        time.sleep(self.deploy_latency_s)
+        try:
+            files, document_types = validate_application_package(package)
+        except VespaStandinError:
+            with self.lock:
+                self._event("deploy rejected")
+            raise
+        with self.lock:
+            self.session_id += 1
+            self.files, self.document_types = files, document_types
+            self.documents = {key: document for key, document in self.documents.items()
+                              if key[0] in document_types}
+            self.activated_at = time.monotonic()
+            self._event("activated")
+            return {"message": f"Session {self.session_id} for tenant 'default' prepared and activated.",
+                    "session-id": str(self.session_id), "activated": True}
+
+    def handle_config(self, method: str, path: str, body: bytes) -> Tuple[int, bytes]:
+        if path == "/state/v1/health" and method == "GET":
+            return 200, json.dumps({"status": {"code": "up"}}).encode()
+        if path == DEPLOY_PATH and method == "POST":
+            return 200, json.dumps(self.deploy(body)).encode()
+        if path.startswith(CONTENT_PATH) and method == "GET":
+            name = path[len(CONTENT_PATH):]
+            with self.lock:
+                if name not in self.files:
+                    raise VespaStandinError(404, "NOT_FOUND", f"No active application file {name}")
+                return 200, self.files[name]
+        raise VespaStandinError(404, "NOT_FOUND", f"{method} {path} is not supported by the stand-in")
+
+    def handle_query(self, method: str, path: str, body: bytes) -> Tuple[int, bytes]:
+        if not self.serving():
+            raise VespaStandinError(503, "UNAVAILABLE", "No application is active yet")
+        if path == "/state/v1/health" and method == "GET":
+            return 200, json.dumps({"status": {"code": "up"}}).encode()
+        if path == "/" and method == "GET":
+            return 200, json.dumps({"handlers": []}).encode()
+        parts = [unquote(part) for part in path.strip("/").split("/")]
+        if len(parts) == 6 and parts[:2] == ["document", "v1"] and parts[4] == "docid":
+            return self._document(method, parts[3], parts[5], path, body)
+        raise VespaStandinError(404, "NOT_FOUND", f"{method} {path} is not supported by the stand-in")
+
+    def _document(self, method: str, document_type: str, document_id: str, path: str,
+                  body: bytes) -> Tuple[int, bytes]:
+        if document_type not in self.document_types:
+            raise VespaStandinError(400, "BAD_REQUEST", f"Document type {document_type} does not exist")
+        key = (document_type, document_id)
+        response = {"pathId": path, "id": f"id:{path.split('/')[3]}:{document_type}::{document_id}"}
+        with self.lock:
+            if method in ("POST", "PUT"):
+                try:
+                    fields = json.loads(body or b"{}").get("fields", {})
+                except (json.JSONDecodeError, AttributeError):
+                    raise VespaStandinError(400, "BAD_REQUEST", "The body must be a JSON object with `fields`")
+                if method == "PUT":
+                    fields = {**self.documents.get(key, {}), **fields}
+                self.documents[key] = fields
+            elif method == "GET":
+                if key not in self.documents:
+                    return 404, json.dumps(response).encode()
+                response["fields"] = self.documents[key]
+            elif method == "DELETE":
+                self.documents.pop(key, None)
+            else:
+                raise VespaStandinError(405, "METHOD_NOT_ALLOWED", f"{method} is not supported")
+        return 200, json.dumps(response).encode()
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _handle(self):
+        path = urlparse(self.path).path
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        vespa: StandinVespa = self.server.vespa
+        try:
+            if self.server.role == "config":
+                status, response = vespa.handle_config(self.command, path, body)
+            else:
+                status, response = vespa.handle_query(self.command, path, body)
+        except VespaStandinError as e:
+            status, response = e.status, json.dumps(e.to_dict()).encode()
+        except Exception as e:
+            status, response = 500, json.dumps({"error-code": "INTERNAL_SERVER_ERROR", "message": repr(e)}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/xml" if response.startswith(b"<") else "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandinVespaServer:
+    """Serves a StandinVespa's config server and query/document API from background threads.
+
+    Both ports are bound at once (port 0 picks a free one), but the config server only accepts connections once
+    its delay has passed, so probes see connection errors until then, as with a starting container.
+
+    Usage:
+        with StandinVespaServer(StandinVespa(config_delay_s=1)) as server:
+            requests.get(f"{server.config_url}/state/v1/health")
+    """
+
+    def __init__(self, vespa: Optional[StandinVespa] = None, host: str = "127.0.0.1", config_port: int = 0,
+                 query_port: int = 0):
+        self.vespa = vespa or StandinVespa()
+        self._servers = {}
+        for role, port in (("config", config_port), ("query", query_port)):
+            server = ThreadingHTTPServer((host, port), _RequestHandler, bind_and_activate=False)
+            server.allow_reuse_address = True
+            server.daemon_threads = True
+            server.server_bind()
+            server.vespa, server.role = self.vespa, role
+            self._servers[role] = server
+        self._threads: List[threading.Thread] = []
+        self._stopped = threading.Event()
+        # The roles whose server is serving, under _lock so that stop only shuts down servers that serve
+        self._serving = set()
+        self._lock = threading.Lock()
+
+    def _url(self, role: str) -> str:
+        host, port = self._servers[role].server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def config_url(self) -> str:
+        return self._url("config")
+
+    @property
+    def query_url(self) -> str:
+        return self._url("query")
+
+    def _serve(self, role: str, delay_s: float) -> None:
+        if self._stopped.wait(delay_s):
+            return
+        server = self._servers[role]
+        with self._lock:
+            if self._stopped.is_set():
+                return
+            server.server_activate()
+            self._serving.add(role)
+        server.serve_forever(poll_interval=0.05)
+
+    def start(self) -> "StandinVespaServer":
+        self.vespa.started_at = time.monotonic()
+        for role, delay_s in (("config", self.vespa.config_delay_s), ("query", 0.0)):
+            thread = threading.Thread(target=self._serve, args=(role, delay_s), name=f"vespa-standin-{role}",
+                                      daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stopped.set()
+        for role, server in self._servers.items():
+            # shutdown waits for serve_forever to return, so it is only called on servers that serve
+            if role in self._serving:
+                server.shutdown()
+            server.server_close()
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self) -> "StandinVespaServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the local Vespa config server and query API stand-in.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--config-port", type=int, default=19071)
+    parser.add_argument("--query-port", type=int, default=8080)
+    parser.add_argument("--config-delay", type=float, default=0.0,
+                        help="Seconds before the config server accepts connections")
+    parser.add_argument("--activation-delay", type=float, default=0.0,
+                        help="Seconds after a deploy before the query/document API is up")
+    parser.add_argument("--deploy-latency", type=float, default=0.0, help="Seconds each deploy takes")
+    parser.add_argument("--deploy-failures", type=int, default=0,
+                        help="The number of deploys that fail with 503 before deploys work")
+    parser.add_argument("--never-serve", action="store_true", help="The query/document API never comes up")
+    args = parser.parse_args()
+    vespa = StandinVespa(args.config_delay, args.activation_delay, args.deploy_latency, args.deploy_failures,
+                         args.never_serve)
+    server = StandinVespaServer(vespa, args.host, args.config_port, args.query_port).start()
+    print(f"Vespa stand-in: config server on {server.config_url}, query/document API on {server.query_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Waits for a starting Marqo to be ready, and reports how long each startup phase took.
+
+The start scripts used to run `curl` every 0.1s until the root endpoint answered, which spawned a process per poll
+and only showed that the API was accepting requests. This probes over one keep-alive connection, with polls that
+back off while Marqo is starting, and waits for each phase in turn:
+    - accepting connections: Marqo answers HTTP requests
+    - root endpoint: GET / returns Marqo's welcome message (its version is reported)
+    - healthy: the inference and backend statuses of GET /health (or /indexes/{index}/health with --index) are not
+      red, or are green with --require-green
+    - models loaded: GET /models lists every model of --model, or of MARQO_MODELS_TO_PRELOAD in the docker args
+      given after `--`
+
+    python scripts/wait_for_marqo.py --url http://localhost:8882 --container marqo -- -e MARQO_MODELS_TO_PRELOAD='[]'
+
+It exits 1 with a diagnosis when Marqo is not ready before --timeout: the phase it is stuck in and the last thing
+Marqo answered. With --container, it fails at once if the container exits, with the end of its logs. The time of
+each phase is printed, written to --output as JSON, and saved as a `marqo_startup` benchmark run with --record, so
+that startup times can be compared across images with result_store.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import requests
+
+# The scripts are run as `python scripts/<name>.py`, so the repo root is put on the path to import the other scripts
+# and the test harness as packages, the way the tests import them
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from scripts.startup_probes import PhaseLog, container_status, poll_until
+
+MARQO_URL = "http://localhost:8882"
+# How often to check that the container is still running while Marqo refuses connections
+CONTAINER_CHECK_INTERVAL_S = 2.0
+
+
+def models_to_preload(docker_args: Sequence[str]) -> Optional[List[str]]:
+    """The model names in the last MARQO_MODELS_TO_PRELOAD of `docker run` arguments, or None if it is not set or
+    cannot be parsed."""
+    models = None
+    for arg in docker_args:
+        name, _, value = arg.partition("=")
+        # The variable is passed as `-e NAME=VALUE` or `-eNAME=VALUE`
+        if (name[2:] if name.startswith("-e") else name) != "MARQO_MODELS_TO_PRELOAD":
+            continue
+        try:
+            entries = json.loads(value)
+        except json.JSONDecodeError:
+            models = None
+            continue
+        # A preloaded model is a name or a custom model's {"model": ..., "modelProperties": ...}
+        models = [entry["model"] if isinstance(entry, dict) else entry for entry in entries]
+    return models
+
+
+class MarqoReadiness:
+    """Polls a starting Marqo over one connection until it is ready, and times each phase in a PhaseLog.
+
+    Args:
+        url: the Marqo URL
+        timeout_s: how long to wait for Marqo to be ready, from started_at
+        index: check the health of this index instead of Marqo's
+        models: the models that must be loaded
+        require_green: require green inference and backend statuses, instead of statuses that are not red
+        container: the docker container Marqo runs in. If it stops running, wait fails at once.
+        started_at: the time.time() the phases are measured from, e.g. just before `docker run`. Defaults to now.
+    """
+
+    def __init__(self, url: str = MARQO_URL, timeout_s: float = 600.0, index: Optional[str] = None,
+                 models: Sequence[str] = (), require_green: bool = False, container: Optional[str] = None,
+                 started_at: Optional[float] = None):
+        self.url = url.rstrip("/")
+        self.index = index
+        self.models = list(models)
+        self.accepted_statuses = {"green"} if require_green else {"green", "yellow"}
+        self.container = container
+        self.session = requests.Session()
+        self.log = PhaseLog()
+        if started_at is not None:
+            self.log.start -= time.time() - started_at
+        self.deadline = self.log.start + timeout_s
+        self.version: Optional[str] = None
+        # The last answer of the phase being waited for, reported if it times out
+        self.diagnosis = "not probed yet"
+        self._last_container_check = 0.0
+
+    def _get(self, path: str) -> Optional[requests.Response]:
+        try:
+            return self.session.get(f"{self.url}{path}", timeout=(2, 10))
+        except requests.exceptions.RequestException as e:
+            self.diagnosis = f"GET {path} failed: {type(e).__name__}"
+            self._check_container()
+            return None
+
+    def _check_container(self) -> None:
+        if self.container is None or time.monotonic() - self._last_container_check < CONTAINER_CHECK_INTERVAL_S:
+            return
+        self._last_container_check = time.monotonic()
+        status = container_status(self.container)
+        if status not in ("created", "running", "restarting"):
+            try:
+                logs = subprocess.run(["docker", "logs", "--tail", "20", self.container], capture_output=True,
+                                      text=True, timeout=10)
+                logs = (logs.stdout + logs.stderr).strip()
+            except (OSError, subprocess.SubprocessError) as e:
+                logs = f"(no logs: {e})"
+            raise RuntimeError(f"The {self.container} container is {status or 'missing'} while Marqo is starting. "
+                               f"The end of its logs:\n{logs}")
+
+    def _json(self, path: str) -> Optional[Dict]:
+        response = self._get(path)
+        if response is None:
+            return None
+        if response.status_code != 200:
+            self.diagnosis = f"GET {path} returned {response.status_code}: {response.text[:200]}"
+            return None
+        try:
+            return response.json()
+        except ValueError:
+            self.diagnosis = f"GET {path} returned a body that is not JSON: {response.text[:200]}"
+            return None
+
+    def _accepting_connections(self) -> bool:
+        return self._get("/") is not None
+
+    def _root_ready(self) -> bool:
+        body = self._json("/")
+        if body is None:
+            return False
+        if "Marqo" not in str(body.get("message", "")):
+            self.diagnosis = f"GET / returned {body}"
+            return False
+        self.version = body.get("version")
+        return True
+
+    def _healthy(self) -> bool:
+        path = f"/indexes/{self.index}/health" if self.index else "/health"
+        body = self._json(path)
+        if body is None:
+            return False
+        statuses = {part: (body.get(part) or {}).get("status") for part in ("inference", "backend")}
+        self.diagnosis = ", ".join(f"{part} is {status}" for part, status in statuses.items())
+        return all(status in self.accepted_statuses for status in statuses.values())
+
+    def _models_loaded(self) -> bool:
+        body = self._json("/models")
+        if body is None:
+            return False
+        loaded = {model["model_name"] for model in body.get("models", [])}
+        missing = [model for model in self.models if model not in loaded]
+        self.diagnosis = f"models {missing} are not loaded (loaded: {sorted(loaded)})"
+        return not missing
+
+    def _wait(self, probe: Callable[[], bool], phase: str) -> None:
+        if not poll_until(probe, self.deadline, initial_interval=0.05, max_interval=1.0):
+            raise TimeoutError(f"Marqo at {self.url} is not ready: waiting for `{phase}` after "
+                               f"{time.monotonic() - self.log.start:.1f}s, {self.diagnosis}. "
+                               f"Phases: {self.log.summary() or 'none'}")
+        self.log.mark(phase)
+
+    def wait(self) -> Dict:
+        """Waits for every phase, and returns the timings. Raises TimeoutError with a diagnosis if Marqo is not
+        ready in time, and RuntimeError if its container stops."""
+        try:
+            self._wait(self._accepting_connections, "accepting connections")
+            self._wait(self._root_ready, "root endpoint")
+            self._wait(self._healthy, "healthy")
+            if self.models:
+                self._wait(self._models_loaded, "models loaded")
+        finally:
+            self.session.close()
+        return self.timings()
+
+    def timings(self) -> Dict:
+        """The startup timings as a benchmark case: the time each phase was reached at and took, in seconds."""
+        phases, durations, previous = {}, {}, 0.0
+        for phase, elapsed in self.log.phases:
+            phases[phase] = round(elapsed, 3)
+            durations[phase] = round(elapsed - previous, 3)
+            previous = elapsed
+        return {
+            "name": "startup",
+            "params": {"url": self.url, "index": self.index, "models": self.models},
+            "version": self.version,
+            "duration_s": round(previous, 3),
+            "phases_s": phases,
+            "phase_durations_s": durations,
+        }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Wait for Marqo to be ready and report its startup timings. "
+                                                 "Arguments after -- are the `docker run` arguments Marqo was "
+                                                 "started with, for MARQO_MODELS_TO_PRELOAD.")
+    parser.add_argument("--url", default=MARQO_URL)
+    parser.add_argument("--timeout", type=float, default=600.0, help="Seconds to wait for Marqo to be ready")
+    parser.add_argument("--index", help="Check the health of this index instead of Marqo's")
+    parser.add_argument("--model", action="append", default=[], help="A model that must be loaded (repeatable)")
+    parser.add_argument("--require-green", action="store_true", help="Do not accept yellow health statuses")
+    parser.add_argument("--container", help="The docker container Marqo runs in, to fail at once if it exits")
+    parser.add_argument("--started-at", type=float,
+                        help="The time (seconds since the epoch) to measure the phases from, e.g. $(date +%%s.%%N) "
+                             "before docker run")
+    parser.add_argument("--output", help="Write the timings to this JSON file")
+    parser.add_argument("--record", action="store_true",
+                        help="Save the timings as a marqo_startup benchmark run (see tests/benchmarks/reporting.py)")
+    parser.add_argument("docker_args", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    models = args.model or models_to_preload(args.docker_args) or []
+    readiness = MarqoReadiness(args.url, args.timeout, args.index, models, args.require_green, args.container,
+                               args.started_at)
+    try:
+        timings = readiness.wait()
+    except (TimeoutError, RuntimeError) as e:
+        print(f"Marqo did not start: {e}")
+        return 1
+    print(f"Marqo {timings['version']} is ready: {readiness.log.summary()}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(timings, f, indent=2)
+    if args.record:
+        from tests.benchmarks import reporting
+        print(f"Startup timings written to {reporting.write_results('marqo_startup', [timings])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
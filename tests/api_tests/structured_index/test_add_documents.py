@@ -1,6 +1,5 @@
 import copy
 from unittest import mock
-import uuid
 import pytest
 
 from marqo.client import Client
@@ -11,8 +10,35 @@ from tests.marqo_test import MarqoTestCase
 
 @pytest.mark.fixed
 class TestStructuredAddDocuments(MarqoTestCase):
-    text_index_name = "add_doc_api_test_structured_index" + str(uuid.uuid4()).replace('-', '')
-    image_index_name = "add_doc_api_test_structured_image_index" + str(uuid.uuid4()).replace('-', '')
+    pooled_indexes = {
+        "text_index_name": {
+            "type": "structured",
+            "model": "sentence-transformers/all-MiniLM-L6-v2",
+            "allFields": [
+                {"name": "title", "type": "text"},
+                {"name": "content", "type": "text"},
+                {"name": "int_field_1", "type": "int"},
+                {"name": "float_field_1", "type": "float"},
+                {"name": "long_field_1", "type": "long"},
+                {"name": "double_field_1", "type": "double"},
+                {"name": "array_int_field_1", "type": "array<int>"},
+                {"name": "array_float_field_1", "type": "array<float>"},
+                {"name": "array_long_field_1", "type": "array<long>"},
+                {"name": "array_double_field_1", "type": "array<double>"},
+                {"name": "custom_vector_field_1", "type": "custom_vector", "features": ["lexical_search", "filter"]},
+            ],
+            "tensorFields": ["title", "content", "custom_vector_field_1"],
+        },
+        "image_index_name": {
+            "type": "structured",
+            "model": "open_clip/ViT-B-32/openai",
+            "allFields": [
+                {"name": "title", "type": "text"},
+                {"name": "image_content", "type": "image_pointer"},
+            ],
+            "tensorFields": ["title", "image_content"],
+        }
+    }
 
     @classmethod
     def setUpClass(cls):
@@ -20,45 +46,6 @@ class TestStructuredAddDocuments(MarqoTestCase):
 
         cls.client = Client(**cls.client_settings)
 
-        cls.create_indexes([
-            {
-                "indexName": cls.text_index_name,
-                "type": "structured",
-                "model": "sentence-transformers/all-MiniLM-L6-v2",
-                "allFields": [
-                    {"name": "title", "type": "text"},
-                    {"name": "content", "type": "text"},
-                    {"name": "int_field_1", "type": "int"},
-                    {"name": "float_field_1", "type": "float"},
-                    {"name": "long_field_1", "type": "long"},
-                    {"name": "double_field_1", "type": "double"},
-                    {"name": "array_int_field_1", "type": "array<int>"},
-                    {"name": "array_float_field_1", "type": "array<float>"},
-                    {"name": "array_long_field_1", "type": "array<long>"},
-                    {"name": "array_double_field_1", "type": "array<double>"},
-                    {"name": "custom_vector_field_1", "type": "custom_vector", "features": ["lexical_search", "filter"]},
-                ],
-                "tensorFields": ["title", "content", "custom_vector_field_1"],
-            },
-            {
-                "indexName": cls.image_index_name,
-                "type": "structured",
-                "model": "open_clip/ViT-B-32/openai",
-                "allFields": [
-                    {"name": "title", "type": "text"},
-                    {"name": "image_content", "type": "image_pointer"},
-                ],
-                "tensorFields": ["title", "image_content"],
-            }
-        ]
-        )
-
-        cls.indexes_to_delete = [cls.text_index_name, cls.image_index_name]
-
-    def tearDown(self):
-        if self.indexes_to_delete:
-            self.clear_indexes(self.indexes_to_delete)
-
     def test_add_documents_with_ids(self):
         d1 = {
             "title": "Cool Document 1",
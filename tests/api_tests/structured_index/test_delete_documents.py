@@ -1,4 +1,3 @@
-import uuid
 import pytest
 
 from marqo.client import Client
@@ -8,8 +7,26 @@ from tests.marqo_test import MarqoTestCase
 
 @pytest.mark.fixed
 class TestStructuredDeleteDocuments(MarqoTestCase):
-    text_index_name = "api_test_structured_index" + str(uuid.uuid4()).replace('-', '')
-    image_index_name = "api_test_structured_image_index" + str(uuid.uuid4()).replace('-', '')
+    pooled_indexes = {
+        "text_index_name": {
+            "type": "structured",
+            "model": "sentence-transformers/all-MiniLM-L6-v2",
+            "allFields": [
+                {"name": "title", "type": "text"},
+                {"name": "content", "type": "text"},
+            ],
+            "tensorFields": ["title", "content"],
+        },
+        "image_index_name": {
+            "type": "structured",
+            "model": "open_clip/ViT-B-32/openai",
+            "allFields": [
+                {"name": "title", "type": "text"},
+                {"name": "image_content", "type": "image_pointer"},
+            ],
+            "tensorFields": ["title", "image_content"],
+        }
+    }
 
     @classmethod
     def setUpClass(cls):
@@ -17,35 +34,6 @@ class TestStructuredDeleteDocuments(MarqoTestCase):
 
         cls.client = Client(**cls.client_settings)
 
-        cls.create_indexes([
-            {
-                "indexName": cls.text_index_name,
-                "type": "structured",
-                "model": "sentence-transformers/all-MiniLM-L6-v2",
-                "allFields": [
-                    {"name": "title", "type": "text"},
-                    {"name": "content", "type": "text"},
-                ],
-                "tensorFields": ["title", "content"],
-            },
-            {
-                "indexName": cls.image_index_name,
-                "type": "structured",
-                "model": "open_clip/ViT-B-32/openai",
-                "allFields": [
-                    {"name": "title", "type": "text"},
-                    {"name": "image_content", "type": "image_pointer"},
-                ],
-                "tensorFields": ["title", "image_content"],
-            }
-        ])
-
-        cls.indexes_to_delete = [cls.text_index_name, cls.image_index_name]
-
-    def tearDown(self):
-        if self.indexes_to_delete:
-            self.clear_indexes(self.indexes_to_delete)
-
     def test_delete_docs(self):
         self.client.index(self.text_index_name).add_documents([
             {"title": "wow camel", "_id": "123"},
@@ -1,5 +1,3 @@
-import uuid
-
 import pytest
 from marqo.client import Client
 from marqo.errors import MarqoWebError
@@ -9,8 +7,41 @@ from tests.marqo_test import MarqoTestCase
 
 @pytest.mark.fixed
 class TestStructuredGetStats(MarqoTestCase):
-    text_index_name = "api_test_structured_index" + str(uuid.uuid4()).replace('-', '')
-    image_index_name = "api_test_structured_image_index" + str(uuid.uuid4()).replace('-', '')
+    pooled_indexes = {
+        "text_index_name": {
+            "type": "structured",
+            "model": "sentence-transformers/all-MiniLM-L6-v2",
+            "allFields": [
+                {"name": "title", "type": "text"},
+                {"name": "content", "type": "text"},
+                {"name": "non_tensor", "type": "text"},
+                {"name": "my_multi_modal_field",
+                 "type": "multimodal_combination",
+                 "dependentFields": {
+                     "title": 0.5, "content": 0.5
+                 }
+                 },
+            ],
+            "tensorFields": ["title", "content", "my_multi_modal_field"],
+        },
+        "image_index_name": {
+            "type": "structured",
+            "model": "open_clip/ViT-B-32/openai",
+            "allFields": [
+                {"name": "title", "type": "text"},
+                {"name": "image_content", "type": "image_pointer"},
+                {"name": "non_tensor", "type": "text"},
+
+                {"name": "my_multi_modal_field",
+                 "type": "multimodal_combination",
+                 "dependentFields": {
+                    "title": 0.5, "image_content": 0.5
+                    }
+                },
+            ],
+            "tensorFields": ["title", "image_content", "my_multi_modal_field"],
+        }
+    }
 
     @classmethod
     def setUpClass(cls):
@@ -18,50 +49,6 @@ class TestStructuredGetStats(MarqoTestCase):
 
         cls.client = Client(**cls.client_settings)
 
-        cls.create_indexes([
-            {
-                "indexName": cls.text_index_name,
-                "type": "structured",
-                "model": "sentence-transformers/all-MiniLM-L6-v2",
-                "allFields": [
-                    {"name": "title", "type": "text"},
-                    {"name": "content", "type": "text"},
-                    {"name": "non_tensor", "type": "text"},
-                    {"name": "my_multi_modal_field",
-                     "type": "multimodal_combination",
-                     "dependentFields": {
-                         "title": 0.5, "content": 0.5
-                     }
-                     },
-                ],
-                "tensorFields": ["title", "content", "my_multi_modal_field"],
-            },
-            {
-                "indexName": cls.image_index_name,
-                "type": "structured",
-                "model": "open_clip/ViT-B-32/openai",
-                "allFields": [
-                    {"name": "title", "type": "text"},
-                    {"name": "image_content", "type": "image_pointer"},
-                    {"name": "non_tensor", "type": "text"},
-
-                    {"name": "my_multi_modal_field",
-                     "type": "multimodal_combination",
-                     "dependentFields": {
-                        "title": 0.5, "image_content": 0.5
-                        }
-                    },
-                ],
-                "tensorFields": ["title", "image_content", "my_multi_modal_field"],
-            }
-        ])
-        cls.indexes_to_delete= [cls.text_index_name, cls.image_index_name]
-
-    def tearDown(self):
-        if self.indexes_to_delete:
-            self.clear_indexes(self.indexes_to_delete)
-
-    
     def test_get_status_response_format(self):
         res = self.client.index(self.text_index_name).get_stats()
         assert isinstance(res, dict)
@@ -15,6 +15,7 @@ from tests.marqo_test import MarqoTestCase
 
 @pytest.mark.fixed
 class TestStructuredUpdateDocuments(MarqoTestCase):
+    index_models = ["random/small"]
     update_doc_index_name = "update_doc_api_test_index" + str(uuid.uuid4()).replace('-', '')
     large_score_modifier_index_name = ("update_doc_api_test_score_modifier_index" +
                                         str(uuid.uuid4()).replace('-', ''))
@@ -1,5 +1,4 @@
 import copy
-import uuid
 from unittest import mock
 
 import marqo
@@ -14,9 +13,42 @@ from tests.marqo_test import MarqoTestCase
 
 @pytest.mark.fixed
 class TestStructuredSearch(MarqoTestCase):
-    text_index_name = "api_test_structured_index_text" + str(uuid.uuid4()).replace('-', '')
-    image_index_name = "api_test_structured_image_index_image" + str(uuid.uuid4()).replace('-', '')
-    filter_test_index_name = "api_test_structured_filter_index_filter" + str(uuid.uuid4()).replace('-', '')
+    pooled_indexes = {
+        "text_index_name": {
+            "type": "structured",
+            "model": "sentence-transformers/all-MiniLM-L6-v2",
+            "allFields": [
+                {"name": "title", "type": "text", "features": ["filter", "lexical_search"]},
+                {"name": "content", "type": "text", "features": ["filter", "lexical_search"]},
+            ],
+            "tensorFields": ["title", "content"],
+        },
+        "filter_test_index_name": {
+            "type": "structured",
+            "model": "sentence-transformers/all-MiniLM-L6-v2",
+            "allFields": [
+                {"name": "field_a", "type": "text", "features": ["filter", "lexical_search"]},
+                {"name": "field_b", "type": "text", "features": ["filter"]},
+                {"name": "str_for_filtering", "type": "text", "features": ["filter"]},
+                {"name": "int_for_filtering", "type": "int", "features": ["filter"]},
+                {"name": "long_field_1", "type": "long", "features": ["filter"]},
+                {"name": "double_field_1", "type": "double", "features": ["filter"]},
+                {"name": "array_long_field_1", "type": "array<long>", "features": ["filter"]},
+                {"name": "array_double_field_1", "type": "array<double>", "features": ["filter"]}
+            ],
+            "tensorFields": ["field_a", "field_b"],
+        },
+        "image_index_name": {
+            "type": "structured",
+            "model": "open_clip/ViT-B-32/openai",
+            "allFields": [
+                {"name": "title", "type": "text", "features": ["filter", "lexical_search"]},
+                {"name": "content", "type": "text", "features": ["filter", "lexical_search"]},
+                {"name": "image_content", "type": "image_pointer"},
+            ],
+            "tensorFields": ["title", "image_content"],
+        }
+    }
 
     @classmethod
     def setUpClass(cls):
@@ -24,52 +56,6 @@ class TestStructuredSearch(MarqoTestCase):
 
         cls.client = Client(**cls.client_settings)
 
-        cls.create_indexes([
-            {
-                "indexName": cls.text_index_name,
-                "type": "structured",
-                "model": "sentence-transformers/all-MiniLM-L6-v2",
-                "allFields": [
-                    {"name": "title", "type": "text", "features": ["filter", "lexical_search"]},
-                    {"name": "content", "type": "text", "features": ["filter", "lexical_search"]},
-                ],
-                "tensorFields": ["title", "content"],
-            },
-            {
-                "indexName": cls.filter_test_index_name,
-                "type": "structured",
-                "model": "sentence-transformers/all-MiniLM-L6-v2",
-                "allFields": [
-                    {"name": "field_a", "type": "text", "features": ["filter", "lexical_search"]},
-                    {"name": "field_b", "type": "text", "features": ["filter"]},
-                    {"name": "str_for_filtering", "type": "text", "features": ["filter"]},
-                    {"name": "int_for_filtering", "type": "int", "features": ["filter"]},
-                    {"name": "long_field_1", "type": "long", "features": ["filter"]},
-                    {"name": "double_field_1", "type": "double", "features": ["filter"]},
-                    {"name": "array_long_field_1", "type": "array<long>", "features": ["filter"]},
-                    {"name": "array_double_field_1", "type": "array<double>", "features": ["filter"]}
-                ],
-                "tensorFields": ["field_a", "field_b"],
-            },
-            {
-                "indexName": cls.image_index_name,
-                "type": "structured",
-                "model": "open_clip/ViT-B-32/openai",
-                "allFields": [
-                    {"name": "title", "type": "text", "features": ["filter", "lexical_search"]},
-                    {"name": "content", "type": "text", "features": ["filter", "lexical_search"]},
-                    {"name": "image_content", "type": "image_pointer"},
-                ],
-                "tensorFields": ["title", "image_content"],
-            }
-        ])
-
-        cls.indexes_to_delete = [cls.text_index_name, cls.image_index_name, cls.filter_test_index_name]
-
-    def setUp(self):
-        if self.indexes_to_delete:
-            self.clear_indexes(self.indexes_to_delete)
-            
     @staticmethod
     def strip_marqo_fields(doc, strip_id=True):
         """Strips Marqo fields from a returned doc to get the original doc"""
@@ -1,4 +1,3 @@
-import uuid
 from unittest.mock import patch
 
 import pytest
@@ -8,32 +7,19 @@ from tests.marqo_test import MarqoTestCase
 
 @pytest.mark.fixed
 class TestHealth(MarqoTestCase):
-
-
-    @classmethod
-    def setUpClass(cls) -> None:
-        super().setUpClass()
-
-        cls.structured_index_name = "structured_" + str(uuid.uuid4()).replace('-', '')
-        cls.unstructured_index_name = "unstructured_" + str(uuid.uuid4()).replace('-', '')
-
-        cls.create_indexes([
-            {
-                "indexName": cls.structured_index_name,
-                "type": "structured",
-                "model": "sentence-transformers/all-MiniLM-L6-v2",
-                "allFields": [
-                    {"name": "title", "type": "text"},
-                ],
-                "tensorFields": ["title"]
-            },
-            {
-                "indexName": cls.unstructured_index_name,
-                "type": "unstructured",
-            }
-        ])
-
-        cls.indexes_to_delete = [cls.structured_index_name, cls.unstructured_index_name]
+    pooled_indexes = {
+        "structured_index_name": {
+            "type": "structured",
+            "model": "sentence-transformers/all-MiniLM-L6-v2",
+            "allFields": [
+                {"name": "title", "type": "text"},
+            ],
+            "tensorFields": ["title"]
+        },
+        "unstructured_index_name": {
+            "type": "unstructured",
+        }
+    }
 
     def test_check_index_health_response_format(self):
         test_cases = [
@@ -32,6 +32,7 @@ def generate_unstructured_index_settings_dict(index_name, image_preprocessing_me
 class TestUnstructuredImageChunking(MarqoTestCase):
     """Test for image chunking as a preprocessing step
     """
+    index_models = ["open_clip/ViT-B-32/openai"]
 
     @classmethod
     def setUpClass(cls) -> None:
@@ -23,6 +23,7 @@ def generate_structured_index_settings_dict(index_name, image_preprocessing_meth
 class TestImageReranking(MarqoTestCase):
     """Test image reranking features. Note that this feature is available only for structured indexes as
     the feature requires searchable attributes."""
+    index_models = ["open_clip/ViT-B-32/openai", "google/owlvit-base-patch32"]
 
     @classmethod
     def setUpClass(cls) -> None:
@@ -1,4 +1,3 @@
-import uuid
 import pytest
 from marqo.errors import MarqoWebError
 
@@ -6,32 +5,20 @@ from tests.marqo_test import MarqoTestCase
 
 @pytest.mark.fixed
 class TestModlCacheManagement(MarqoTestCase):
-
-    @classmethod
-    def setUpClass(cls) -> None:
-        super().setUpClass()
-
-        cls.structured_index_name = "structured_" + str(uuid.uuid4()).replace('-', '')
-        cls.unstructured_index_name = "unstructured_" + str(uuid.uuid4()).replace('-', '')
-
-        cls.create_indexes([
-            {
-                "indexName": cls.structured_index_name,
-                "type": "structured",
-                "model": "sentence-transformers/all-MiniLM-L6-v2",
-                "allFields": [
-                    {"name": "title", "type": "text"},
-                ],
-                "tensorFields": ["title"]
-            },
-            {
-                "indexName": cls.unstructured_index_name,
-                "model": "sentence-transformers/all-MiniLM-L6-v2",
-                "type": "unstructured",
-            }
-        ])
-
-        cls.indexes_to_delete = [cls.structured_index_name, cls.unstructured_index_name]
+    pooled_indexes = {
+        "structured_index_name": {
+            "type": "structured",
+            "model": "sentence-transformers/all-MiniLM-L6-v2",
+            "allFields": [
+                {"name": "title", "type": "text"},
+            ],
+            "tensorFields": ["title"]
+        },
+        "unstructured_index_name": {
+            "model": "sentence-transformers/all-MiniLM-L6-v2",
+            "type": "unstructured",
+        }
+    }
 
     @pytest.mark.cpu_only_test
     def test_get_cuda_info_error(self) -> None:
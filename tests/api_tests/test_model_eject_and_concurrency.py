@@ -13,36 +13,37 @@ from tests.marqo_test import MarqoTestCase
 @pytest.mark.cuda_test
 class TestModelEject(MarqoTestCase):
     '''Although the test is running in cpu, we restrict it to cuda environments due to its intensive usage of memory.'''
+    index_model_object = {
+        "test_0": 'open_clip/ViT-B-32/laion400m_e31',
+        "test_1": 'open_clip/ViT-B-32/laion400m_e32',
+        "test_2": 'open_clip/convnext_base_w/laion2b_s13b_b82k',
+        "test_3": 'open_clip/ViT-B-16-plus-240/laion400m_e32',
+        "test_4": 'open_clip/RN50x4/openai',
+        "test_5": 'open_clip/RN101-quickgelu/yfcc15m',
+        "test_6": 'open_clip/ViT-B-32/laion2b_e16',
+        "test_7": 'open_clip/ViT-B-32-quickgelu/laion400m_e31',
+        "test_8": 'open_clip/ViT-B-16-plus-240/laion400m_e31',
+        "test_9": 'open_clip/ViT-L-14/laion2b_s32b_b82k',
+        "test_10": "hf/all-MiniLM-L6-v1",
+        "test_11": "hf/all-MiniLM-L6-v2",
+        "test_12": 'open_clip/ViT-B-16/laion400m_e32',
+        "test_13": "hf/all_datasets_v3_MiniLM-L12",
+        "test_14": 'open_clip/ViT-B-32/laion2b_e16',
+        "test_15": 'open_clip/RN101/yfcc15m',
+        "test_16": 'open_clip/convnext_base/laion400m_s13b_b51k',
+        "test_17": 'open_clip/convnext_base_w/laion2b_s13b_b82k',
+        "test_18": 'open_clip/ViT-B-32/laion2b_s34b_b79k',
+        "test_19": 'open_clip/ViT-B-16-plus-240/laion400m_e31',
+        "test_20": 'open_clip/ViT-L-14/laion400m_e31',
+        "test_21": 'open_clip/ViT-L-14/laion2b_s32b_b82k',
+        "test_22": 'open_clip/ViT-B-16/laion400m_e32',
+    }
+    index_models = list(dict.fromkeys(index_model_object.values()))
 
     @classmethod
     def setUpClass(cls) -> None:
         super().setUpClass()
         cls.device = "cpu"
-        cls.index_model_object = {
-            "test_0": 'open_clip/ViT-B-32/laion400m_e31',
-            "test_1": 'open_clip/ViT-B-32/laion400m_e32',
-            "test_2": 'open_clip/convnext_base_w/laion2b_s13b_b82k',
-            "test_3": 'open_clip/ViT-B-16-plus-240/laion400m_e32',
-            "test_4": 'open_clip/RN50x4/openai',
-            "test_5": 'open_clip/RN101-quickgelu/yfcc15m',
-            "test_6": 'open_clip/ViT-B-32/laion2b_e16',
-            "test_7": 'open_clip/ViT-B-32-quickgelu/laion400m_e31',
-            "test_8": 'open_clip/ViT-B-16-plus-240/laion400m_e31',
-            "test_9": 'open_clip/ViT-L-14/laion2b_s32b_b82k',
-            "test_10": "hf/all-MiniLM-L6-v1",
-            "test_11": "hf/all-MiniLM-L6-v2",
-            "test_12": 'open_clip/ViT-B-16/laion400m_e32',
-            "test_13": "hf/all_datasets_v3_MiniLM-L12",
-            "test_14": 'open_clip/ViT-B-32/laion2b_e16',
-            "test_15": 'open_clip/RN101/yfcc15m',
-            "test_16": 'open_clip/convnext_base/laion400m_s13b_b51k',
-            "test_17": 'open_clip/convnext_base_w/laion2b_s13b_b82k',
-            "test_18": 'open_clip/ViT-B-32/laion2b_s34b_b79k',
-            "test_19": 'open_clip/ViT-B-16-plus-240/laion400m_e31',
-            "test_20": 'open_clip/ViT-L-14/laion400m_e31',
-            "test_21": 'open_clip/ViT-L-14/laion2b_s32b_b82k',
-            "test_22": 'open_clip/ViT-B-16/laion400m_e32',
-        }
 
         cls.create_indexes([
             {
@@ -82,6 +83,8 @@ class TestModelEject(MarqoTestCase):
 
 @pytest.mark.fixed
 class TestConcurrencyRequestsBlock(MarqoTestCase):
+    index_models = ["open_clip/ViT-B-32/laion400m_e31"]
+
     @classmethod
     def setUpClass(cls) -> None:
         super().setUpClass()
@@ -9,6 +9,7 @@ from tests.marqo_test import MarqoTestCase
 
 @pytest.mark.fixed
 class TestScoreModifierSearch(MarqoTestCase):
+    index_models = ["open_clip/ViT-B-32/laion400m_e31"]
 
     @classmethod
     def setUpClass(cls) -> None:
@@ -12,6 +12,7 @@ class TestSentenceChunking(MarqoTestCase):
     Assumptions:
         - Local OpenSearch (not S2Search)
     """
+    index_models = ["hf/e5-base-v2"]
 
     @classmethod
     def setUpClass(cls) -> None:
@@ -19,6 +19,8 @@ from marqo.errors import MarqoWebError
 class TestSpecialCharacterInValue(MarqoTestCase):
     """We test whether these special characters can be included in the
     value of a document for indexing and filtering"""
+    index_models = ["hf/e5-base-v2"]
+
     supported_special_str_sequences = {
         '/', '*', '^', '\\', '!', '[', '||', '?',
         '&&', '"', ']', '-', '{', '~', '+', '}', ':', ')', '(', '.', '\n', '\t', '\r',
@@ -116,6 +118,8 @@ class TestSpecialCharacterInValue(MarqoTestCase):
 @pytest.mark.fixed
 class TestSpecialCharsFieldNamesUnstructured(MarqoTestCase):
     """This test class tests the supported and illegal field names for structured and unstructured indexes."""
+    index_models = ["hf/e5-base-v2"]
+
     supported_field_name = ['longdy3h0r', 'bkf3f1dvedkn', 'p7dqwtisyxpu', 'MyString', 'a', "id"]
 
     illegal_field_name = ['',  # empty string
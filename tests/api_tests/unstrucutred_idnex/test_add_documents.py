@@ -1,5 +1,4 @@
 import copy
-import uuid
 from unittest import mock
 
 import pytest
@@ -11,37 +10,24 @@ from tests.marqo_test import MarqoTestCase
 
 @pytest.mark.fixed
 class TestUnstructuredAddDocuments(MarqoTestCase):
-    
+    pooled_indexes = {
+        "text_index_name": {
+            "type": "unstructured",
+            "model": "sentence-transformers/all-MiniLM-L6-v2",
+        },
+        "image_index_name": {
+            "type": "unstructured",
+            "model": "open_clip/ViT-B-32/openai",
+            "treatUrlsAndPointersAsImages": True,
+        }
+    }
+
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
 
         cls.client = Client(**cls.client_settings)
 
-        cls.text_index_name = "api_test_unstructured_index" + str(uuid.uuid4()).replace('-', '')
-        cls.image_index_name = "api_test_unstructured_image_index" + str(uuid.uuid4()).replace('-', '')
-
-        cls.create_indexes([
-            {
-                "indexName": cls.text_index_name,
-                "type": "unstructured",
-                "model": "sentence-transformers/all-MiniLM-L6-v2",
-            },
-            {
-                "indexName": cls.image_index_name,
-                "type": "unstructured",
-                "model": "open_clip/ViT-B-32/openai",
-                "treatUrlsAndPointersAsImages": True,
-            }
-            ])
-        
-        cls.indexes_to_delete = [cls.text_index_name, cls.image_index_name]
-        
-        
-    def tearDown(self):
-        if self.indexes_to_delete:
-            self.clear_indexes(self.indexes_to_delete)
-
     def test_add_documents_with_ids(self):
         d1 = {
             "doc_title": "Cool Document 1",
@@ -1,5 +1,3 @@
-import uuid
-
 import pytest
 from marqo.client import Client
 from marqo.errors import MarqoWebError
@@ -9,6 +7,17 @@ from tests.marqo_test import MarqoTestCase
 
 @pytest.mark.fixed
 class TestUnstructuredGetStats(MarqoTestCase):
+    pooled_indexes = {
+        "text_index_name": {
+            "type": "unstructured",
+            "model": "sentence-transformers/all-MiniLM-L6-v2",
+        },
+        "image_index_name": {
+            "type": "unstructured",
+            "model": "open_clip/ViT-B-32/openai",
+            "treatUrlsAndPointersAsImages": True,
+        }
+    }
 
     @classmethod
     def setUpClass(cls):
@@ -20,29 +29,6 @@ class TestUnstructuredGetStats(MarqoTestCase):
 
         cls.client = Client(**cls.client_settings)
 
-        cls.text_index_name = "api_test_unstructured_index" + str(uuid.uuid4()).replace('-', '')
-        cls.image_index_name = "api_test_unstructured_image_index" + str(uuid.uuid4()).replace('-', '')
-
-        cls.create_indexes([
-            {
-                "indexName": cls.text_index_name,
-                "type": "unstructured",
-                "model": "sentence-transformers/all-MiniLM-L6-v2",
-            },
-            {
-                "indexName": cls.image_index_name,
-                "type": "unstructured",
-                "model": "open_clip/ViT-B-32/openai",
-                "treatUrlsAndPointersAsImages": True,
-            }
-        ])
-
-        cls.indexes_to_delete = [cls.text_index_name, cls.image_index_name]
-
-    def tearDown(self):
-        if self.indexes_to_delete:
-            self.clear_indexes(self.indexes_to_delete)
-
     def test_get_status_response_format(self):
         res = self.client.index(self.text_index_name).get_stats()
         assert isinstance(res, dict)
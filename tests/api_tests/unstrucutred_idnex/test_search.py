@@ -1,5 +1,4 @@
 import copy
-import uuid
 from unittest import mock
 
 import marqo
@@ -14,6 +13,16 @@ from tests.marqo_test import MarqoTestCase
 
 @pytest.mark.fixed
 class TestUnstructuredSearch(MarqoTestCase):
+    pooled_indexes = {
+        "text_index_name": {
+            "type": "unstructured",
+            "model": "sentence-transformers/all-MiniLM-L6-v2",
+        },
+        "image_index_name": {
+            "type": "unstructured",
+            "model": "open_clip/ViT-B-32/openai"
+        }
+    }
 
     @classmethod
     def setUpClass(cls):
@@ -26,28 +35,6 @@ class TestUnstructuredSearch(MarqoTestCase):
 
         cls.client = Client(**cls.client_settings)
 
-        cls.text_index_name = "api_test_unstructured_index" + str(uuid.uuid4()).replace('-', '')
-        cls.image_index_name = "api_test_unstructured_image_index" + str(uuid.uuid4()).replace('-', '')
-
-        cls.create_indexes([
-            {
-                "indexName": cls.text_index_name,
-                "type": "unstructured",
-                "model": "sentence-transformers/all-MiniLM-L6-v2",
-            },
-            {
-                "indexName": cls.image_index_name,
-                "type": "unstructured",
-                "model": "open_clip/ViT-B-32/openai"
-            }
-        ])
-
-        cls.indexes_to_delete = [cls.text_index_name, cls.image_index_name]
-
-    def tearDown(self):
-        if self.indexes_to_delete:
-            self.clear_indexes(self.indexes_to_delete)
-            
     @staticmethod
     def strip_marqo_fields(doc, strip_id=True):
         """Strips Marqo fields from a returned doc to get the original doc"""
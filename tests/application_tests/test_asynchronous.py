@@ -1,18 +1,18 @@
-import random
 import sys
 import threading
 import time
 import uuid
 
 import pytest
-import requests
 
 from tests import marqo_test
+from tests.corpus_generator import CorpusGenerator
 
 sys.setswitchinterval(0.005)
 
 @pytest.mark.fixed
 class TestAsync (marqo_test.MarqoTestCase):
+    index_models = ["hf/e5-base-v2"]
 
     @classmethod
     def setUpClass(cls) -> None:
@@ -20,6 +20,8 @@ class TestAsync (marqo_test.MarqoTestCase):
         cls.standard_structured_index_name = "structured_standard" + str(uuid.uuid4()).replace('-', '')
         cls.standard_unstructured_index_name = "unstructured_standard" + str(uuid.uuid4()).replace('-', '')
 
+        cls.all_fields = [{"name": "text_field_1", "type": "text"},
+                          {"name": "text_field_2", "type": "text"}]
         cls.create_indexes([
             {
                 "indexName": cls.standard_unstructured_index_name,
@@ -28,8 +30,7 @@ class TestAsync (marqo_test.MarqoTestCase):
             {
                 "indexName": cls.standard_structured_index_name,
                 "type": "structured",
-                "allFields": [{"name": "text_field_1", "type": "text"},
-                              {"name": "text_field_2", "type": "text"}],
+                "allFields": cls.all_fields,
                 "tensorFields": ["text_field_1", "text_field_2"]
             }
         ])
@@ -40,10 +41,8 @@ class TestAsync (marqo_test.MarqoTestCase):
         for index_name in [self.standard_unstructured_index_name, self.standard_structured_index_name]:
             with self.subTest(f"test async for {index_name}"):
                 num_docs = 500
-
-                vocab_source = "https://www.mit.edu/~ecprice/wordlist.10000"
-
-                vocab = requests.get(vocab_source).text.splitlines()
+                corpus_generator = CorpusGenerator(self.all_fields, field_options={"text_field_1": {"words": 10},
+                                                                                   "text_field_2": {"words": 25}})
 
                 d1 = {
                     "text_field_1": "Just Your Average Doc",
@@ -56,9 +55,7 @@ class TestAsync (marqo_test.MarqoTestCase):
                 assert self.client.index(index_name).get_stats()['numberOfDocuments'] == 1
 
                 def significant_ingestion():
-                    docs = [{"text_field_1": " ".join(random.choices(population=vocab, k=10)),
-                                  "text_field_2": " ".join(random.choices(population=vocab, k=25)),
-                                  } for _ in range(num_docs)]
+                    docs = corpus_generator.generate(num_docs)
                     self.client.index(index_name).add_documents(documents=docs, client_batch_size=1,
                                                                 tensor_fields=tensor_fields)
 
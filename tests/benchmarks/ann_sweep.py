@@ -0,0 +1,245 @@
+"""Sweeps HNSW parameters and reports the recall, latency, ingest time and memory frontier.
+
+Index-time parameters (`m` and `efConstruction` in annParameters) need an index per combination, and query-time
+`ef_search` values are searched on each index. For every index the sweep records the ingest time and the memory
+Marqo and Vespa gained while ingesting, and for every ef_search value the recall@k (see recall.py) and the search
+latency. The configurations that no other configuration beats on every objective (the Pareto frontier) are marked
+in the table printed at the end:
+
+    python -m tests.benchmarks.ann_sweep --url http://localhost:8882 --corpus corpus.npy --queries queries.npy \\
+        --m 8,16,32 --ef-construction 128,512 --ef-search 10,40,160
+
+Without --corpus, a clustered dataset is generated (--generate VECTORS,QUERIES,DIMENSION). Marqo rejects an
+efConstruction above MARQO_EF_CONSTRUCTION_MAX_VALUE, so start it with a larger value to sweep past it; rejected
+configurations are reported with their error. Indexes are deleted after they are measured unless --keep-indexes is
+given, and with --reuse an existing index that already holds the whole corpus is searched without ingesting again.
+Reused indexes have no ingest time or memory, so they are compared with the others on recall and latency only.
+The cases are also written with reporting.write_results, so sweeps can be compared with result_store.
+"""
+import argparse
+import json
+import sys
+import tempfile
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from marqo import Client
+from marqo.errors import MarqoWebError
+
+from tests.benchmarks import reporting
+from tests.benchmarks.recall import (RecallEvaluator, custom_vector_index_settings, exact_top_k, generate_dataset,
+                                     load_vectors)
+from tests.resource_sampler import ResourceSampler
+
+# The objectives of the frontier, and whether higher ("max") or lower ("min") is better
+OBJECTIVES = {"recall": "max", "latency_p50_ms": "min", "latency_p99_ms": "min", "ingest_s": "min",
+              "memory_gb": "min"}
+MEMORY_METRICS = ("marqo_memory_gb", "vespa_container_memory_gb", "marqo_container_memory_gb")
+
+
+def pareto_frontier(points: Sequence[Dict], objectives: Optional[Dict[str, str]] = None) -> List[int]:
+    """The positions of the points that no other point dominates, i.e. is at least as good as on every objective
+    and better on one.
+
+    Two points are compared only on the objectives both have a value for. A point without a value for some
+    objective, e.g. the ingest time of a reused index, then leaves that objective in the comparisons of the others.
+    """
+    objectives = OBJECTIVES if objectives is None else objectives
+    if not points:
+        return []
+    # Negate the objectives to maximize, so that lower is better for all. Missing values are NaN.
+    values = np.array([[np.nan if point.get(name) is None else point[name] if direction == "min" else -point[name]
+                        for name, direction in objectives.items()] for point in points], dtype=np.float64)
+    present = ~np.isnan(values)
+    frontier = []
+    for i, value in enumerate(values):
+        shared = present & present[i]
+        at_least_as_good = np.all((values <= value) | ~shared, axis=1)
+        better = np.any((values < value) & shared, axis=1)
+        if not np.any(at_least_as_good & better):
+            frontier.append(i)
+    return frontier
+
+
+def _memory_gb(sample: Dict[str, Optional[float]]) -> Dict[str, float]:
+    return {metric: sample[metric] for metric in MEMORY_METRICS if sample.get(metric) is not None}
+
+
+class AnnSweep:
+    """Measures every combination of m, ef_construction and ef_search on a corpus of vectors.
+
+    Args:
+        url: the Marqo URL
+        corpus, queries: 2-d arrays of vectors, e.g. memory-mapped with load_vectors
+        m, ef_construction: the index-time HNSW parameters to sweep
+        ef_search: the query-time HNSW candidate list sizes to sweep on each index
+        k: the number of results, for recall@k
+        space_type: the index's annParameters spaceType
+        index_prefix: the indexes are named {index_prefix}_m{m}_efc{ef_construction}
+        reuse: search an existing index instead of recreating it, if it already holds len(corpus) documents
+        keep_indexes: do not delete the indexes after measuring them
+        use_docker: sample the memory of the marqo and vespa containers with `docker stats`. Defaults to whether
+            docker is available.
+    """
+
+    def __init__(self, url: str, corpus: np.ndarray, queries: np.ndarray, m: Sequence[int] = (16,),
+                 ef_construction: Sequence[int] = (128,), ef_search: Sequence[int] = (10, 40, 160), k: int = 10,
+                 space_type: str = "prenormalized-angular", index_prefix: str = "ann_sweep", reuse: bool = False,
+                 keep_indexes: bool = False, use_docker: Optional[bool] = None, **ingest_kwargs):
+        self.url = url.rstrip("/")
+        self.client = Client(url=self.url)
+        self.corpus = corpus
+        self.queries = queries
+        self.m = list(m)
+        self.ef_construction = list(ef_construction)
+        self.ef_search = list(ef_search)
+        self.k = k
+        self.space_type = space_type
+        self.index_prefix = index_prefix
+        self.reuse = reuse
+        self.keep_indexes = keep_indexes
+        self.sampler = ResourceSampler(self.url, use_docker=use_docker)
+        self.ingest_kwargs = {"progress_interval_s": 0, **ingest_kwargs}
+
+    def _sample_memory(self) -> Dict[str, float]:
+        memory = _memory_gb(self.sampler.sample_marqo())
+        if self.sampler.use_docker:
+            memory.update(_memory_gb(self.sampler.sample_docker()))
+        return memory
+
+    def _document_count(self, index_name: str) -> Optional[int]:
+        try:
+            return self.client.index(index_name).get_stats()["numberOfDocuments"]
+        except MarqoWebError:
+            return None
+
+    def _build(self, index_name: str, m: int, ef_construction: int, evaluator: RecallEvaluator) -> Dict:
+        """Creates and fills an index, and returns its ingest time and memory use, or the creation error."""
+        if self.reuse and self._document_count(index_name) == len(self.corpus):
+            return {"reused": True}
+        if self._document_count(index_name) is not None:
+            self.client.delete_index(index_name)
+        settings = custom_vector_index_settings(self.corpus.shape[1], self.space_type,
+                                                {"m": m, "efConstruction": ef_construction})
+        try:
+            self.client.create_index(index_name, settings_dict=settings)
+        except MarqoWebError as e:
+            # The client's error message is the response body
+            message = e.message.get("message", e.message) if isinstance(e.message, dict) else e.message
+            return {"error": str(message)}
+        before = self._sample_memory()
+        ingestion = evaluator.ingest(self.corpus, **self.ingest_kwargs)
+        after = self._sample_memory()
+        memory = {metric: round(after[metric] - before[metric], 3) for metric in after if metric in before}
+        return {
+            "reused": False,
+            "ingest_s": ingestion["elapsed_s"],
+            "docs_per_s": ingestion["docs_per_s"],
+            "memory": memory,
+            # Vespa holds the HNSW graph, so its container's memory is the best measure when it is available
+            "memory_gb": memory.get("vespa_container_memory_gb", memory.get("marqo_memory_gb")),
+        }
+
+    def run(self) -> List[Dict]:
+        """Measures every configuration and returns a case per (m, ef_construction, ef_search), with the frontier
+        cases marked `pareto: True`."""
+        ground_truth = exact_top_k(self.corpus, self.queries, self.k, self.space_type)
+        cases = []
+        for m in self.m:
+            for ef_construction in self.ef_construction:
+                index_name = f"{self.index_prefix}_m{m}_efc{ef_construction}"
+                evaluator = RecallEvaluator(self.client, self.url, index_name, k=self.k)
+                build = self._build(index_name, m, ef_construction, evaluator)
+                try:
+                    for ef_search in self.ef_search:
+                        params = {"m": m, "ef_construction": ef_construction, "ef_search": ef_search, "k": self.k,
+                                  "number_of_vectors": len(self.corpus), "space_type": self.space_type}
+                        name = f"m{m}_efc{ef_construction}_ef{ef_search}"
+                        if "error" in build:
+                            cases.append({"name": name, "params": params, "error": build["error"]})
+                            continue
+                        result = evaluator.evaluate(self.queries, ground_truth, ef_search=ef_search)
+                        cases.append({
+                            "name": name, "params": params, **result, **build,
+                            "recall": result["recall"]["mean"],
+                            "recall_stats": result["recall"],
+                            "latency_p50_ms": result["latency_ms"].get("p50"),
+                            "latency_p99_ms": result["latency_ms"].get("p99"),
+                        })
+                finally:
+                    if not self.keep_indexes and "error" not in build:
+                        self.client.delete_index(index_name)
+        measured = [case for case in cases if "error" not in case]
+        for position in pareto_frontier(measured):
+            measured[position]["pareto"] = True
+        for case in measured:
+            case.setdefault("pareto", False)
+        return cases
+
+
+def format_table(cases: Sequence[Dict]) -> str:
+    """A text table of the cases, frontier first and then by recall, with frontier cases marked with *."""
+    columns = ("m", "ef_construction", "ef_search", "recall", "latency_p50_ms", "latency_p99_ms", "ingest_s",
+               "memory_gb")
+    rows = []
+    for case in sorted(cases, key=lambda case: (not case.get("pareto"), -(case.get("recall") or 0))):
+        values = [case["params"][name] for name in columns[:3]] + [case.get(name) for name in columns[3:]]
+        row = ["*" if case.get("pareto") else ""] + ["-" if value is None else str(value) for value in values]
+        if "error" in case:
+            row[4:] = [f"error: {case['error']}"]
+        rows.append(row)
+    header = ["", *columns]
+    # The error of a rejected configuration spans the measured columns, so it does not widen them
+    widths = [max(len(row[i]) for row in [header] + rows if i < len(row) and not row[i].startswith("error: "))
+              for i in range(len(header))]
+    lines = ["  ".join(cell.ljust(widths[i]) for i, cell in enumerate(header)).rstrip()]
+    for row in rows:
+        lines.append("  ".join(cell.ljust(widths[i]) for i, cell in enumerate(row)).rstrip())
+    return "\n".join(lines)
+
+
+def _ints(value: str) -> List[int]:
+    return [int(part) for part in value.split(",")]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Sweep HNSW parameters and print the recall/latency/memory "
+                                                 "frontier.")
+    parser.add_argument("--url", default="http://localhost:8882")
+    parser.add_argument("--corpus", help="A .npy file of corpus vectors")
+    parser.add_argument("--queries", help="A .npy file of query vectors")
+    parser.add_argument("--generate", default="100000,1000,128",
+                        help="VECTORS,QUERIES,DIMENSION of the dataset generated without --corpus")
+    parser.add_argument("--m", type=_ints, default=[8, 16, 32])
+    parser.add_argument("--ef-construction", type=_ints, default=[128, 512])
+    parser.add_argument("--ef-search", type=_ints, default=[10, 20, 40, 80, 160, 320])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--space-type", default="prenormalized-angular")
+    parser.add_argument("--reuse", action="store_true", help="Search existing indexes that hold the whole corpus")
+    parser.add_argument("--keep-indexes", action="store_true", help="Do not delete the indexes after the sweep")
+    parser.add_argument("--output", help="Write the cases to this JSON file")
+    args = parser.parse_args(argv)
+    if bool(args.corpus) != bool(args.queries):
+        parser.error("--corpus and --queries must be given together")
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.corpus:
+            corpus, queries = load_vectors(args.corpus), load_vectors(args.queries)
+        else:
+            vectors, number_of_queries, dimension = _ints(args.generate)
+            corpus, queries = generate_dataset(directory, vectors, number_of_queries, dimension)
+        cases = AnnSweep(args.url, corpus, queries, m=args.m, ef_construction=args.ef_construction,
+                         ef_search=args.ef_search, k=args.k, space_type=args.space_type, reuse=args.reuse,
+                         keep_indexes=args.keep_indexes).run()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(cases, f, indent=2)
+    path = reporting.write_results("ann_sweep", cases)
+    print(format_table(cases))
+    print(f"Results written to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""A base class for benchmarks that run against a live Marqo instance.
+
+Benchmarks are collected like the other tests but are skipped unless pytest is run with --run-benchmarks.
+A benchmark class loads its indexes once in setUpClass, measures cases with `measure` or `record`, and
+writes all measured cases to one JSON file in tearDownClass (see reporting.py).
+"""
+import contextlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+from unittest import mock
+
+from marqo._httprequests import HttpRequests
+
+from tests.benchmarks import reporting
+from tests.benchmarks.load_generator import OpenLoopLoadGenerator
+from tests.marqo_test import MarqoTestCase
+
+# A small vocabulary for generated benchmark documents
+WORDS = ("marqo vector search tensor lexical index document field filter score hybrid model image text "
+         "moon space suit travel guardian newspaper editor captain leadership example ocean mountain forest "
+         "river city engine rocket planet satellite orbit launch crew mission signal").split()
+
+
+@contextlib.contextmanager
+def timed_requests(path_contains: str = "") -> Iterator[List[float]]:
+    """Records the latency (in seconds) of every client request whose path contains path_contains.
+
+    This times the individual batches of a client-batched call such as
+    `add_documents(..., client_batch_size=N)`, which sends its batches one after another.
+    """
+    latencies: List[float] = []
+    send_request = HttpRequests.send_request
+
+    def timed_send_request(http_requests, http_operation, path, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return send_request(http_requests, http_operation, path, *args, **kwargs)
+        finally:
+            if path_contains in path:
+                latencies.append(time.perf_counter() - start)
+
+    with mock.patch.object(HttpRequests, "send_request", timed_send_request):
+        yield latencies
+
+
+class MarqoBenchmarkCase(MarqoTestCase):
+    # The name of the result file. Defaults to the class name.
+    benchmark_name: Optional[str] = None
+    ITERATIONS = int(os.environ.get("MARQO_API_TESTS_BENCHMARK_ITERATIONS", 100))
+    WARMUP_ITERATIONS = int(os.environ.get("MARQO_API_TESTS_BENCHMARK_WARMUP", 10))
+    # How long each open-loop case sends requests for, in seconds
+    LOAD_DURATION_S = float(os.environ.get("MARQO_API_TESTS_BENCHMARK_DURATION", 30))
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.benchmark_results: List[Dict] = []
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        if cls.benchmark_results:
+            path = reporting.write_results(cls.benchmark_name or cls.__name__, cls.benchmark_results)
+            print(f"Benchmark results written to {path}")
+        super().tearDownClass()
+
+    def setUp(self) -> None:
+        # Benchmarks load their indexes once in setUpClass, so the indexes are not cleared between tests
+        pass
+
+    def record(self, name: str, params: Dict, latencies_s: Sequence[float], duration_s: float,
+               items_per_operation: Optional[Sequence[int]] = None, **extra) -> Dict:
+        """Adds a measured case, which ended just now, to the results of this run and returns it."""
+        result = {
+            "name": name,
+            "params": params,
+            **reporting.summarize_latencies(latencies_s, duration_s, items_per_operation),
+            **extra
+        }
+        return self._add_result(result, duration_s)
+
+    def record_result(self, result: Dict, duration_s: float, ended_s_ago: float = 0.0) -> Dict:
+        """Adds a case measured elsewhere (e.g. by an evaluator), which ended ended_s_ago seconds ago after
+        duration_s seconds, to the results of this run and returns it. The result needs at least a name and params."""
+        return self._add_result(result, duration_s, ended_s_ago)
+
+    def _add_result(self, result: Dict, duration_s: float, ended_s_ago: float = 0.0) -> Dict:
+        if self._resource_sampler is not None:
+            # The resources sampled while the case ran, with --sample-resources
+            end = self._resource_sampler.now() - ended_s_ago
+            result["resources"] = self._resource_sampler.summarize(end - duration_s, end)
+        self.benchmark_results.append(result)
+        return result
+
+    def measure(self, name: str, params: Dict, operation: Callable[[], object],
+                iterations: Optional[int] = None, warmup_iterations: Optional[int] = None) -> Dict:
+        """Calls operation sequentially, after a warm-up, and records the latency of each call."""
+        iterations = self.ITERATIONS if iterations is None else iterations
+        warmup_iterations = self.WARMUP_ITERATIONS if warmup_iterations is None else warmup_iterations
+        for _ in range(warmup_iterations):
+            operation()
+
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(iterations):
+            operation_start = time.perf_counter()
+            operation()
+            latencies.append(time.perf_counter() - operation_start)
+        return self.record(name, params, latencies, time.perf_counter() - start)
+
+    def measure_concurrent(self, name: str, params: Dict, operation: Callable[[int], object], threads: int,
+                           iterations_per_thread: Optional[int] = None,
+                           warmup_iterations: Optional[int] = None,
+                           items_per_operation: int = 1, **extra) -> Dict:
+        """Calls operation from `threads` threads at once and records the latency of each call.
+
+        operation is called with the index of the calling thread. The warm-up calls run sequentially before
+        the threads start, and the throughput is measured over the wall-clock time of all threads.
+        """
+        iterations_per_thread = self.ITERATIONS if iterations_per_thread is None else iterations_per_thread
+        warmup_iterations = self.WARMUP_ITERATIONS if warmup_iterations is None else warmup_iterations
+        for _ in range(warmup_iterations):
+            operation(0)
+
+        def run_thread(thread_index: int) -> List[float]:
+            thread_latencies = []
+            for _ in range(iterations_per_thread):
+                operation_start = time.perf_counter()
+                operation(thread_index)
+                thread_latencies.append(time.perf_counter() - operation_start)
+            return thread_latencies
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            latencies = [latency for thread_latencies in executor.map(run_thread, range(threads))
+                         for latency in thread_latencies]
+        duration = time.perf_counter() - start
+        return self.record(name, {"threads": threads, **params}, latencies, duration,
+                           items_per_operation=[items_per_operation] * len(latencies), **extra)
+
+    def measure_open_loop(self, name: str, params: Dict, operation: Callable[[int], object], rate_per_s: float,
+                          duration_s: Optional[float] = None, workers: Optional[int] = None) -> Dict:
+        """Calls operation at a constant arrival rate (see load_generator.py) and records the latency
+        histogram, measured from the scheduled send times."""
+        generator = OpenLoopLoadGenerator(operation, rate_per_s, self.LOAD_DURATION_S if duration_s is None
+                                          else duration_s, workers=workers)
+        result = {"name": name, "params": {"rate_per_s": rate_per_s, **params}, **generator.run()}
+        return self._add_result(result, result["duration_s"])
@@ -0,0 +1,156 @@
+"""Random access to large JSONL files (request traces, corpora) without loading them into memory.
+
+JsonlFile memory-maps the file and keeps the byte offset of every line in an `array` of 8-byte integers. The
+offsets are saved beside the file (`<file>.idx`) with the size and modification time of the file they were built
+from, so opening the same file again, e.g. in every worker process of a replay, reads the index instead of scanning
+the file. Line i is then parsed only when it is accessed:
+
+    with JsonlFile("trace.jsonl") as trace:
+        record = trace[1000000]
+        for start, stop in trace.shards(4):
+            ...  # give each worker process the path and one (start, stop) range of lines
+
+Blank lines are skipped, as json.loads would fail on them.
+"""
+import json
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
+from typing import Dict, Iterator, List, Optional, Tuple
+
+_MAGIC = b"JSONLIDX"
+# Magic, version, size and mtime_ns of the indexed file
+_HEADER = struct.Struct("<8sIQQ")
+_VERSION = 1
+
+
+class JsonlFile:
+    """A read-only, indexed view of a JSONL file. len() is the number of (non-blank) lines.
+
+    Args:
+        path: the JSONL file
+        index_path: where to keep the line offsets. Defaults to `<path>.idx`. If the index cannot be written
+            there, it is kept in memory only.
+    """
+
+    def __init__(self, path: str, index_path: Optional[str] = None):
+        self.path = path
+        self.index_path = index_path or f"{path}.idx"
+        self._file = open(path, "rb")
+        stat = os.fstat(self._file.fileno())
+        self._size, self._mtime_ns = stat.st_size, stat.st_mtime_ns
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self._size else None
+        # Line i is in bytes offsets[i]:offsets[i + 1], followed by its line break and any blank lines
+        self._offsets = self._load_index()
+        if self._offsets is None:
+            self._offsets = self._build_index()
+            self._save_index()
+
+    def _load_index(self) -> Optional[array]:
+        try:
+            with open(self.index_path, "rb") as f:
+                header = f.read(_HEADER.size)
+                if len(header) != _HEADER.size:
+                    return None
+                magic, version, size, mtime_ns = _HEADER.unpack(header)
+                if (magic, version, size, mtime_ns) != (_MAGIC, _VERSION, self._size, self._mtime_ns):
+                    return None
+                offsets = array("Q")
+                offsets.frombytes(f.read())
+                return offsets if len(offsets) >= 1 and offsets[-1] == self._size else None
+        except (OSError, ValueError):
+            return None
+
+    def _build_index(self) -> array:
+        offsets = array("Q")
+        position = 0
+        while position < self._size:
+            end = self._map.find(b"\n", position)
+            end = self._size if end == -1 else end + 1
+            if self._map[position:end].strip():
+                offsets.append(position)
+            position = end
+        offsets.append(self._size)
+        return offsets
+
+    def _save_index(self) -> None:
+        temporary_path = f"{self.index_path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary_path, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, _VERSION, self._size, self._mtime_ns))
+                self._offsets.tofile(f)
+            # Atomic, so that workers opening the file at the same time never read a partial index
+            os.replace(temporary_path, self.index_path)
+        except OSError:
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def raw(self, i: int) -> bytes:
+        """The bytes of line i, without the line break."""
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"line {i} out of range for {len(self)} lines")
+        return self._map[self._offsets[i]:self._offsets[i + 1]].rstrip(b"\r\n")
+
+    def __getitem__(self, i: int) -> Dict:
+        return json.loads(self.raw(i))
+
+    def __iter__(self) -> Iterator[Dict]:
+        return self.iter_range(0, len(self))
+
+    def iter_range(self, start: int, stop: int) -> Iterator[Dict]:
+        for i in range(start, min(stop, len(self))):
+            yield self[i]
+
+    def lines(self, start: int, stop: int) -> "JsonlRange":
+        """A lazy sequence of the lines start to stop, e.g. one of the ranges returned by shards()."""
+        return JsonlRange(self, start, stop)
+
+    def shards(self, count: int) -> List[Tuple[int, int]]:
+        """Splits the lines into `count` contiguous (start, stop) ranges of about the same number of bytes."""
+        if count < 1:
+            raise ValueError(f"count must be at least 1, got {count}")
+        start_offset, size = self._offsets[0], self._offsets[-1] - self._offsets[0]
+        bounds = [0] + [bisect_left(self._offsets, start_offset + size * k // count, 0, len(self))
+                        for k in range(1, count)] + [len(self)]
+        return [(bounds[k], bounds[k + 1]) for k in range(count)]
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self) -> "JsonlFile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class JsonlRange(Sequence):
+    """The lines start to stop of a JsonlFile, parsed when accessed."""
+
+    def __init__(self, jsonl_file: JsonlFile, start: int, stop: int):
+        self.file = jsonl_file
+        self.start = max(0, start)
+        self.stop = min(stop, len(jsonl_file))
+
+    def __len__(self) -> int:
+        return max(0, self.stop - self.start)
+
+    def __getitem__(self, i: int) -> Dict:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"line {i} out of range for {len(self)} lines")
+        return self.file[self.start + i]
@@ -0,0 +1,210 @@
+"""An open-loop load generator that sends requests at a constant arrival rate.
+
+The concurrency tests in this suite are closed-loop: each thread sends its next request when the previous one
+returns, so when Marqo slows down the load drops with it and the time requests would have spent queueing is never
+measured (coordinated omission). OpenLoopLoadGenerator instead schedules request i at `start + i / rate_per_s`,
+whatever happened to the previous requests, and measures each latency from the scheduled send time. A request that
+waits for a free worker therefore counts its waiting time, as it would for a real client.
+
+Latencies are recorded in a LatencyHistogram, an HDR-style histogram with a bounded relative error, so long runs
+at high rates do not keep every sample.
+"""
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
+
+
+class LatencyHistogram:
+    """A log-linear histogram of latencies, in the style of HdrHistogram.
+
+    Values are recorded in microseconds. Every power-of-two range is split into linear sub-buckets, so that any
+    recorded value is reported with a relative error below 10 ** -significant_digits.
+    """
+    PERCENTILES = (50, 90, 99, 99.9, 99.99)
+
+    def __init__(self, significant_digits: int = 2):
+        if not 1 <= significant_digits <= 5:
+            raise ValueError(f"significant_digits must be between 1 and 5, got {significant_digits}")
+        self.significant_digits = significant_digits
+        self._sub_bucket_bits = math.ceil(math.log2(2 * 10 ** significant_digits))
+        self._counts: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.count = 0
+        self.min_us: Optional[int] = None
+        self.max_us: Optional[int] = None
+        self._total_us = 0
+
+    def __getstate__(self) -> Dict:
+        # Histograms are sent between processes by the scenario runner; the lock is not picklable
+        state = dict(self.__dict__)
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _bucket(self, value_us: int) -> int:
+        shift = max(0, value_us.bit_length() - self._sub_bucket_bits)
+        # Keep the shift in the key so that keys sort in value order
+        return (shift << self._sub_bucket_bits) | (value_us >> shift)
+
+    def _highest_equivalent_value(self, bucket: int) -> int:
+        shift = bucket >> self._sub_bucket_bits
+        sub_bucket = bucket & ((1 << self._sub_bucket_bits) - 1)
+        return ((sub_bucket + 1) << shift) - 1
+
+    def record(self, latency_s: float) -> None:
+        value_us = max(0, int(round(latency_s * 1_000_000)))
+        bucket = self._bucket(value_us)
+        with self._lock:
+            self._counts[bucket] = self._counts.get(bucket, 0) + 1
+            self.count += 1
+            self._total_us += value_us
+            self.min_us = value_us if self.min_us is None else min(self.min_us, value_us)
+            self.max_us = value_us if self.max_us is None else max(self.max_us, value_us)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        if other.significant_digits != self.significant_digits:
+            raise ValueError("Cannot merge histograms with different significant_digits")
+        with self._lock:
+            for bucket, count in other._counts.items():
+                self._counts[bucket] = self._counts.get(bucket, 0) + count
+            self.count += other.count
+            self._total_us += other._total_us
+            for value in (other.min_us, other.max_us):
+                if value is not None:
+                    self.min_us = value if self.min_us is None else min(self.min_us, value)
+                    self.max_us = value if self.max_us is None else max(self.max_us, value)
+
+    def value_at_percentile(self, percentile: float) -> Optional[float]:
+        """Returns the latency, in milliseconds, at or below which `percentile` percent of the values fall."""
+        with self._lock:
+            if not self.count:
+                return None
+            target = max(1, math.ceil(percentile / 100 * self.count))
+            seen = 0
+            for bucket in sorted(self._counts):
+                seen += self._counts[bucket]
+                if seen >= target:
+                    return min(self._highest_equivalent_value(bucket), self.max_us) / 1000
+            return self.max_us / 1000
+
+    def summary(self) -> Dict:
+        """Returns the count and the latency percentiles, in milliseconds."""
+        if not self.count:
+            return {"count": 0, "latency_ms": {}}
+        latency_ms = {f"p{percentile:g}": round(self.value_at_percentile(percentile), 3)
+                      for percentile in self.PERCENTILES}
+        latency_ms["min"] = round(self.min_us / 1000, 3)
+        latency_ms["max"] = round(self.max_us / 1000, 3)
+        latency_ms["mean"] = round(self._total_us / self.count / 1000, 3)
+        return {"count": self.count, "latency_ms": latency_ms}
+
+
+def workers_for_rate(rate_per_s: float, expected_latency_s: float, max_workers: int = 256) -> int:
+    """The number of workers needed to hold rate_per_s when requests take up to expected_latency_s (Little's law),
+    with 50% headroom."""
+    return max(1, min(max_workers, math.ceil(rate_per_s * expected_latency_s * 1.5)))
+
+
+class OpenLoopLoadGenerator:
+    """Calls an operation at a constant arrival rate from a pool of worker threads.
+
+    Args:
+        operation: called with the index of the request. An exception counts as an error.
+        rate_per_s: the target number of requests per second
+        duration_s: how long to send requests for. rate_per_s * duration_s requests are sent.
+        workers: the size of the worker pool. Defaults to enough workers to hold the rate when requests take
+            up to expected_latency_s.
+        expected_latency_s: the latency used to size the default worker pool
+        label_for: returns the label (e.g. the operation type) of a request index. If given, latencies are also
+            recorded per label, in `latency_by_label`.
+    """
+
+    def __init__(self, operation: Callable[[int], object], rate_per_s: float, duration_s: float,
+                 workers: Optional[int] = None, expected_latency_s: float = 1.0,
+                 label_for: Optional[Callable[[int], str]] = None):
+        if rate_per_s <= 0:
+            raise ValueError(f"rate_per_s must be positive, got {rate_per_s}")
+        self.operation = operation
+        self.rate_per_s = rate_per_s
+        self.duration_s = duration_s
+        self.workers = workers or workers_for_rate(rate_per_s, expected_latency_s)
+        self.label_for = label_for
+        # Filled in by run()
+        self.latency = LatencyHistogram()
+        self.latency_by_label: Dict[str, LatencyHistogram] = {}
+        self.errors_by_label: Dict[str, int] = {}
+
+    def schedule(self) -> Iterable[float]:
+        """The send times of the requests, in seconds from the start of the run."""
+        return (i / self.rate_per_s for i in range(int(self.rate_per_s * self.duration_s)))
+
+    def run(self) -> Dict:
+        """Sends all requests and returns the latency summaries.
+
+        `latency_ms` is measured from the scheduled send time and includes the time a request waited for a
+        worker. `service_time_ms` is measured from the time a worker started the request.
+        """
+        latency = self.latency = LatencyHistogram()
+        service_time = LatencyHistogram()
+        self.latency_by_label = {}
+        self.errors_by_label = {}
+        errors = []
+        errors_lock = threading.Lock()
+        max_dispatch_lag_s = 0.0
+
+        def send(request_index: int, scheduled_time: float, label: Optional[str]) -> None:
+            start = time.perf_counter()
+            try:
+                self.operation(request_index)
+            except Exception as e:
+                with errors_lock:
+                    errors.append(repr(e))
+                    if label is not None:
+                        self.errors_by_label[label] = self.errors_by_label.get(label, 0) + 1
+            finally:
+                end = time.perf_counter()
+                latency.record(end - scheduled_time)
+                service_time.record(end - start)
+                if label is not None:
+                    self.latency_by_label[label].record(end - scheduled_time)
+
+        sent = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            run_start = time.perf_counter()
+            for request_index, offset in enumerate(self.schedule()):
+                scheduled_time = run_start + offset
+                delay = scheduled_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    max_dispatch_lag_s = max(max_dispatch_lag_s, -delay)
+                label = None
+                if self.label_for is not None:
+                    label = self.label_for(request_index)
+                    self.latency_by_label.setdefault(label, LatencyHistogram())
+                executor.submit(send, request_index, scheduled_time, label)
+                sent += 1
+            dispatch_end = time.perf_counter()
+        duration = time.perf_counter() - run_start
+
+        return {
+            "target_rate_per_s": self.rate_per_s,
+            "workers": self.workers,
+            "sent": sent,
+            "errors": len(errors),
+            "error_samples": errors[:5],
+            "duration_s": round(duration, 4),
+            "send_rate_per_s": round(sent / (dispatch_end - run_start), 3) if dispatch_end > run_start else None,
+            "throughput_per_s": round(latency.count / duration, 3) if duration > 0 else None,
+            "max_dispatch_lag_ms": round(max_dispatch_lag_s * 1000, 3),
+            "latency_ms": latency.summary()["latency_ms"],
+            "service_time_ms": service_time.summary()["latency_ms"],
+            **({"labels": {label: {**histogram.summary(), "errors": self.errors_by_label.get(label, 0)}
+                           for label, histogram in self.latency_by_label.items()}}
+               if self.label_for is not None else {}),
+        }
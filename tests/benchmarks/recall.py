@@ -0,0 +1,215 @@
+"""Measures the recall of Marqo's approximate (HNSW) tensor search against exact numpy ground truth.
+
+A dataset is a corpus and a set of queries, each a 2-d float .npy file that is memory-mapped rather than loaded.
+The corpus is added to an index as custom vectors, and each query vector is searched with
+`context={"tensor": [{"vector": ..., "weight": 1}]}`, so no model is involved. The exact top k of every query is
+computed with blocked matrix multiplies over the corpus, so the ground truth of a corpus larger than memory takes
+one pass over the file:
+
+    corpus, queries = load_vectors("corpus.npy"), load_vectors("queries.npy")
+    truth = exact_top_k(corpus, queries, k=10)
+    evaluator = RecallEvaluator(client, url, index_name, k=10)
+    evaluator.ingest(corpus)
+    result = evaluator.evaluate(queries, truth, ef_search=64)  # recall@10 and search latency
+
+Documents are given the corpus row number as their _id, which is how search results are matched with the ground
+truth.
+"""
+import os
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from marqo import Client
+
+from tests.benchmarks import reporting
+from tests.dirty_tracking import DirtyIndexTracker
+from tests.ingestion_pipeline import IngestionPipeline
+
+# The name of the custom vector field in custom_vector_index_settings
+VECTOR_FIELD = "vector"
+SPACE_TYPES = ("angular", "prenormalized-angular", "dotproduct", "euclidean")
+# Vectors are normalized (normalizeEmbeddings) for these space types only, so the others compare raw vectors
+NORMALIZED_SPACE_TYPES = ("angular", "prenormalized-angular")
+
+
+def load_vectors(path: str) -> np.ndarray:
+    """Memory-maps a 2-d .npy file of vectors, one per row."""
+    vectors = np.load(path, mmap_mode="r")
+    if vectors.ndim != 2 or not np.issubdtype(vectors.dtype, np.floating):
+        raise ValueError(f"{path} must hold a 2-d array of floats, got a {vectors.ndim}-d array of {vectors.dtype}")
+    return vectors
+
+
+def generate_dataset(directory: str, number_of_vectors: int, number_of_queries: int, dimension: int,
+                     clusters: int = 100, seed: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """Writes corpus.npy and queries.npy of clustered random vectors, which are harder for HNSW than uniform
+    ones, and returns them memory-mapped."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    paths = []
+    for name, count in (("corpus", number_of_vectors), ("queries", number_of_queries)):
+        vectors = centers[rng.integers(0, clusters, count)] + 0.5 * rng.standard_normal((count, dimension),
+                                                                                          dtype=np.float32)
+        paths.append(os.path.join(directory, f"{name}.npy"))
+        np.save(paths[-1], vectors)
+    return load_vectors(paths[0]), load_vectors(paths[1])
+
+
+def custom_vector_index_settings(dimension: int, space_type: str = "prenormalized-angular",
+                                 ann_parameters: Optional[Dict] = None) -> Dict:
+    """The settings of a structured index with a single custom vector field, VECTOR_FIELD, of the given dimension.
+
+    ann_parameters are the HNSW parameters, e.g. {"m": 16, "efConstruction": 128}.
+    """
+    return {
+        "type": "structured",
+        "model": "no_model",
+        "modelProperties": {"type": "no_model", "dimensions": dimension},
+        "normalizeEmbeddings": space_type in NORMALIZED_SPACE_TYPES,
+        "allFields": [{"name": VECTOR_FIELD, "type": "custom_vector"}],
+        "tensorFields": [VECTOR_FIELD],
+        "annParameters": {"spaceType": space_type, "parameters": ann_parameters or {"m": 16, "efConstruction": 512}},
+    }
+
+
+def _scores(queries: np.ndarray, block: np.ndarray, space_type: str) -> np.ndarray:
+    """The similarity of each query to each corpus vector of a block. Higher is more similar."""
+    if space_type == "euclidean":
+        # -|q - c|^2 without the |q|^2 term, which is the same for every candidate of a query
+        return 2 * queries @ block.T - np.einsum("ij,ij->i", block, block)[None, :]
+    if space_type in NORMALIZED_SPACE_TYPES:
+        block = block / np.maximum(np.linalg.norm(block, axis=1, keepdims=True), 1e-12)
+    return queries @ block.T
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int = 10, space_type: str = "prenormalized-angular",
+                block_size: int = 65_536, query_block_size: int = 1024) -> np.ndarray:
+    """The row numbers of the exact k nearest corpus vectors of each query, from the nearest.
+
+    The corpus is read block_size rows at a time, so a memory-mapped corpus is never loaded whole. For each block
+    of query_block_size queries, the scores against a corpus block are merged with the running top k using
+    argpartition, so memory stays at query_block_size * (block_size + k) scores.
+    """
+    if space_type not in SPACE_TYPES:
+        raise ValueError(f"Unknown space type `{space_type}`, expected one of {SPACE_TYPES}")
+    if corpus.shape[1] != queries.shape[1]:
+        raise ValueError(f"The corpus has {corpus.shape[1]} dimensions but the queries have {queries.shape[1]}")
+    k = min(k, corpus.shape[0])
+    queries = np.asarray(queries, dtype=np.float32)
+    if space_type in NORMALIZED_SPACE_TYPES:
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    result = np.empty((queries.shape[0], k), dtype=np.int64)
+    for query_start in range(0, queries.shape[0], query_block_size):
+        query_block = queries[query_start:query_start + query_block_size]
+        best_scores = np.full((query_block.shape[0], 0), -np.inf, dtype=np.float32)
+        best_rows = np.empty((query_block.shape[0], 0), dtype=np.int64)
+        for block_start in range(0, corpus.shape[0], block_size):
+            block = np.asarray(corpus[block_start:block_start + block_size], dtype=np.float32)
+            scores = np.concatenate([best_scores, _scores(query_block, block, space_type)], axis=1)
+            rows = np.concatenate([best_rows, np.broadcast_to(
+                np.arange(block_start, block_start + block.shape[0]), (query_block.shape[0], block.shape[0]))],
+                axis=1)
+            if scores.shape[1] > k:
+                keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                scores, rows = np.take_along_axis(scores, keep, axis=1), np.take_along_axis(rows, keep, axis=1)
+            best_scores, best_rows = scores, rows
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        result[query_start:query_start + query_block.shape[0]] = np.take_along_axis(best_rows, order, axis=1)
+    return result
+
+
+def recall_at_k(results: np.ndarray, ground_truth: np.ndarray, k: int) -> np.ndarray:
+    """The recall@k of each query: the share of its exact top k found in its first k results.
+
+    results holds the returned row numbers of each query, padded with -1 when fewer than k were returned.
+    """
+    found = [len(set(result[:k].tolist()) & set(truth[:k].tolist())) for result, truth in zip(results, ground_truth)]
+    return np.asarray(found, dtype=np.float64) / min(k, ground_truth.shape[1])
+
+
+class RecallEvaluator:
+    """Adds a corpus of custom vectors to an index and measures recall@k and latency of context vector searches.
+
+    Args:
+        client: the Marqo client used for searches
+        url: the Marqo URL, for the ingestion pipeline
+        index_name: the index, e.g. created with custom_vector_index_settings
+        k: the number of results searched for and compared with the ground truth
+        field: the custom vector field
+        tensor_fields, mappings: passed on to add_documents, for an unstructured index
+    """
+
+    def __init__(self, client: Client, url: str, index_name: str, k: int = 10, field: str = VECTOR_FIELD,
+                 tensor_fields: Optional[List[str]] = None, mappings: Optional[Dict] = None):
+        self.client = client
+        self.url = url
+        self.index_name = index_name
+        self.k = k
+        self.field = field
+        self.tensor_fields = tensor_fields
+        self.mappings = mappings
+
+    def _documents(self, corpus: np.ndarray, block_size: int = 4096) -> Iterator[Dict]:
+        for start in range(0, corpus.shape[0], block_size):
+            # tolist on a block is much faster than on every row, and reads the memory map sequentially
+            for offset, vector in enumerate(np.asarray(corpus[start:start + block_size], dtype=np.float32).tolist()):
+                yield {"_id": str(start + offset), self.field: {"vector": vector}}
+
+    def ingest(self, corpus: np.ndarray, batch_size: int = 128, max_in_flight: int = 8,
+               dirty_index_tracker: Optional[DirtyIndexTracker] = None, **pipeline_kwargs) -> Dict:
+        """Adds every corpus vector, with its row number as _id, and returns the ingestion pipeline's result.
+
+        Pass the test class's dirty_index_tracker when the index is pooled, so that it is cleared before it is
+        leased again.
+        """
+        with IngestionPipeline(self.url, self.index_name, batch_size=batch_size, max_in_flight=max_in_flight,
+                               tensor_fields=self.tensor_fields, mappings=self.mappings,
+                               dirty_index_tracker=dirty_index_tracker, **pipeline_kwargs) as pipeline:
+            result = pipeline.run(self._documents(corpus))
+        if result["failed"]:
+            raise RuntimeError(f"{result['failed']} of {corpus.shape[0]} vectors were not added to "
+                               f"{self.index_name}: {result['error_samples']}")
+        return result
+
+    def search(self, query: np.ndarray, ef_search: Optional[int] = None) -> np.ndarray:
+        """The row numbers of the k results of a query, padded with -1."""
+        response = self.client.index(self.index_name).search(
+            q=None, context={"tensor": [{"vector": np.asarray(query, dtype=np.float32).tolist(), "weight": 1}]},
+            limit=self.k, ef_search=ef_search, attributes_to_retrieve=["_id"], show_highlights=False)
+        rows = np.full(self.k, -1, dtype=np.int64)
+        hits = [int(hit["_id"]) for hit in response["hits"]][:self.k]
+        rows[:len(hits)] = hits
+        return rows
+
+    def evaluate(self, queries: np.ndarray, ground_truth: np.ndarray, ef_search: Optional[int] = None,
+                 warmup_queries: int = 10) -> Dict:
+        """Searches every query and returns the recall@k (mean, min and percentiles) and the search latencies.
+
+        ef_search is HNSW's query-time candidate list size. The first warmup_queries queries are searched once
+        before the measured searches.
+        """
+        if len(queries) != len(ground_truth):
+            raise ValueError(f"{len(queries)} queries but {len(ground_truth)} ground truth rows")
+        for query in queries[:warmup_queries]:
+            self.search(query, ef_search)
+        results = np.empty((len(queries), self.k), dtype=np.int64)
+        latencies = []
+        start = time.perf_counter()
+        for i, query in enumerate(queries):
+            search_start = time.perf_counter()
+            results[i] = self.search(query, ef_search)
+            latencies.append(time.perf_counter() - search_start)
+        duration = time.perf_counter() - start
+
+        recall = recall_at_k(results, ground_truth, self.k)
+        p10, p50 = np.percentile(recall, [10, 50])
+        summary = reporting.summarize_latencies(latencies, duration)
+        return {
+            "k": self.k,
+            "ef_search": ef_search,
+            "queries": len(queries),
+            "recall": {"mean": round(float(recall.mean()), 4), "min": round(float(recall.min()), 4),
+                       "p10": round(float(p10), 4), "p50": round(float(p50), 4)},
+            **summary,
+        }
@@ -0,0 +1,93 @@
+"""Latency summaries and machine-readable result files for the benchmarks in this directory.
+
+Each benchmark class writes one JSON file per run to MARQO_API_TESTS_BENCHMARK_DIR (default:
+./benchmark_results). The file holds the run metadata (image, branch, testing configuration, host) and one
+entry per measured case, with its parameters, latency percentiles, throughput and raw samples. The run is also
+saved to the SQLite result store (see result_store.py), which compares runs across images and branches.
+"""
+import hashlib
+import json
+import os
+import platform
+import sqlite3
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from tests.benchmarks.result_store import BenchmarkResultStore
+
+
+def summarize_latencies(latencies_s: Sequence[float], duration_s: float, items_per_operation: Optional[
+        Sequence[int]] = None) -> Dict:
+    """Summarizes per-operation latencies (in seconds) measured over duration_s seconds.
+
+    Args:
+        latencies_s: the latency of each operation, in seconds
+        duration_s: the wall-clock time taken by all operations, used for throughput
+        items_per_operation: the number of items (e.g. documents) handled by each operation. If given,
+            the item throughput is reported as well as the operation throughput.
+    """
+    latencies_ms = np.asarray(latencies_s, dtype=np.float64) * 1000
+    summary = {
+        "count": int(latencies_ms.size),
+        "duration_s": round(duration_s, 4),
+        "throughput_per_s": round(latencies_ms.size / duration_s, 3) if duration_s > 0 else None,
+        "latency_ms": {},
+        "samples_ms": [round(float(latency), 3) for latency in latencies_ms],
+    }
+    if latencies_ms.size:
+        p50, p90, p99 = np.percentile(latencies_ms, [50, 90, 99])
+        summary["latency_ms"] = {
+            "p50": round(float(p50), 3),
+            "p90": round(float(p90), 3),
+            "p99": round(float(p99), 3),
+            "max": round(float(latencies_ms.max()), 3),
+            "mean": round(float(latencies_ms.mean()), 3),
+        }
+    if items_per_operation is not None:
+        total_items = int(sum(items_per_operation))
+        summary["items"] = total_items
+        summary["items_per_s"] = round(total_items / duration_s, 3) if duration_s > 0 else None
+    return summary
+
+
+def host_fingerprint() -> str:
+    """Identifies the machine a benchmark ran on, so that only results from comparable hosts are compared."""
+    try:
+        memory_bytes = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        memory_bytes = 0
+    host = f"{platform.node()}|{platform.machine()}|{platform.processor()}|{os.cpu_count()}|{memory_bytes}"
+    return hashlib.sha256(host.encode()).hexdigest()[:16]
+
+
+def run_metadata() -> Dict:
+    """Describes the Marqo image and environment the benchmark ran against."""
+    return {
+        "image": os.environ.get("MARQO_IMAGE_NAME", os.environ.get("MQ_API_TEST_IMG", "unknown")),
+        "branch": os.environ.get("MQ_API_TEST_BRANCH", "unknown"),
+        "testing_configuration": os.environ.get("TESTING_CONFIGURATION", "unknown"),
+        "host": platform.node(),
+        "host_fingerprint": host_fingerprint(),
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()),
+    }
+
+
+def write_results(benchmark_name: str, results: List[Dict], output_dir: Optional[str] = None) -> str:
+    """Writes the results of a benchmark run to a JSON file and to the result store, and returns the file's path."""
+    output_dir = output_dir or os.environ.get("MARQO_API_TESTS_BENCHMARK_DIR", "benchmark_results")
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"{benchmark_name}_{time.strftime('%Y%m%dT%H%M%S')}.json")
+    metadata = run_metadata()
+    with open(path, "w") as f:
+        json.dump({"benchmark": benchmark_name, "metadata": metadata, "results": results}, f, indent=2)
+    try:
+        with BenchmarkResultStore(os.environ.get("MARQO_API_TESTS_BENCHMARK_DB",
+                                                 os.path.join(output_dir, "results.sqlite"))) as store:
+            store.save_run(benchmark_name, metadata, results)
+    except sqlite3.Error as e:
+        # The JSON file has the results; the store is only for comparisons
+        print(f"Failed to save the {benchmark_name} results to the result store: {e}")
+    return path
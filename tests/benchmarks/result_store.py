@@ -0,0 +1,292 @@
+"""A SQLite store of benchmark runs, and a command that compares two sets of runs, e.g. before and after an image
+upgrade.
+
+reporting.write_results saves every benchmark run to the store as well as to its JSON file. The store is
+MARQO_API_TESTS_BENCHMARK_DB (default: results.sqlite in MARQO_API_TESTS_BENCHMARK_DIR). A run is keyed by its
+benchmark, image, branch, TESTING_CONFIGURATION and host fingerprint, and a case within it by its name and
+parameters, so the same case can be followed across images and branches:
+
+    python -m tests.benchmarks.result_store list
+    python -m tests.benchmarks.result_store compare --baseline image=marqoai/marqo:2.0.0 \\
+        --candidate image=marqo_docker_0 --threshold 10 --threshold p99=20
+
+compare matches the cases of the latest baseline and candidate runs (or the last --last runs of each, pooled) and
+prints the relative change of each metric with a 95% bootstrap confidence interval. Latency percentiles are
+bootstrapped from the raw samples when the cases kept them, other metrics from their values in the pooled runs.
+A metric regresses when its latency goes up or its throughput goes down; compare exits with status 1 when the
+whole confidence interval of a regression is beyond its threshold (in percent).
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# The columns a run is keyed by, which --baseline and --candidate can filter on
+RUN_KEYS = ("benchmark", "image", "branch", "testing_configuration", "host_fingerprint")
+# Metrics where lower is better; for the others (throughput) higher is better
+LATENCY_METRICS = ("p50", "p90", "p99", "p99.9", "mean")
+THROUGHPUT_METRICS = ("throughput_per_s", "items_per_s")
+BOOTSTRAP_RESAMPLES = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    benchmark TEXT NOT NULL,
+    image TEXT NOT NULL,
+    branch TEXT NOT NULL,
+    testing_configuration TEXT NOT NULL,
+    host_fingerprint TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_key ON runs (benchmark, image, branch, testing_configuration, host_fingerprint);
+CREATE TABLE IF NOT EXISTS cases (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    params TEXT NOT NULL,
+    result TEXT NOT NULL,
+    samples_ms BLOB
+);
+CREATE INDEX IF NOT EXISTS cases_run ON cases (run_id);
+"""
+
+
+def default_path() -> str:
+    return os.environ.get("MARQO_API_TESTS_BENCHMARK_DB", os.path.join(
+        os.environ.get("MARQO_API_TESTS_BENCHMARK_DIR", "benchmark_results"), "results.sqlite"))
+
+
+def _case_key(name: str, params: Dict) -> str:
+    return f"{name} {json.dumps(params, sort_keys=True, default=str)}"
+
+
+class BenchmarkResultStore:
+    """Saves benchmark runs to a SQLite database and reads them back."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_path()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(self.path)
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._connection.executescript(_SCHEMA)
+
+    def save_run(self, benchmark_name: str, metadata: Dict, results: List[Dict]) -> int:
+        """Saves the results of one benchmark run (as written by reporting.write_results) and returns its id."""
+        with self._connection:
+            run_id = self._connection.execute(
+                "INSERT INTO runs (benchmark, image, branch, testing_configuration, host_fingerprint, timestamp, "
+                "metadata) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (benchmark_name, metadata.get("image", "unknown"), metadata.get("branch", "unknown"),
+                 metadata.get("testing_configuration", "unknown"), metadata.get("host_fingerprint", "unknown"),
+                 metadata.get("timestamp", ""), json.dumps(metadata))
+            ).lastrowid
+            for result in results:
+                samples = result.get("samples_ms")
+                self._connection.execute(
+                    "INSERT INTO cases (run_id, name, params, result, samples_ms) VALUES (?, ?, ?, ?, ?)",
+                    (run_id, result.get("name", ""), json.dumps(result.get("params", {}), sort_keys=True,
+                                                                 default=str),
+                     json.dumps({key: value for key, value in result.items() if key != "samples_ms"}, default=str),
+                     array("d", samples).tobytes() if samples else None)
+                )
+        return run_id
+
+    def runs(self, last: Optional[int] = None, **filters: str) -> List[Dict]:
+        """The runs matching filters (on the RUN_KEYS columns), newest first. With `last`, only the last runs of
+        each benchmark are returned."""
+        unknown = set(filters) - set(RUN_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown run keys {sorted(unknown)}, expected some of {RUN_KEYS}")
+        where = " AND ".join(f"{key} = ?" for key in filters) or "1"
+        rows = self._connection.execute(
+            f"SELECT id, {', '.join(RUN_KEYS)}, timestamp FROM runs WHERE {where} ORDER BY id DESC",
+            tuple(filters.values())
+        ).fetchall()
+        runs = [dict(zip(("id",) + RUN_KEYS + ("timestamp",), row)) for row in rows]
+        if last is None:
+            return runs
+        kept, per_benchmark = [], {}
+        for run in runs:
+            per_benchmark[run["benchmark"]] = per_benchmark.get(run["benchmark"], 0) + 1
+            if per_benchmark[run["benchmark"]] <= last:
+                kept.append(run)
+        return kept
+
+    def cases(self, run_ids: Sequence[int]) -> Dict[Tuple[str, str], List[Dict]]:
+        """The cases of the given runs, grouped by (benchmark, case key). Each case has its result and, if it kept
+        them, its raw latency samples under "samples_ms"."""
+        cases: Dict[Tuple[str, str], List[Dict]] = {}
+        if not run_ids:
+            return cases
+        rows = self._connection.execute(
+            f"SELECT runs.benchmark, cases.name, cases.params, cases.result, cases.samples_ms FROM cases "
+            f"JOIN runs ON runs.id = cases.run_id WHERE cases.run_id IN ({', '.join('?' * len(run_ids))})",
+            tuple(run_ids)
+        ).fetchall()
+        for benchmark, name, params, result, samples in rows:
+            case = json.loads(result)
+            if samples is not None:
+                case["samples_ms"] = array("d", samples).tolist()
+            cases.setdefault((benchmark, _case_key(name, json.loads(params))), []).append(case)
+        return cases
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> "BenchmarkResultStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _metric(case: Dict, metric: str) -> Optional[float]:
+    value = case.get(metric) if metric in THROUGHPUT_METRICS else case.get("latency_ms", {}).get(metric)
+    return None if value is None else float(value)
+
+
+def _statistic(values: np.ndarray, metric: str) -> np.ndarray:
+    """The metric of each row of values, a (resamples, samples) array of latencies."""
+    if metric == "mean":
+        return values.mean(axis=-1)
+    return np.percentile(values, float(metric[1:]), axis=-1)
+
+
+def _bootstrap(values: np.ndarray, metric: str, rng: np.random.Generator) -> np.ndarray:
+    """The metric of BOOTSTRAP_RESAMPLES resamples (with replacement) of values."""
+    if values.size == 1:
+        return np.repeat(values[0], BOOTSTRAP_RESAMPLES)
+    statistics = []
+    # In chunks, so that many samples do not make one huge (resamples, samples) array
+    chunk = max(1, min(BOOTSTRAP_RESAMPLES, 1_000_000 // values.size))
+    for start in range(0, BOOTSTRAP_RESAMPLES, chunk):
+        resamples = min(chunk, BOOTSTRAP_RESAMPLES - start)
+        statistics.append(_statistic(values[rng.integers(0, values.size, (resamples, values.size))], metric))
+    return np.concatenate(statistics)
+
+
+def compare_metric(baseline: List[Dict], candidate: List[Dict], metric: str, seed: int = 0) -> Optional[Dict]:
+    """The relative change (in percent) of a metric from the baseline to the candidate cases, with a 95%
+    bootstrap confidence interval, or None if either side does not have the metric."""
+    rng = np.random.default_rng(seed)
+    sides = []
+    for cases in (baseline, candidate):
+        samples = [sample for case in cases for sample in case.get("samples_ms") or []]
+        if metric in LATENCY_METRICS and samples:
+            values = np.asarray(samples, dtype=np.float64)
+            sides.append((float(_statistic(values, metric)), _bootstrap(values, metric, rng)))
+            continue
+        # Without samples, the runs are the samples: the value of each pooled run
+        values = np.asarray([value for value in (_metric(case, metric) for case in cases) if value is not None])
+        if not values.size:
+            return None
+        sides.append((float(values.mean()), _bootstrap(values, "mean", rng)))
+    (baseline_value, baseline_resamples), (candidate_value, candidate_resamples) = sides
+    if baseline_value == 0 or np.any(baseline_resamples == 0):
+        return None
+    change = (candidate_value / baseline_value - 1) * 100
+    low, high = np.percentile((candidate_resamples / baseline_resamples - 1) * 100, [2.5, 97.5])
+    return {"baseline": round(baseline_value, 3), "candidate": round(candidate_value, 3),
+            "change_pct": round(change, 2), "ci_pct": [round(float(low), 2), round(float(high), 2)]}
+
+
+def compare(store: BenchmarkResultStore, baseline_filters: Dict[str, str], candidate_filters: Dict[str, str],
+            thresholds: Dict[str, float], last: int = 1) -> List[Dict]:
+    """Compares every case found in both the baseline and the candidate runs.
+
+    Args:
+        thresholds: the largest regression allowed for each metric, in percent. The "*" key applies to metrics
+            without their own threshold.
+
+    Returns:
+        One row per case and metric. "regression" is True when the whole confidence interval of the change is
+        a regression larger than the metric's threshold.
+    """
+    baseline = store.cases([run["id"] for run in store.runs(last=last, **baseline_filters)])
+    candidate = store.cases([run["id"] for run in store.runs(last=last, **candidate_filters)])
+    rows = []
+    for key in sorted(set(baseline) & set(candidate)):
+        for metric in LATENCY_METRICS + THROUGHPUT_METRICS:
+            comparison = compare_metric(baseline[key], candidate[key], metric)
+            if comparison is None:
+                continue
+            threshold = thresholds.get(metric, thresholds.get("*"))
+            # A regression is an increase in latency or a decrease in throughput
+            sign = 1 if metric in LATENCY_METRICS else -1
+            regression_low = min(sign * comparison["ci_pct"][0], sign * comparison["ci_pct"][1])
+            rows.append({"benchmark": key[0], "case": key[1], "metric": metric, **comparison,
+                         "threshold_pct": threshold,
+                         "regression": threshold is not None and regression_low > threshold})
+    return rows
+
+
+def _parse_filters(values: Sequence[str]) -> Dict[str, str]:
+    filters = {}
+    for value in values:
+        for item in value.split(","):
+            key, separator, filter_value = item.partition("=")
+            if not separator:
+                raise argparse.ArgumentTypeError(f"Expected key=value, got {item!r}")
+            filters[key.strip()] = filter_value.strip()
+    return filters
+
+
+def _parse_thresholds(values: Sequence[str]) -> Dict[str, float]:
+    thresholds = {}
+    for value in values:
+        metric, separator, threshold = value.rpartition("=")
+        thresholds[metric if separator else "*"] = float(threshold)
+    return thresholds
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="List and compare stored benchmark runs.")
+    parser.add_argument("--db", default=None, help="The result store (default: MARQO_API_TESTS_BENCHMARK_DB)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    list_parser = commands.add_parser("list", help="List the stored runs")
+    list_parser.add_argument("--filter", action="append", default=[], help=f"key=value, with keys in {RUN_KEYS}")
+    compare_parser = commands.add_parser("compare", help="Compare the cases of two sets of runs")
+    compare_parser.add_argument("--baseline", action="append", default=[], required=True,
+                                help=f"key=value[,key=value] selecting the baseline runs, with keys in {RUN_KEYS}")
+    compare_parser.add_argument("--candidate", action="append", default=[], required=True,
+                                help="key=value[,key=value] selecting the candidate runs")
+    compare_parser.add_argument("--last", type=int, default=1,
+                                help="Pool the last N runs of each benchmark on each side (default: 1)")
+    compare_parser.add_argument("--threshold", action="append", default=[],
+                                help="The largest regression allowed, in percent, for all metrics (10) or for one "
+                                     f"metric (p99=20). Metrics: {LATENCY_METRICS + THROUGHPUT_METRICS}")
+    compare_parser.add_argument("--output", help="Write the comparison rows to this JSON file")
+    args = parser.parse_args(argv)
+
+    with BenchmarkResultStore(args.db) as store:
+        if args.command == "list":
+            for run in store.runs(**_parse_filters(args.filter)):
+                print("  ".join(f"{key}={run[key]}" for key in ("id", "timestamp") + RUN_KEYS))
+            return 0
+        rows = compare(store, _parse_filters(args.baseline), _parse_filters(args.candidate),
+                       _parse_thresholds(args.threshold), last=args.last)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+    if not rows:
+        print("No case was found in both the baseline and the candidate runs")
+        return 1
+    for row in rows:
+        print(f"{'REGRESSION ' if row['regression'] else ''}{row['benchmark']} {row['case']} {row['metric']}: "
+              f"{row['baseline']} -> {row['candidate']} ({row['change_pct']:+.2f}%, 95% CI "
+              f"[{row['ci_pct'][0]:+.2f}%, {row['ci_pct'][1]:+.2f}%])")
+    regressions = sum(row["regression"] for row in rows)
+    print(f"{len(rows)} metrics compared, {regressions} regressions beyond their threshold")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+"""Declarative workload scenarios, run open-loop by a pool of worker processes.
+
+A scenario is a JSON (or, if PyYAML is installed, YAML) file describing:
+
+    {
+      "name": "search_heavy",
+      "workers": 4,
+      "indexes": {"products": {"type": "unstructured", "model": "sentence-transformers/all-MiniLM-L6-v2"}},
+      "corpus": [{"index": "products", "documents": 1000, "batchSize": 64, "tensorFields": ["title"],
+                  "fields": {"title": {"type": "text", "words": 8},
+                             "price": {"type": "float", "min": 1, "max": 100},
+                             "category": {"type": "choice", "values": ["shoes", "hats"]}}}],
+      "operations": [
+        {"type": "search", "index": "products", "weight": 80,
+         "queries": ["red shoes", "warm hat"], "params": {"search_method": "TENSOR", "limit": 10}},
+        {"type": "add_documents", "index": "products", "weight": 10, "batchSize": 16},
+        {"type": "update_documents", "index": "products", "weight": 5, "batchSize": 8, "fields": ["price"]},
+        {"type": "delete_documents", "index": "products", "weight": 3, "batchSize": 1},
+        {"type": "get_stats", "index": "products", "weight": 2}
+      ],
+      "phases": [{"name": "warmup", "rate": 10, "duration": 10}, {"name": "steady", "rate": 50, "duration": 60}]
+    }
+
+The runner creates the indexes (with unique names), loads the corpus, and then runs each phase. A phase's rate is
+the total arrival rate in operations per second; it is split evenly over the worker processes, each of which runs
+an OpenLoopLoadGenerator (with `threads` threads if the phase sets it) and picks every operation by weight from a
+seeded generator. The latency histograms of the
+workers are merged per phase and per operation type. The indexes are deleted at the end.
+
+Field types for the corpus and for generated documents are "text" (`words` random words), "int" and "float"
+(between `min` and `max`), "bool" and "choice" (one of `values`). add_documents and update_documents operations
+generate documents with the fields of the corpus of their index; update_documents only sets `fields` (default:
+every non-text field) on existing corpus documents. delete_documents deletes documents the worker has added, or
+ids that do not exist when there are none, so that the corpus stays intact.
+
+Run a scenario from the command line with:
+
+    python -m tests.benchmarks.scenario_runner tests/benchmarks/scenarios/search_heavy.json --url http://localhost:8882
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+from marqo import Client
+
+from tests.benchmarks import reporting
+from tests.benchmarks.benchmark_case import WORDS
+from tests.benchmarks.load_generator import LatencyHistogram, OpenLoopLoadGenerator
+
+# The scenarios in this directory are run by test_scenario_benchmark.py
+SCENARIOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios")
+OPERATION_TYPES = ("search", "add_documents", "update_documents", "delete_documents", "get_stats")
+FIELD_TYPES = ("text", "int", "float", "bool", "choice")
+# Marqo's default MARQO_MAX_DOCUMENTS_BATCH_SIZE: the most documents one add or update request may hold
+MAX_BATCH_SIZE = 128
+
+
+def _validate_batch_size(batch_size, owner: str) -> None:
+    if not isinstance(batch_size, int) or isinstance(batch_size, bool) or not 1 <= batch_size <= MAX_BATCH_SIZE:
+        raise ValueError(f"The batchSize of {owner} must be an integer from 1 to {MAX_BATCH_SIZE}, got "
+                         f"`{batch_size}`")
+
+
+def load_scenario(path: str) -> Dict:
+    """Reads and validates a scenario file. Raises ValueError if the scenario is invalid."""
+    with open(path) as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError as e:
+                raise ImportError("Install PyYAML to use YAML scenario files, or write the scenario in JSON") from e
+            scenario = yaml.safe_load(f)
+        else:
+            scenario = json.load(f)
+    validate_scenario(scenario)
+    return scenario
+
+
+def validate_scenario(scenario: Dict) -> None:
+    for key in ("name", "indexes", "operations", "phases"):
+        if key not in scenario:
+            raise ValueError(f"The scenario is missing `{key}`")
+    for corpus in scenario.get("corpus", []):
+        if corpus.get("index") not in scenario["indexes"]:
+            raise ValueError(f"The corpus index `{corpus.get('index')}` is not in `indexes`")
+        _validate_batch_size(corpus.get("batchSize", 64), f"the corpus of `{corpus['index']}`")
+        for field_name, field in corpus.get("fields", {}).items():
+            if field.get("type") not in FIELD_TYPES:
+                raise ValueError(f"The field `{field_name}` has type `{field.get('type')}`, expected one of "
+                                 f"{FIELD_TYPES}")
+    if not scenario["operations"]:
+        raise ValueError("The scenario has no operations")
+    for operation in scenario["operations"]:
+        if operation.get("type") not in OPERATION_TYPES:
+            raise ValueError(f"Unknown operation type `{operation.get('type')}`, expected one of {OPERATION_TYPES}")
+        if operation.get("index") not in scenario["indexes"]:
+            raise ValueError(f"The operation index `{operation.get('index')}` is not in `indexes`")
+        if operation.get("weight", 1) <= 0:
+            raise ValueError(f"The weight of operation `{operation['type']}` must be positive")
+        _validate_batch_size(operation.get("batchSize", 1),
+                             f"operation `{operation['type']}` on `{operation['index']}`")
+        if operation["type"] == "search" and not operation.get("queries"):
+            raise ValueError("A search operation needs `queries`")
+    for phase in scenario["phases"]:
+        if phase.get("rate", 0) <= 0 or phase.get("duration", 0) <= 0:
+            raise ValueError(f"Phase `{phase.get('name')}` needs a positive `rate` and `duration`")
+
+
+def generate_document(fields: Dict[str, Dict], rng: random.Random, _id: Optional[str] = None) -> Dict:
+    doc = {} if _id is None else {"_id": _id}
+    for field_name, field in fields.items():
+        field_type = field["type"]
+        if field_type == "text":
+            doc[field_name] = " ".join(rng.choices(WORDS, k=field.get("words", 10)))
+        elif field_type == "int":
+            doc[field_name] = rng.randint(field.get("min", 0), field.get("max", 100))
+        elif field_type == "float":
+            doc[field_name] = rng.uniform(field.get("min", 0), field.get("max", 1))
+        elif field_type == "bool":
+            doc[field_name] = rng.random() < 0.5
+        elif field_type == "choice":
+            doc[field_name] = rng.choice(field["values"])
+    return doc
+
+
+class _Worker:
+    """Runs the operations of one worker process against Marqo."""
+
+    def __init__(self, scenario: Dict, url: str, index_names: Dict[str, str], worker: int):
+        self.scenario = scenario
+        self.client = Client(url=url)
+        self.index_names = index_names
+        self.worker = worker
+        self.corpora = {corpus["index"]: corpus for corpus in scenario.get("corpus", [])}
+        self.operations = scenario["operations"]
+        self.weights = [operation.get("weight", 1) for operation in self.operations]
+        self.seed = scenario.get("seed", 1) * 1000 + worker
+        # The ids of the documents this worker has added, per index, which delete_documents deletes first
+        self.added_ids: Dict[str, List[str]] = {}
+        self.added_count = 0
+        self.lock = threading.Lock()
+
+    def operation_for(self, request_index: int) -> Dict:
+        # Seeded by the request index, so that the label and the operation agree
+        return random.Random(self.seed * 1_000_003 + request_index).choices(self.operations, self.weights)[0]
+
+    def label_for(self, request_index: int) -> str:
+        return self.operation_for(request_index)["type"]
+
+    def run_operation(self, request_index: int) -> None:
+        operation = self.operation_for(request_index)
+        rng = random.Random(self.seed * 7_000_003 + request_index)
+        index = self.client.index(self.index_names[operation["index"]])
+        corpus = self.corpora.get(operation["index"], {})
+        batch_size = operation.get("batchSize", 1)
+
+        if operation["type"] == "search":
+            index.search(rng.choice(operation["queries"]), **operation.get("params", {}))
+        elif operation["type"] == "get_stats":
+            index.get_stats()
+        elif operation["type"] == "add_documents":
+            with self.lock:
+                first = self.added_count
+                self.added_count += batch_size
+            ids = [f"w{self.worker}_{i}" for i in range(first, first + batch_size)]
+            documents = [generate_document(corpus.get("fields", {}), rng, _id) for _id in ids]
+            res = index.add_documents(documents, tensor_fields=corpus.get("tensorFields"),
+                                      **operation.get("params", {}))
+            if res["errors"]:
+                raise RuntimeError(f"add_documents failed: {res}")
+            with self.lock:
+                self.added_ids.setdefault(operation["index"], []).extend(ids)
+        elif operation["type"] == "update_documents":
+            fields = corpus.get("fields", {})
+            updated_fields = {name: fields[name] for name in operation.get(
+                "fields", [name for name, field in fields.items() if field["type"] != "text"])}
+            ids = rng.sample(range(corpus.get("documents", 1)), min(batch_size, corpus.get("documents", 1)))
+            res = index.update_documents([generate_document(updated_fields, rng, str(_id)) for _id in ids])
+            if res["errors"]:
+                raise RuntimeError(f"update_documents failed: {res}")
+        elif operation["type"] == "delete_documents":
+            with self.lock:
+                added = self.added_ids.get(operation["index"], [])
+                ids = [added.pop() for _ in range(min(batch_size, len(added)))]
+            if not ids:
+                # Keep the corpus intact for update_documents: delete ids that were never added instead
+                ids = [f"w{self.worker}_missing_{rng.randrange(1 << 30)}" for _ in range(batch_size)]
+            index.delete_documents(ids)
+
+
+def _run_worker(scenario: Dict, url: str, index_names: Dict[str, str], worker: int, workers: int,
+                duration_scale: float) -> List[Dict]:
+    """Runs every phase of the scenario with 1 / workers of its rate. Runs in a worker process."""
+    runner = _Worker(scenario, url, index_names, worker)
+    phases = []
+    for phase in scenario["phases"]:
+        generator = OpenLoopLoadGenerator(
+            runner.run_operation, rate_per_s=phase["rate"] / workers, duration_s=phase["duration"] * duration_scale,
+            workers=phase.get("threads"), label_for=runner.label_for)
+        result = generator.run()
+        phases.append({"latency": generator.latency, "latency_by_label": generator.latency_by_label,
+                       "errors_by_label": generator.errors_by_label, "sent": result["sent"],
+                       "errors": result["errors"], "error_samples": result["error_samples"],
+                       "duration_s": result["duration_s"]})
+    return phases
+
+
+def _merge_phase(phase: Dict, worker_results: List[Dict], duration_scale: float) -> Dict:
+    latency = LatencyHistogram()
+    by_label: Dict[str, LatencyHistogram] = {}
+    errors_by_label: Dict[str, int] = {}
+    for worker_result in worker_results:
+        latency.merge(worker_result["latency"])
+        for label, histogram in worker_result["latency_by_label"].items():
+            by_label.setdefault(label, LatencyHistogram()).merge(histogram)
+        for label, errors in worker_result["errors_by_label"].items():
+            errors_by_label[label] = errors_by_label.get(label, 0) + errors
+    duration = max(worker_result["duration_s"] for worker_result in worker_results)
+    return {
+        "name": phase.get("name", ""),
+        # The duration the phase ran for, which is shorter than the scenario's with a duration_scale below 1
+        "params": {"rate_per_s": phase["rate"], "duration_s": phase["duration"] * duration_scale},
+        "sent": sum(worker_result["sent"] for worker_result in worker_results),
+        "errors": sum(worker_result["errors"] for worker_result in worker_results),
+        "error_samples": [sample for worker_result in worker_results
+                          for sample in worker_result["error_samples"]][:5],
+        "duration_s": duration,
+        "throughput_per_s": round(latency.count / duration, 3) if duration > 0 else None,
+        "latency_ms": latency.summary()["latency_ms"],
+        "operations": {label: {**histogram.summary(), "errors": errors_by_label.get(label, 0)}
+                       for label, histogram in sorted(by_label.items())},
+    }
+
+
+def _create_indexes(scenario: Dict, url: str) -> Dict[str, str]:
+    suffix = uuid.uuid4().hex[:8]
+    index_names = {key: f"scenario_{key}_{suffix}" for key in scenario["indexes"]}
+    r = requests.post(f"{url}/batch/indexes/create", data=json.dumps(
+        [{"indexName": index_names[key], **settings} for key, settings in scenario["indexes"].items()]))
+    r.raise_for_status()
+    return index_names
+
+
+def _load_corpus(scenario: Dict, url: str, index_names: Dict[str, str]) -> None:
+    client = Client(url=url)
+    rng = random.Random(scenario.get("seed", 1))
+    for corpus in scenario.get("corpus", []):
+        documents = [generate_document(corpus.get("fields", {}), rng, str(i)) for i in range(corpus["documents"])]
+        res = client.index(index_names[corpus["index"]]).add_documents(
+            documents, client_batch_size=corpus.get("batchSize", 64), tensor_fields=corpus.get("tensorFields"))
+        if any(batch["errors"] for batch in res):
+            raise RuntimeError(f"Failed to load the corpus of `{corpus['index']}`")
+
+
+def run_scenario(scenario: Dict, url: str, workers: Optional[int] = None, duration_scale: float = 1.0) -> Dict:
+    """Creates the scenario indexes, loads the corpus, runs the phases across worker processes and returns the
+    merged results. The indexes are deleted afterwards."""
+    validate_scenario(scenario)
+    workers = workers or scenario.get("workers", os.cpu_count() or 1)
+    index_names = _create_indexes(scenario, url)
+    try:
+        start = time.perf_counter()
+        _load_corpus(scenario, url, index_names)
+        load_duration = time.perf_counter() - start
+        # Not forked: the client's module-level requests session would share its keep-alive sockets with the workers
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = [executor.submit(_run_worker, scenario, url, index_names, worker, workers, duration_scale)
+                       for worker in range(workers)]
+            worker_phases = [future.result() for future in futures]
+    finally:
+        requests.post(f"{url}/batch/indexes/delete", data=json.dumps(list(index_names.values())))
+    return {
+        "scenario": scenario["name"],
+        "workers": workers,
+        "corpus_load_s": round(load_duration, 3),
+        "phases": [_merge_phase(phase, [phases[position] for phases in worker_phases], duration_scale)
+                   for position, phase in enumerate(scenario["phases"])],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a workload scenario against Marqo.")
+    parser.add_argument("scenario", help="The path of a JSON or YAML scenario file")
+    parser.add_argument("--url", default="http://localhost:8882")
+    parser.add_argument("--workers", type=int, default=None, help="The number of worker processes")
+    parser.add_argument("--duration-scale", type=float, default=1.0,
+                        help="Multiplies the duration of every phase, e.g. 0.1 for a quick run")
+    args = parser.parse_args()
+    scenario = load_scenario(args.scenario)
+    result = run_scenario(scenario, args.url, workers=args.workers, duration_scale=args.duration_scale)
+    path = reporting.write_results(f"scenario_{scenario['name']}", result["phases"])
+    print(json.dumps({key: value for key, value in result.items() if key != "phases"}))
+    for phase in result["phases"]:
+        print(f"{phase['name']}: {phase['sent']} sent, {phase['errors']} errors, "
+              f"{phase['throughput_per_s']}/s, p99 {phase['latency_ms'].get('p99')} ms")
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import os
+import random
+import time
+from typing import Dict, List, Optional
+
+import pytest
+
+from tests.benchmarks.benchmark_case import MarqoBenchmarkCase, WORDS, timed_requests
+
+
+def generate_documents(number_of_documents: int, number_of_fields: int, words_per_field: int = 20,
+                       seed: int = 1) -> List[Dict]:
+    rng = random.Random(seed)
+    return [{f"text_field_{field}": " ".join(rng.choices(WORDS, k=words_per_field))
+             for field in range(number_of_fields)} for _ in range(number_of_documents)]
+
+
+@pytest.mark.fixed
+@pytest.mark.benchmark
+class TestIngestionThroughputBenchmark(MarqoBenchmarkCase):
+    """Measures add_documents throughput (docs/s and vectors/s) and per-batch latency while sweeping the
+    client batch size, documents per request, fields per document, tensor vs non-tensor fields and
+    multimodal_combination mappings."""
+    benchmark_name = "ingestion_throughput"
+    NUMBER_OF_DOCUMENTS = int(os.environ.get("MARQO_API_TESTS_BENCHMARK_DOCS", 512))
+
+    pooled_indexes = {
+        "index_name": {
+            "type": "unstructured",
+            "model": "sentence-transformers/all-MiniLM-L6-v2",
+        }
+    }
+
+    def ingest(self, name: str, params: Dict, documents: List[Dict], documents_per_request: int,
+               client_batch_size: Optional[int] = None, tensor_fields: Optional[List[str]] = None,
+               mappings: Optional[Dict] = None) -> Dict:
+        """Adds documents to a cleared index in requests of documents_per_request documents, with the given
+        client_batch_size, and records the latency of every batch sent to Marqo."""
+        self.clear_indexes([self.index_name])
+        index = self.client.index(self.index_name)
+        batch_sizes = []
+        with timed_requests("/documents") as batch_latencies:
+            start = time.perf_counter()
+            for request_start in range(0, len(documents), documents_per_request):
+                request_documents = documents[request_start:request_start + documents_per_request]
+                batch_size = client_batch_size or len(request_documents)
+                batch_sizes += [len(request_documents[i:i + batch_size])
+                                for i in range(0, len(request_documents), batch_size)]
+                index.add_documents(request_documents, client_batch_size=client_batch_size,
+                                    tensor_fields=tensor_fields or [], mappings=mappings)
+            duration = time.perf_counter() - start
+
+        stats = index.get_stats()
+        self.assertEqual(len(documents), stats["numberOfDocuments"])
+        return self.record(
+            name, {"number_of_documents": len(documents), "documents_per_request": documents_per_request,
+                   "client_batch_size": client_batch_size, **params},
+            batch_latencies, duration, items_per_operation=batch_sizes,
+            vectors=stats["numberOfVectors"],
+            vectors_per_s=round(stats["numberOfVectors"] / duration, 3) if duration > 0 else None
+        )
+
+    def test_client_batch_size(self):
+        documents = generate_documents(self.NUMBER_OF_DOCUMENTS, number_of_fields=2)
+        for client_batch_size in [8, 32, 64, 128]:
+            with self.subTest(client_batch_size=client_batch_size):
+                self.ingest(f"client_batch_size_{client_batch_size}",
+                            {"fields_per_document": 2, "tensor": True}, documents,
+                            documents_per_request=len(documents), client_batch_size=client_batch_size,
+                            tensor_fields=["text_field_0", "text_field_1"])
+
+    def test_documents_per_request(self):
+        documents = generate_documents(self.NUMBER_OF_DOCUMENTS, number_of_fields=2)
+        for documents_per_request in [1, 16, 64, 128]:
+            with self.subTest(documents_per_request=documents_per_request):
+                # A single request per batch: no client batching
+                self.ingest(f"documents_per_request_{documents_per_request}",
+                            {"fields_per_document": 2, "tensor": True},
+                            documents[:max(documents_per_request * 8, 64)],
+                            documents_per_request=documents_per_request,
+                            tensor_fields=["text_field_0", "text_field_1"])
+
+    def test_fields_per_document(self):
+        for fields_per_document in [1, 4, 16]:
+            with self.subTest(fields_per_document=fields_per_document):
+                documents = generate_documents(self.NUMBER_OF_DOCUMENTS, number_of_fields=fields_per_document)
+                self.ingest(f"fields_per_document_{fields_per_document}",
+                            {"fields_per_document": fields_per_document, "tensor": True}, documents,
+                            documents_per_request=len(documents), client_batch_size=64,
+                            tensor_fields=[f"text_field_{i}" for i in range(fields_per_document)])
+
+    def test_tensor_vs_non_tensor_fields(self):
+        documents = generate_documents(self.NUMBER_OF_DOCUMENTS, number_of_fields=4)
+        for tensor in [True, False]:
+            with self.subTest(tensor=tensor):
+                self.ingest(f"tensor_{str(tensor).lower()}", {"fields_per_document": 4, "tensor": tensor},
+                            documents, documents_per_request=len(documents), client_batch_size=64,
+                            tensor_fields=[f"text_field_{i}" for i in range(4)] if tensor else [])
+
+    def test_multimodal_combination_mappings(self):
+        documents = generate_documents(self.NUMBER_OF_DOCUMENTS, number_of_fields=2)
+        mappings = {"combo_field": {"type": "multimodal_combination",
+                                    "weights": {"text_field_0": 0.5, "text_field_1": 0.5}}}
+        for documents_with_combo in [False, True]:
+            with self.subTest(multimodal_combination=documents_with_combo):
+                self.ingest(
+                    f"multimodal_combination_{str(documents_with_combo).lower()}",
+                    {"fields_per_document": 2, "tensor": True, "multimodal_combination": documents_with_combo},
+                    documents, documents_per_request=len(documents), client_batch_size=64,
+                    tensor_fields=["combo_field"] if documents_with_combo else ["text_field_0", "text_field_1"],
+                    mappings=mappings if documents_with_combo else None
+                )
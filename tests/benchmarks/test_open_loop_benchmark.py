@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from tests.benchmarks.benchmark_case import MarqoBenchmarkCase
+from tests.benchmarks.test_search_benchmark import _QUERIES, generate_documents
+
+
+@pytest.mark.fixed
+@pytest.mark.benchmark
+class TestOpenLoopSearchBenchmark(MarqoBenchmarkCase):
+    """Measures search latency under a constant arrival rate, from the scheduled send time of each request.
+
+    Unlike the closed-loop search benchmark, the load does not drop when Marqo slows down, so the tail latencies
+    include the time requests spend queueing once the rate exceeds what Marqo can serve.
+    """
+    benchmark_name = "open_loop_search"
+    NUMBER_OF_DOCUMENTS = int(os.environ.get("MARQO_API_TESTS_BENCHMARK_DOCS", 1000))
+    RATES_PER_S = [int(rate) for rate in
+                   os.environ.get("MARQO_API_TESTS_BENCHMARK_RATES", "5,10,20,40,80").split(",")]
+
+    pooled_indexes = {
+        "index_name": {
+            "type": "unstructured",
+            "model": "sentence-transformers/all-MiniLM-L6-v2",
+        }
+    }
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.clear_indexes(cls.leased_indexes)
+        cls.client.index(cls.index_name).add_documents(
+            generate_documents(cls.NUMBER_OF_DOCUMENTS), client_batch_size=64, tensor_fields=["field_a", "field_b"])
+
+    def run_rates(self, search_method: str):
+        index = self.client.index(self.index_name)
+        for _ in range(self.WARMUP_ITERATIONS):
+            index.search(_QUERIES[0], search_method=search_method)
+        for rate in self.RATES_PER_S:
+            with self.subTest(rate_per_s=rate):
+                result = self.measure_open_loop(
+                    f"{search_method.lower()}_{rate}_per_s",
+                    {"search_method": search_method, "number_of_documents": self.NUMBER_OF_DOCUMENTS},
+                    lambda request_index: index.search(_QUERIES[request_index % len(_QUERIES)],
+                                                       search_method=search_method),
+                    rate_per_s=rate)
+                self.assertEqual(0, result["errors"], result["error_samples"])
+
+    def test_tensor_search_at_constant_rate(self):
+        self.run_rates("TENSOR")
+
+    def test_lexical_search_at_constant_rate(self):
+        self.run_rates("LEXICAL")
@@ -0,0 +1,99 @@
+import os
+import random
+import threading
+from typing import Dict, List
+
+import pytest
+
+from tests.benchmarks.benchmark_case import MarqoBenchmarkCase
+
+NUMBER_OF_SCORE_MODIFIER_FIELDS = 100
+# Marqo rejects update_documents requests with more than 128 documents
+MAX_UPDATE_BATCH_SIZE = 128
+
+
+@pytest.mark.fixed
+@pytest.mark.benchmark
+class TestPartialUpdateContentionBenchmark(MarqoBenchmarkCase):
+    """Measures update_documents throughput and latency on score modifier fields under concurrency.
+
+    This is the benchmark counterpart of test_multi_threading_update_for_large_score_modifier_fields. It
+    sweeps the thread count, the fields per updated document and the documents per request, each for two
+    document selections: "uniform", where every request updates documents picked at random from the whole
+    corpus, and "hot_key", where every request of every thread updates the same documents.
+    """
+    benchmark_name = "partial_update_contention"
+    NUMBER_OF_DOCUMENTS = int(os.environ.get("MARQO_API_TESTS_BENCHMARK_DOCS", 1000))
+    SELECTIONS = ["uniform", "hot_key"]
+
+    pooled_indexes = {
+        "index_name": {
+            "type": "structured",
+            "model": "random/small",
+            "allFields": [{"name": f"float_field_{i}", "type": "float",
+                           "features": ["score_modifier", "filter"]} for i in range(NUMBER_OF_SCORE_MODIFIER_FIELDS)] +
+                         [{"name": "text_field_tensor", "type": "text"}],
+            "tensorFields": ["text_field_tensor"],
+        }
+    }
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.clear_indexes(cls.leased_indexes)
+        score_modifiers = {f"float_field_{field}": float(field) for field in range(NUMBER_OF_SCORE_MODIFIER_FIELDS)}
+        documents = [{"_id": str(i), "text_field_tensor": f"text field tensor {i}", **score_modifiers}
+                     for i in range(cls.NUMBER_OF_DOCUMENTS)]
+        cls.client.index(cls.index_name).add_documents(documents, client_batch_size=64)
+
+    def measure_updates(self, name: str, threads: int, fields_per_update: int, batch_size: int,
+                        selection: str) -> Dict:
+        index = self.client.index(self.index_name)
+        # MARQO_API_TESTS_BENCHMARK_DOCS may set fewer documents than the swept batch sizes, which cannot be sampled
+        batch_size = min(batch_size, self.NUMBER_OF_DOCUMENTS)
+        field_names = [f"float_field_{i}" for i in range(NUMBER_OF_SCORE_MODIFIER_FIELDS)]
+        hot_ids = [str(i) for i in range(batch_size)]
+        # One generator per thread, so that the threads do not share random state
+        generators = [random.Random(thread_index) for thread_index in range(threads)]
+        errors_lock = threading.Lock()
+        errors = []
+
+        def update(thread_index: int) -> None:
+            rng = generators[thread_index]
+            if selection == "hot_key":
+                ids = hot_ids
+            else:
+                ids = [str(i) for i in rng.sample(range(self.NUMBER_OF_DOCUMENTS), batch_size)]
+            documents = [{"_id": _id, **{field: rng.uniform(1, 100)
+                                         for field in rng.sample(field_names, fields_per_update)}}
+                         for _id in ids]
+            res = index.update_documents(documents)
+            if res["errors"]:
+                with errors_lock:
+                    errors.extend(item for item in res["items"] if item.get("status", 200) >= 400)
+
+        result = self.measure_concurrent(
+            name, {"fields_per_update": fields_per_update, "batch_size": batch_size, "selection": selection,
+                   "number_of_documents": self.NUMBER_OF_DOCUMENTS},
+            update, threads=threads, items_per_operation=batch_size)
+        result["failed_updates"] = len(errors)
+        return result
+
+    def run_sweep(self, sweep: str, values: List[int], threads: int = 8, fields_per_update: int = 10,
+                  batch_size: int = 1):
+        for selection in self.SELECTIONS:
+            for value in values:
+                case = {"threads": threads, "fields_per_update": fields_per_update, "batch_size": batch_size,
+                        sweep: value}
+                with self.subTest(selection=selection, **{sweep: value}):
+                    result = self.measure_updates(f"{sweep}_{value}_{selection}", selection=selection, **case)
+                    self.assertEqual(0, result["failed_updates"])
+
+    def test_thread_count(self):
+        self.run_sweep("threads", [1, 2, 4, 8, 16])
+
+    def test_fields_per_update(self):
+        self.run_sweep("fields_per_update", [1, 10, 50, NUMBER_OF_SCORE_MODIFIER_FIELDS])
+
+    def test_batch_size(self):
+        self.run_sweep("batch_size", [1, 16, 64, MAX_UPDATE_BATCH_SIZE])
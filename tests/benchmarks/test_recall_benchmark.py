@@ -0,0 +1,61 @@
+import os
+import tempfile
+
+import pytest
+
+from tests.benchmarks.benchmark_case import MarqoBenchmarkCase
+from tests.benchmarks.recall import (RecallEvaluator, custom_vector_index_settings, exact_top_k, generate_dataset,
+                                    load_vectors)
+
+_DIMENSION = int(os.environ.get("MARQO_API_TESTS_RECALL_DIMENSION", 128))
+
+
+@pytest.mark.fixed
+@pytest.mark.benchmark
+class TestRecallBenchmark(MarqoBenchmarkCase):
+    """Measures recall@k of context vector searches against exact ground truth, and their latency, for a range
+    of ef_search values. The corpus and queries are read from MARQO_API_TESTS_RECALL_CORPUS and
+    MARQO_API_TESTS_RECALL_QUERIES (.npy files of MARQO_API_TESTS_RECALL_DIMENSION dimensions) when set, and
+    are generated otherwise."""
+    benchmark_name = "recall"
+    NUMBER_OF_VECTORS = int(os.environ.get("MARQO_API_TESTS_BENCHMARK_DOCS", 10_000))
+    NUMBER_OF_QUERIES = int(os.environ.get("MARQO_API_TESTS_RECALL_QUERIES_COUNT", 200))
+    K = int(os.environ.get("MARQO_API_TESTS_RECALL_K", 10))
+    EF_SEARCH = [int(ef) for ef in os.environ.get("MARQO_API_TESTS_RECALL_EF_SEARCH", "10,20,40,80,160,320").split(",")]
+
+    pooled_indexes = {
+        "index_name": custom_vector_index_settings(_DIMENSION)
+    }
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.directory = tempfile.TemporaryDirectory()
+        if os.environ.get("MARQO_API_TESTS_RECALL_CORPUS"):
+            cls.corpus = load_vectors(os.environ["MARQO_API_TESTS_RECALL_CORPUS"])
+            cls.queries = load_vectors(os.environ["MARQO_API_TESTS_RECALL_QUERIES"])
+        else:
+            cls.corpus, cls.queries = generate_dataset(cls.directory.name, cls.NUMBER_OF_VECTORS,
+                                                       cls.NUMBER_OF_QUERIES, _DIMENSION)
+        cls.ground_truth = exact_top_k(cls.corpus, cls.queries, cls.K)
+        cls.clear_indexes(cls.leased_indexes)
+        cls.evaluator = RecallEvaluator(cls.client, cls._MARQO_URL, cls.index_name, k=cls.K)
+        cls.ingestion = cls.evaluator.ingest(cls.corpus, dirty_index_tracker=cls.dirty_index_tracker)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        cls.directory.cleanup()
+
+    def test_recall_vs_ef_search(self):
+        for ef_search in self.EF_SEARCH:
+            with self.subTest(ef_search=ef_search):
+                result = self.evaluator.evaluate(self.queries, self.ground_truth, ef_search=ef_search)
+                self.record_result({
+                    "name": f"ef_search_{ef_search}",
+                    "params": {"ef_search": ef_search, "k": self.K, "number_of_vectors": len(self.corpus),
+                               "dimension": self.corpus.shape[1]},
+                    **result,
+                    "ingestion_docs_per_s": self.ingestion["docs_per_s"],
+                }, result["duration_s"])
+                self.assertEqual(len(self.queries), result["count"])
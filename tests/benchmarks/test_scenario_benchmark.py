@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+from tests.benchmarks import scenario_runner
+from tests.benchmarks.benchmark_case import MarqoBenchmarkCase
+
+
+@pytest.mark.fixed
+@pytest.mark.benchmark
+class TestScenarioBenchmark(MarqoBenchmarkCase):
+    """Runs every workload scenario in tests/benchmarks/scenarios (see scenario_runner.py). Scenario files that
+    need PyYAML are skipped when it is not installed."""
+    benchmark_name = "scenarios"
+    # Multiplies the duration of every phase, e.g. 0.1 for a quick run
+    DURATION_SCALE = float(os.environ.get("MARQO_API_TESTS_SCENARIO_DURATION_SCALE", 1))
+
+    def test_scenarios(self):
+        for file_name in sorted(os.listdir(scenario_runner.SCENARIOS_DIR)):
+            with self.subTest(file_name):
+                try:
+                    scenario = scenario_runner.load_scenario(os.path.join(scenario_runner.SCENARIOS_DIR, file_name))
+                except ImportError as e:
+                    self.skipTest(str(e))
+                result = scenario_runner.run_scenario(scenario, self._MARQO_URL, duration_scale=self.DURATION_SCALE)
+                # The phases ran one after another, so each ended when the later phases started
+                ended_s_ago = sum(phase["duration_s"] for phase in result["phases"])
+                for phase in result["phases"]:
+                    ended_s_ago -= phase["duration_s"]
+                    self.record_result({**phase, "name": f"{scenario['name']}_{phase['name']}",
+                                        "params": {"scenario": scenario["name"], "workers": result["workers"],
+                                                   "duration_scale": self.DURATION_SCALE, **phase["params"]}},
+                                       phase["duration_s"], ended_s_ago)
+                    self.assertEqual(0, phase["errors"], phase["error_samples"])
@@ -0,0 +1,91 @@
+import itertools
+import os
+import random
+
+import pytest
+
+from tests.benchmarks.benchmark_case import MarqoBenchmarkCase, WORDS
+
+_FRUITS = ["apple", "banana", "orange", "grape", "cherry"]
+_QUERIES = ["what is best to wear on the moon", "rocket launch mission", "examples of leadership",
+            "newspaper editor", "mountain river forest"]
+
+
+def generate_documents(number_of_documents: int, seed: int = 1):
+    rng = random.Random(seed)
+    return [{
+        "_id": str(i),
+        "field_a": " ".join(rng.choices(WORDS, k=12)),
+        "field_b": " ".join(rng.choices(WORDS, k=30)),
+        "str_for_filtering": rng.choice(_FRUITS),
+        "int_for_filtering": rng.randint(0, 9),
+    } for i in range(number_of_documents)]
+
+
+@pytest.mark.fixed
+@pytest.mark.benchmark
+class TestSearchLatencyBenchmark(MarqoBenchmarkCase):
+    """Measures search latency and throughput for TENSOR and LEXICAL search, with and without filtering,
+    searchable attributes and pagination. The indexes are the ones used by the functional search tests."""
+    benchmark_name = "search_latency"
+    NUMBER_OF_DOCUMENTS = int(os.environ.get("MARQO_API_TESTS_BENCHMARK_DOCS", 1000))
+
+    pooled_indexes = {
+        "structured_index_name": {
+            "type": "structured",
+            "model": "sentence-transformers/all-MiniLM-L6-v2",
+            "allFields": [
+                {"name": "field_a", "type": "text", "features": ["filter", "lexical_search"]},
+                {"name": "field_b", "type": "text", "features": ["filter"]},
+                {"name": "str_for_filtering", "type": "text", "features": ["filter"]},
+                {"name": "int_for_filtering", "type": "int", "features": ["filter"]},
+            ],
+            "tensorFields": ["field_a", "field_b"],
+        },
+        "unstructured_index_name": {
+            "type": "unstructured",
+            "model": "sentence-transformers/all-MiniLM-L6-v2",
+        }
+    }
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.clear_indexes(cls.leased_indexes)
+        documents = generate_documents(cls.NUMBER_OF_DOCUMENTS)
+        cls.client.index(cls.structured_index_name).add_documents(documents, client_batch_size=64)
+        cls.client.index(cls.unstructured_index_name).add_documents(
+            documents, client_batch_size=64, tensor_fields=["field_a", "field_b"])
+
+    def run_search_cases(self, index_name: str, index_type: str, cases: dict):
+        index = self.client.index(index_name)
+        for search_method, (case_name, search_kwargs) in itertools.product(
+                ["TENSOR", "LEXICAL"], cases.items()):
+            with self.subTest(f"{index_type} {search_method} {case_name}"):
+                queries = itertools.cycle(_QUERIES)
+                result = self.measure(
+                    name=f"{index_type}_{search_method.lower()}_{case_name}",
+                    params={"index_type": index_type, "search_method": search_method, "case": case_name,
+                            "number_of_documents": self.NUMBER_OF_DOCUMENTS, **search_kwargs},
+                    operation=lambda: index.search(
+                        next(queries), search_method=search_method, **search_kwargs)
+                )
+                self.assertEqual(self.ITERATIONS, result["count"])
+
+    def test_structured_search_latency(self):
+        self.run_search_cases(self.structured_index_name, "structured", {
+            "plain": {},
+            "filter_string": {"filter_string": "str_for_filtering:apple AND int_for_filtering:1"},
+            "searchable_attributes": {"searchable_attributes": ["field_a"]},
+            "limit_50": {"limit": 50},
+            "offset_20": {"limit": 10, "offset": 20},
+        })
+
+    def test_unstructured_search_latency(self):
+        # Unstructured indexes do not support searchable_attributes
+        self.run_search_cases(self.unstructured_index_name, "unstructured", {
+            "plain": {},
+            "filter_string": {"filter_string": "str_for_filtering:apple AND int_for_filtering:1"},
+            "limit_50": {"limit": 50},
+            "offset_20": {"limit": 10, "offset": 20},
+        })
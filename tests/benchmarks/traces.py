@@ -0,0 +1,307 @@
+"""Records the HTTP requests a test session sends to Marqo, and replays them as a load test.
+
+TraceRecorder writes one JSON line per request: its offset from the start of the recording, method, path (relative
+to the Marqo URL), index, body, response status and latency. It wraps `requests.Session.request`, which both the
+marqo client (through `marqo._httprequests.HttpRequests`) and the harness session use, so the index lifecycle calls
+made by MarqoTestCase are recorded as well as the client calls. Record a test run with:
+
+    pytest --record-trace requests_trace.jsonl tests/api_tests/...
+
+TraceReplayer sends a trace to a Marqo instance again at its recorded pace (speed 1), N times faster (speed N) or
+as fast as possible (speed 0). A request waits for the previous request on each index it touches, so that e.g. a
+search still follows the add_documents it depended on, and requests on different indexes run in parallel. The
+report compares the replayed status codes and latencies with the recording, overall and per endpoint:
+
+    python -m tests.benchmarks.traces requests_trace.jsonl --url http://localhost:8882 --speed 2
+
+The command line reads the trace through a JsonlFile, so a large trace is not loaded into memory, and `--shard K/N`
+splits it over N replay processes. A shard waits for the recorded time of its first request, so shards started
+together replay the whole trace at its pace; only requests in the same shard wait for each other.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+from unittest import mock
+
+import requests
+
+from tests.benchmarks.jsonl_reader import JsonlFile
+from tests.benchmarks.load_generator import LatencyHistogram
+from tests.endpoints import endpoint_of, index_of
+
+
+def _parse_body(body: Any) -> Any:
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", errors="replace")
+    if isinstance(body, str):
+        try:
+            return json.loads(body)
+        except json.JSONDecodeError:
+            return body
+    return body
+
+
+class TraceRecorder:
+    """Writes every HTTP request sent through `requests` to a JSONL trace file while installed.
+
+    Args:
+        path: the trace file to write
+        base_url: only requests to this URL are recorded, with their path relative to it
+    """
+
+    def __init__(self, path: str, base_url: str):
+        self.path = path
+        self.base_url = base_url.rstrip("/")
+        self.records = 0
+        self._file = None
+        self._lock = threading.Lock()
+        self._start = 0.0
+        self._patch = None
+
+    def install(self) -> "TraceRecorder":
+        request = requests.Session.request
+        recorder = self
+
+        def recorded_request(session, method, url, *args, **kwargs):
+            if not str(url).startswith(recorder.base_url):
+                return request(session, method, url, *args, **kwargs)
+            start = time.perf_counter()
+            status, error = None, None
+            try:
+                response = request(session, method, url, *args, **kwargs)
+                status = response.status_code
+                return response
+            except requests.exceptions.RequestException as e:
+                error = repr(e)
+                raise
+            finally:
+                recorder.write(method, str(url), kwargs.get("data", kwargs.get("json")), start,
+                               time.perf_counter() - start, status, error)
+
+        self._file = open(self.path, "w")
+        self._start = time.perf_counter()
+        self._patch = mock.patch.object(requests.Session, "request", recorded_request)
+        self._patch.start()
+        return self
+
+    def uninstall(self) -> None:
+        if self._patch is not None:
+            self._patch.stop()
+            self._patch = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def write(self, method: str, url: str, body: Any, start: float, latency_s: float, status: Optional[int],
+              error: Optional[str]) -> None:
+        path = url[len(self.base_url):] or "/"
+        record = {
+            "t": round(start - self._start, 6),
+            "method": method.upper(),
+            "path": path,
+            "index": index_of(path.lstrip("/")),
+            "body": _parse_body(body),
+            "status": status,
+            "latency_ms": round(latency_s * 1000, 3),
+        }
+        if error is not None:
+            record["error"] = error
+        with self._lock:
+            if self._file is not None:
+                self._file.write(json.dumps(record) + "\n")
+                self._file.flush()
+                self.records += 1
+
+    def __enter__(self) -> "TraceRecorder":
+        return self.install()
+
+    def __exit__(self, *exc_info) -> None:
+        self.uninstall()
+
+
+def load_trace(path: str) -> List[Dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def indexes_of(record: Dict) -> Set[str]:
+    """The indexes a request touches, including every index of a batch create or delete, or {""} for calls
+    that are not about an index."""
+    endpoint = endpoint_of(record["path"])
+    if endpoint in ("/batch/indexes/create", "/batch/indexes/delete") and isinstance(record["body"], list):
+        names = {item.get("indexName") if isinstance(item, dict) else item for item in record["body"]}
+        return {name for name in names if isinstance(name, str)} or {""}
+    return {record["index"]}
+
+
+def _rename(value: Any, names: Dict[str, str]) -> Any:
+    if isinstance(value, str):
+        return names.get(value, value)
+    if isinstance(value, list):
+        return [_rename(item, names) for item in value]
+    if isinstance(value, dict):
+        return {key: _rename(item, names) for key, item in value.items()}
+    return value
+
+
+class TraceReplayer:
+    """Replays a recorded trace against a Marqo instance and compares it with the recording.
+
+    Args:
+        trace: the records of a trace: a list from load_trace, or a JsonlFile for traces too large to load
+        url: the Marqo URL to replay against
+        speed: 1 replays at the recorded pace, N replays N times faster and 0 as fast as possible
+        index_suffix: appended to every index name in the trace, so that a trace can be replayed next to the
+            indexes it created, or several times
+        max_workers: the maximum number of requests in flight
+    """
+
+    def __init__(self, trace: Sequence[Dict], url: str, speed: float = 1.0, index_suffix: str = "",
+                 max_workers: int = 64):
+        if speed < 0:
+            raise ValueError(f"speed must be 0 (as fast as possible) or positive, got {speed}")
+        self.trace = trace
+        self.url = url.rstrip("/")
+        self.speed = speed
+        self.max_workers = max_workers
+        self.index_names: Dict[str, str] = {}
+        if index_suffix:
+            names = set().union(*(indexes_of(record) for record in trace)) - {""}
+            self.index_names = {name: f"{name}{index_suffix}" for name in names}
+
+    def _request(self, record: Dict) -> Dict:
+        path = record["path"]
+        for name, new_name in self.index_names.items():
+            path = re.sub(rf"(?<=/indexes/){re.escape(name)}(?=[/?]|$)", new_name, path)
+        body = _rename(record["body"], self.index_names)
+        return {"method": record["method"], "url": f"{self.url}{path}",
+                "data": None if body is None else (body if isinstance(body, str) else json.dumps(body))}
+
+    def _send(self, session: requests.Session, record: Dict) -> Dict:
+        request = self._request(record)
+        start = time.perf_counter()
+        status, error = None, None
+        try:
+            status = session.request(request["method"], request["url"], data=request["data"],
+                                     headers={"Content-Type": "application/json"}).status_code
+        except requests.exceptions.RequestException as e:
+            error = repr(e)
+        return {"record": record, "status": status, "error": error,
+                "latency_ms": (time.perf_counter() - start) * 1000}
+
+    def run(self) -> Dict:
+        # One pass over the trace for the times and indexes, so that a JsonlFile trace is never loaded whole
+        times, touched = [], []
+        for record in self.trace:
+            times.append(record["t"])
+            touched.append(indexes_of(record))
+        order = sorted(range(len(times)), key=times.__getitem__)
+
+        # Each request waits for the previous request on every index it touches
+        done = [threading.Event() for _ in order]
+        last_on_index: Dict[str, int] = {}
+        dependencies: List[List[int]] = []
+        for position, i in enumerate(order):
+            dependencies.append(sorted({last_on_index[index] for index in touched[i] if index in last_on_index}))
+            last_on_index.update((index, position) for index in touched[i])
+        del touched
+
+        sessions, opened = threading.local(), []
+        replay_start = time.perf_counter()
+
+        def replay(position: int) -> Dict:
+            try:
+                for dependency in dependencies[position]:
+                    done[dependency].wait()
+                record = self.trace[order[position]]
+                if self.speed > 0:
+                    delay = replay_start + record["t"] / self.speed - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                if not hasattr(sessions, "session"):
+                    sessions.session = requests.Session()
+                    opened.append(sessions.session)
+                return self._send(sessions.session, record)
+            finally:
+                done[position].set()
+
+        # Requests are submitted in trace order, so the requests a request waits for have all been started
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(last_on_index)))) as executor:
+            report = self._report(executor.map(replay, range(len(order))))
+        report["replay_duration_s"] = round(time.perf_counter() - replay_start, 3)
+        report["recorded_duration_s"] = round(max(times, default=0) - min(times, default=0), 3)
+        report["indexes"] = len(last_on_index)
+        for session in opened:
+            session.close()
+        return report
+
+    def _report(self, results: Iterable[Dict]) -> Dict:
+        recorded, replayed = LatencyHistogram(), LatencyHistogram()
+        endpoints: Dict[str, Dict] = {}
+        mismatches = []
+        for result in results:
+            record = result["record"]
+            recorded.record(record["latency_ms"] / 1000)
+            replayed.record(result["latency_ms"] / 1000)
+            endpoint = endpoints.setdefault(f"{record['method']} {endpoint_of(record['path'])}", {
+                "recorded": LatencyHistogram(), "replayed": LatencyHistogram(), "status_mismatches": 0})
+            endpoint["recorded"].record(record["latency_ms"] / 1000)
+            endpoint["replayed"].record(result["latency_ms"] / 1000)
+            if result["status"] != record["status"]:
+                endpoint["status_mismatches"] += 1
+                mismatches.append({"method": record["method"], "path": record["path"], "t": record["t"],
+                                   "recorded_status": record["status"], "replayed_status": result["status"],
+                                   "error": result["error"]})
+        return {
+            "requests": recorded.count,
+            "speed": self.speed,
+            "status_mismatches": len(mismatches),
+            "mismatch_samples": mismatches[:10],
+            "recorded_latency_ms": recorded.summary()["latency_ms"],
+            "replayed_latency_ms": replayed.summary()["latency_ms"],
+            "endpoints": {name: {"count": endpoint["recorded"].count,
+                                 "status_mismatches": endpoint["status_mismatches"],
+                                 "recorded_latency_ms": endpoint["recorded"].summary()["latency_ms"],
+                                 "replayed_latency_ms": endpoint["replayed"].summary()["latency_ms"]}
+                          for name, endpoint in sorted(endpoints.items())},
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded Marqo request trace.")
+    parser.add_argument("trace", help="A JSONL trace written by TraceRecorder (pytest --record-trace)")
+    parser.add_argument("--url", default="http://localhost:8882")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="1 for the recorded pace, N for N times faster, 0 for as fast as possible")
+    parser.add_argument("--index-suffix", default="", help="Appended to every index name in the trace")
+    parser.add_argument("--shard", help="K/N: replay only the K-th (from 1) of N contiguous shards of the trace, "
+                                            "to split a large trace over N replay processes")
+    parser.add_argument("--output", help="Write the full JSON report to this file")
+    args = parser.parse_args()
+
+    with JsonlFile(args.trace) as trace_file:
+        trace = trace_file.lines(0, len(trace_file))
+        if args.shard:
+            shard, shards = (int(part) for part in args.shard.split("/"))
+            if not 1 <= shard <= shards:
+                parser.error(f"--shard must be K/N with 1 <= K <= N, got {args.shard}")
+            trace = trace_file.lines(*trace_file.shards(shards)[shard - 1])
+        report = TraceReplayer(trace, args.url, speed=args.speed, index_suffix=args.index_suffix).run()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(f"Replayed {report['requests']} requests on {report['indexes']} indexes in "
+          f"{report['replay_duration_s']}s (recorded: {report['recorded_duration_s']}s), "
+          f"{report['status_mismatches']} status mismatches")
+    for name, endpoint in report["endpoints"].items():
+        print(f"  {name}: {endpoint['count']} requests, p50 {endpoint['recorded_latency_ms'].get('p50')} -> "
+              f"{endpoint['replayed_latency_ms'].get('p50')} ms, p99 {endpoint['recorded_latency_ms'].get('p99')} "
+              f"-> {endpoint['replayed_latency_ms'].get('p99')} ms, {endpoint['status_mismatches']} mismatches")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,109 @@
-import pytest
+import json
 import os
+import warnings
+
+import pytest
+
+from tests import model_affinity
+
+# The estimated model loads before and after reordering, set when --model-affinity-order is used
+_model_affinity_report = {}
+# The stand-in server started when TESTING_CONFIGURATION=STANDIN_MARQO
+_standin_server = None
+# The request trace recorder installed by --record-trace
+_trace_recorder = None
+# The resource sampler started by --sample-resources, and the change in Marqo's memory during each test
+_resource_sampler = None
+_memory_increase_by_test = {}
+
+
+def pytest_addoption(parser):
+    parser.addoption("--no-index-provisioning", action="store_true", default=False,
+                     help="Do not create the pooled indexes of all collected test classes before the first test. "
+                          "Each class then creates its missing pooled indexes in setUpClass.")
+    parser.addoption("--index-provisioning-batch-size", action="store", type=int, default=10,
+                     help="The maximum number of indexes created in one batch call when provisioning.")
+    parser.addoption("--model-affinity-order", action="store_true", default=False,
+                     help="Reorder test classes so that classes using the same models run next to each other.")
+    parser.addoption("--model-cache-size", action="store", type=int, default=2,
+                     help="The number of models Marqo is estimated to keep in memory, for --model-affinity-order.")
+    parser.addoption("--run-benchmarks", action="store_true", default=False,
+                     help="Run the benchmarks in tests/benchmarks. They are skipped otherwise.")
+    parser.addoption("--record-trace", action="store", default=None, metavar="PATH",
+                     help="Record every request sent to Marqo to a JSONL trace, which can be replayed with "
+                          "python -m tests.benchmarks.traces.")
+    parser.addoption("--http-accounting", action="store_true", default=False,
+                     help="Account the HTTP calls, bytes and time of every test to its setup, call and teardown, "
+                          "and print the tests with the most HTTP time.")
+    parser.addoption("--http-accounting-top", action="store", type=int, default=10,
+                     help="The number of tests and repeated endpoints printed by --http-accounting.")
+    parser.addoption("--http-accounting-output", action="store", default=None, metavar="PATH",
+                     help="With --http-accounting, write the accounting of every test to this JSON file.")
+    parser.addoption("--sample-resources", action="store_true", default=False,
+                     help="Sample Marqo's CPU, memory and loaded models (and docker stats of the marqo and vespa "
+                          "containers) in the background, and attach a summary to every test and benchmark case.")
+    parser.addoption("--resource-sample-interval", action="store", type=float,
+                     default=float(os.environ.get("MARQO_API_TESTS_RESOURCE_SAMPLE_INTERVAL", 1.0)),
+                     help="The time between two resource samples, in seconds.")
+    parser.addoption("--resource-samples-output", action="store", default=None, metavar="PATH",
+                     help="With --sample-resources, write the resource series of every test to this JSONL file.")
 
 
 def pytest_configure(config):
     config.addinivalue_line("markers", "cuda_test: mark test as cuda_test to skip")
     config.addinivalue_line("markers", "cpu_only_test: mark test as cpu_only_test to skip")
     config.addinivalue_line("markers", "fixed: mark test to run as part of fixed tests")
+    config.addinivalue_line("markers", "benchmark: mark test as a benchmark, only run with --run-benchmarks")
+
+    if os.environ.get("TESTING_CONFIGURATION") == "STANDIN_MARQO":
+        # Run the suite against the in-process stand-in instead of a Marqo container
+        from tests.marqo_standin import StandinMarqoServer
+        from tests.marqo_test import MarqoTestCase
+
+        global _standin_server
+        _standin_server = StandinMarqoServer(port=int(os.environ.get("MARQO_API_TESTS_STANDIN_PORT", 0))).start()
+        MarqoTestCase._MARQO_URL = _standin_server.url
 
+    if config.getoption("--record-trace"):
+        from tests.benchmarks.traces import TraceRecorder
+        from tests.marqo_test import MarqoTestCase
 
-def pytest_collection_modifyitems(items):
+        global _trace_recorder
+        _trace_recorder = TraceRecorder(config.getoption("--record-trace"), MarqoTestCase._MARQO_URL).install()
+
+    if config.getoption("--http-accounting"):
+        from tests.http_accounting import HttpAccounting
+        from tests.marqo_test import MarqoTestCase
+
+        config.pluginmanager.register(HttpAccounting(
+            MarqoTestCase._MARQO_URL, top=config.getoption("--http-accounting-top"),
+            output=config.getoption("--http-accounting-output")).install(), "http_accounting")
+
+    if config.getoption("--sample-resources"):
+        from tests.marqo_test import MarqoTestCase
+        from tests.resource_sampler import ResourceSampler
+
+        global _resource_sampler
+        _resource_sampler = ResourceSampler(MarqoTestCase._MARQO_URL,
+                                            interval_s=config.getoption("--resource-sample-interval")).start()
+        MarqoTestCase._resource_sampler = _resource_sampler
+
+
+def pytest_unconfigure(config):
+    http_accounting = config.pluginmanager.get_plugin("http_accounting")
+    if http_accounting is not None:
+        # Before the trace recorder, as both patch requests.Session.request
+        http_accounting.uninstall()
+    if _resource_sampler is not None:
+        _resource_sampler.stop()
+    if _trace_recorder is not None:
+        # After pytest_sessionfinish, so that the deletion of the pooled indexes is recorded too
+        _trace_recorder.uninstall()
+    if _standin_server is not None:
+        _standin_server.stop()
+
+
+def pytest_collection_modifyitems(config, items):
     # TODO Remove this
     if not os.environ.get("TESTING_CONFIGURATION"):
         os.environ["TESTING_CONFIGURATION"] = "CUSTOM"
@@ -30,4 +125,116 @@ def pytest_collection_modifyitems(items):
 
     for item in items:
         if "fixed" not in item.keywords:
-            item.add_marker(pytest.mark.skip(reason="not marked as fixed"))
\ No newline at end of file
+            item.add_marker(pytest.mark.skip(reason="not marked as fixed"))
+
+    if not config.getoption("--run-benchmarks"):
+        skip_benchmark = pytest.mark.skip(reason="need --run-benchmarks option to run")
+        for item in items:
+            if "benchmark" in item.keywords:
+                item.add_marker(skip_benchmark)
+
+    if config.getoption("--model-affinity-order"):
+        from tests.marqo_test import MarqoTestCase
+
+        def is_skipped(item):
+            return item.get_closest_marker("skip") is not None
+
+        items[:], loads_before, loads_after = model_affinity.reorder_items(
+            items, cache_size=config.getoption("--model-cache-size"), is_skipped=is_skipped
+        )
+        _model_affinity_report.update(loads_before=loads_before, loads_after=loads_after)
+        # Each class leaves the models of the next class loaded, instead of ejecting every model
+        for test_class, models in model_affinity.models_to_keep(items, is_skipped).items():
+            if issubclass(test_class, MarqoTestCase):
+                test_class._models_to_keep = models
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    """Attaches the resources sampled during a test (setup, call and teardown) to its report."""
+    if _resource_sampler is None:
+        yield
+        return
+    # Sampled at the boundaries too, so that a test shorter than the interval still has a before and after
+    _resource_sampler.sample_marqo()
+    start = _resource_sampler.now()
+    yield
+    _resource_sampler.sample_marqo()
+    end = _resource_sampler.now()
+    summary = _resource_sampler.summarize(start, end)
+    item.user_properties.append(("resources", summary))
+    memory = summary.get("marqo_memory_gb")
+    if memory is not None:
+        _memory_increase_by_test[item.nodeid] = round(memory["peak"] - memory.get("before", memory["first"]), 3)
+    output = item.config.getoption("--resource-samples-output")
+    if output:
+        with open(output, "a") as f:
+            f.write(json.dumps({"test": item.nodeid, "summary": summary,
+                                "series": _resource_sampler.series(start, end)}) + "\n")
+
+
+def pytest_collection_finish(session):
+    """Creates the pooled indexes declared by every test class that will run, in a few batch calls."""
+    from tests.marqo_test import MarqoTestCase
+
+    if session.config.option.collectonly or session.config.getoption("--no-index-provisioning"):
+        return
+
+    classes_to_run = []
+    for item in session.items:
+        test_class = getattr(item, "cls", None)
+        if test_class is None or not issubclass(test_class, MarqoTestCase) or not test_class.pooled_indexes:
+            continue
+        if item.get_closest_marker("skip") is not None or test_class in classes_to_run:
+            continue
+        classes_to_run.append(test_class)
+
+    if not classes_to_run:
+        return
+
+    try:
+        created = MarqoTestCase.get_index_pool().provision(
+            [list(test_class.pooled_indexes.values()) for test_class in classes_to_run],
+            batch_size=session.config.getoption("--index-provisioning-batch-size")
+        )
+    except Exception as e:
+        # Not fatal: classes create their missing pooled indexes when they lease them
+        warnings.warn(f"Failed to provision the pooled indexes up front: {e}")
+        return
+    terminalreporter = session.config.pluginmanager.get_plugin("terminalreporter")
+    if terminalreporter is not None:
+        terminalreporter.write_line(f"Provisioned {len(created)} pooled indexes for {len(classes_to_run)} test classes")
+
+
+def pytest_terminal_summary(terminalreporter):
+    from tests.marqo_test import MarqoTestCase
+
+    if MarqoTestCase._session is not None:
+        stats = MarqoTestCase._session.connection_stats()
+        terminalreporter.write_line(
+            f"Harness HTTP session: {stats['requests_sent']} requests, "
+            f"{stats['connections_opened']} connections opened, {stats['connections_reused']} reused"
+        )
+    if _model_affinity_report:
+        terminalreporter.write_line(
+            f"Model-affinity order: estimated model loads {_model_affinity_report['loads_before']} -> "
+            f"{_model_affinity_report['loads_after']} "
+            f"({_model_affinity_report['loads_before'] - _model_affinity_report['loads_after']} saved)"
+        )
+    if _memory_increase_by_test:
+        terminalreporter.write_line("Largest increases of Marqo's memory (peak - before, GB) during a test:")
+        for nodeid, increase in sorted(_memory_increase_by_test.items(), key=lambda item: -item[1])[:10]:
+            terminalreporter.write_line(f"  {increase:+.3f} {nodeid}")
+    if _trace_recorder is not None:
+        terminalreporter.write_line(f"Recorded {_trace_recorder.records} requests to {_trace_recorder.path}")
+
+
+def pytest_sessionfinish(session):
+    from tests.marqo_test import MarqoTestCase
+
+    if MarqoTestCase._index_pool is not None:
+        # Pooled indexes outlive the test classes that lease them, so they are deleted once at the end
+        try:
+            MarqoTestCase._index_pool.delete_all()
+        except Exception as e:
+            warnings.warn(f"Failed to delete the pooled indexes: {e}")
@@ -0,0 +1,157 @@
+"""Generates schema-valid documents for a structured index from its `allFields`, in vectorised numpy batches.
+
+    generator = CorpusGenerator(index_settings["allFields"], seed=1)
+    documents = generator.generate(1000)
+    generator.write_jsonl("corpus.jsonl", 1_000_000)
+
+Each field is generated as a numpy column for a whole batch and the batch is then zipped into dicts, so millions of
+documents take seconds rather than minutes. Text is drawn from a bundled vocabulary (data/vocabulary.txt, ordered
+from the most to the least frequent word) with Zipfian word frequencies, so that term frequencies look like natural
+text to BM25 and to filters. Supported field types are text, int, long, float, double, bool, array<text|int|long|
+float|double>, image_pointer and custom_vector; multimodal_combination fields are built by Marqo from their
+dependent fields and are skipped.
+
+field_options tunes a field's values:
+    text and array<text>: "words", the number of words per value, an int or a [min, max] range (default [5, 30])
+    numbers: "min" and "max" (defaults depend on the type)
+    arrays: "length", the number of values, an int or a [min, max] range (default [1, 5])
+    image_pointer: "urls", the image URLs to pick from
+    custom_vector: "dimension" (required)
+"""
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+VOCABULARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "vocabulary.txt")
+IMAGE_URLS = (
+    "https://marqo-assets.s3.amazonaws.com/tests/images/ai_hippo_realistic.png",
+    "https://marqo-assets.s3.amazonaws.com/tests/images/ai_hippo_statue.png",
+)
+SCALAR_TYPES = ("text", "int", "long", "float", "double", "bool")
+FIELD_TYPES = SCALAR_TYPES + tuple(f"array<{t}>" for t in ("text", "int", "long", "float", "double")) + (
+    "image_pointer", "custom_vector", "multimodal_combination")
+# The default [min, max] of generated numbers. Floats are kept within float32, which is how Marqo stores them.
+_NUMBER_RANGES = {"int": (0, 10_000), "long": (0, 2 ** 53), "float": (0.0, 1000.0), "double": (0.0, 1e9)}
+
+
+def load_vocabulary(path: str = VOCABULARY_PATH) -> List[str]:
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def zipf_probabilities(size: int, exponent: float = 1.07) -> np.ndarray:
+    """The probability of each rank (from the most frequent) under Zipf's law."""
+    weights = 1.0 / np.arange(1, size + 1, dtype=np.float64) ** exponent
+    return weights / weights.sum()
+
+
+def _range(value: Union[int, Sequence[int]]) -> Tuple[int, int]:
+    return (value, value) if isinstance(value, int) else (int(value[0]), int(value[1]))
+
+
+class CorpusGenerator:
+    """Generates documents matching a structured index's allFields.
+
+    Args:
+        all_fields: the index's allFields
+        seed: the seed of the random generator. The same seed and batch sizes give the same documents.
+        field_options: options per field name (see the module docstring)
+        vocabulary: the words of text fields, from the most to the least frequent. Defaults to the bundled one.
+        zipf_exponent: the exponent of the Zipfian word frequencies
+        id_prefix: document ids are id_prefix followed by the document's position in the corpus
+    """
+
+    def __init__(self, all_fields: List[Dict], seed: int = 0, field_options: Optional[Dict[str, Dict]] = None,
+                 vocabulary: Optional[Sequence[str]] = None, zipf_exponent: float = 1.07, id_prefix: str = "doc_"):
+        self.field_options = field_options or {}
+        self.fields = []
+        for field in all_fields:
+            if field.get("type") not in FIELD_TYPES:
+                raise ValueError(f"Field `{field.get('name')}` has unsupported type `{field.get('type')}`, expected "
+                                 f"one of {FIELD_TYPES}")
+            if field["type"] == "multimodal_combination":
+                continue
+            if field["type"] == "custom_vector" and "dimension" not in self.field_options.get(field["name"], {}):
+                raise ValueError(f"Custom vector field `{field['name']}` needs a `dimension` in field_options")
+            self.fields.append(field)
+        self.vocabulary = np.asarray(vocabulary if vocabulary is not None else load_vocabulary(), dtype=object)
+        self._cumulative = np.cumsum(zipf_probabilities(len(self.vocabulary), zipf_exponent))
+        self.rng = np.random.default_rng(seed)
+        self.id_prefix = id_prefix
+        self.generated = 0
+
+    def _words(self, count: int) -> np.ndarray:
+        # Inverse transform sampling, much faster than rng.choice with p= for large counts
+        ranks = np.searchsorted(self._cumulative, self.rng.random(count) * self._cumulative[-1], side="right")
+        return self.vocabulary[np.minimum(ranks, len(self.vocabulary) - 1)]
+
+    def _lengths(self, count: int, value_range: Tuple[int, int]) -> np.ndarray:
+        return self.rng.integers(value_range[0], value_range[1] + 1, count)
+
+    def _texts(self, count: int, options: Dict) -> List[str]:
+        lengths = self._lengths(count, _range(options.get("words", (5, 30))))
+        words = self._words(int(lengths.sum())).tolist()
+        # Slicing a list is about three times faster than np.split into many small arrays
+        bounds = np.concatenate([[0], np.cumsum(lengths)]).tolist()
+        return [" ".join(words[bounds[i]:bounds[i + 1]]) for i in range(count)]
+
+    def _numbers(self, count: int, number_type: str, options: Dict) -> List:
+        low = options.get("min", _NUMBER_RANGES[number_type][0])
+        high = options.get("max", _NUMBER_RANGES[number_type][1])
+        if number_type in ("int", "long"):
+            return self.rng.integers(low, high, count, endpoint=True, dtype=np.int64).tolist()
+        values = self.rng.uniform(low, high, count)
+        if number_type == "float":
+            values = values.astype(np.float32).astype(np.float64)
+        return values.tolist()
+
+    def _scalars(self, count: int, value_type: str, options: Dict) -> List:
+        if value_type == "text":
+            return self._texts(count, options)
+        if value_type == "bool":
+            return (self.rng.random(count) < 0.5).tolist()
+        return self._numbers(count, value_type, options)
+
+    def _column(self, field: Dict, count: int) -> List:
+        field_type, options = field["type"], self.field_options.get(field["name"], {})
+        if field_type in SCALAR_TYPES:
+            return self._scalars(count, field_type, options)
+        if field_type.startswith("array<"):
+            lengths = self._lengths(count, _range(options.get("length", (1, 5))))
+            values = self._scalars(int(lengths.sum()), field_type[len("array<"):-1], options)
+            bounds = np.concatenate([[0], np.cumsum(lengths)]).tolist()
+            return [values[bounds[i]:bounds[i + 1]] for i in range(count)]
+        if field_type == "image_pointer":
+            urls = np.asarray(options.get("urls", IMAGE_URLS), dtype=object)
+            return urls[self.rng.integers(0, len(urls), count)].tolist()
+        # custom_vector
+        vectors = self.rng.standard_normal((count, options["dimension"]), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        contents = self._texts(count, {"words": options.get("words", (3, 10))})
+        return [{"content": content, "vector": vector} for content, vector in zip(contents, vectors.tolist())]
+
+    def generate(self, count: int) -> List[Dict]:
+        """Generates the next count documents."""
+        columns = {field["name"]: self._column(field, count) for field in self.fields}
+        documents = [{"_id": f"{self.id_prefix}{self.generated + i}"} for i in range(count)]
+        for name, column in columns.items():
+            for document, value in zip(documents, column):
+                document[name] = value
+        self.generated += count
+        return documents
+
+    def batches(self, total: int, batch_size: int = 10_000) -> Iterator[List[Dict]]:
+        """Generates total documents in batches of batch_size."""
+        for start in range(0, total, batch_size):
+            yield self.generate(min(batch_size, total - start))
+
+    def write_jsonl(self, path: str, total: int, batch_size: int = 10_000) -> int:
+        """Writes total documents to a JSONL file, one document per line, and returns the number written."""
+        written = 0
+        with open(path, "w") as f:
+            for batch in self.batches(total, batch_size):
+                f.write("".join(json.dumps(document) + "\n" for document in batch))
+                written += len(batch)
+        return written
@@ -0,0 +1,57 @@
+"""Tracks which indexes may hold documents, so that clearing an index that is already empty can be skipped.
+
+`MarqoTestCase.setUp` clears the indexes of a test class before every test. Many tests only read, so the
+indexes are often still empty. `DirtyIndexTracker` wraps the client's write calls (`add_documents`,
+`update_documents`, `delete_documents`) and marks the index they write to as dirty. An index is only known
+to be clean after it has been created or cleared by the harness; any other index is treated as dirty.
+
+Writes that do not go through the client (e.g. a raw `requests.post` to the documents endpoint) are not
+seen by the tracker. Tests that do this should call `mark_dirty` for the index they write to.
+"""
+import functools
+import threading
+from typing import Callable, Iterable
+
+from marqo.index import Index
+
+
+class DirtyIndexTracker:
+    WRITE_METHODS = ("add_documents", "update_documents", "delete_documents")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clean: set = set()
+        self._originals = {}
+
+    def mark_dirty(self, index_name: str) -> None:
+        with self._lock:
+            self._clean.discard(index_name)
+
+    def mark_clean(self, index_names: Iterable[str]) -> None:
+        with self._lock:
+            self._clean.update(index_names)
+
+    def is_clean(self, index_name: str) -> bool:
+        with self._lock:
+            return index_name in self._clean
+
+    def _tracked(self, method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(index: Index, *args, **kwargs):
+            # Marked before the call, as a failed or partial write may still have changed the index
+            self.mark_dirty(index.index_name)
+            return method(index, *args, **kwargs)
+        return wrapper
+
+    def install(self) -> None:
+        """Wraps the client's write calls. Calling it again has no effect."""
+        if self._originals:
+            return
+        for method_name in self.WRITE_METHODS:
+            self._originals[method_name] = getattr(Index, method_name)
+            setattr(Index, method_name, self._tracked(self._originals[method_name]))
+
+    def uninstall(self) -> None:
+        for method_name, original in self._originals.items():
+            setattr(Index, method_name, original)
+        self._originals = {}
@@ -0,0 +1,18 @@
+"""Groups Marqo request paths by endpoint, for the harness's HTTP accounting and the benchmarks' traces."""
+import re
+from urllib.parse import urlsplit
+
+_INDEX_PATH = re.compile(r"^/?indexes/(?!bulk(?:/|$))([^/?]+)")
+
+
+def index_of(path: str) -> str:
+    """The index a request path is about, or "" for calls that are not about one index."""
+    match = _INDEX_PATH.match(path)
+    return match.group(1) if match else ""
+
+
+def endpoint_of(path: str) -> str:
+    """The path with the index name and document id replaced by placeholders, for grouping requests."""
+    path = urlsplit(path).path
+    path = _INDEX_PATH.sub("/indexes/{index}", path if path.startswith("/") else f"/{path}")
+    return re.sub(r"^(/indexes/\{index}/documents/)(?!delete-batch$|delete-all$|update$)[^/]+$", r"\1{id}", path)
@@ -0,0 +1,116 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from tests.benchmarks.ann_sweep import AnnSweep, format_table, main, pareto_frontier
+from tests.marqo_standin import StandinError, StandinMarqoServer
+
+
+@pytest.mark.fixed
+class TestAnnSweep(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StandinMarqoServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.corpus = rng.standard_normal((300, 8)).astype(np.float32)
+        self.queries = rng.standard_normal((20, 8)).astype(np.float32)
+
+    def test_pareto_frontier(self):
+        points = [
+            {"recall": 0.9, "latency_p50_ms": 2.0},
+            {"recall": 0.95, "latency_p50_ms": 3.0},
+            {"recall": 0.9, "latency_p50_ms": 2.5},  # dominated by the first
+            {"recall": 0.99, "latency_p50_ms": 3.0},  # dominates the second
+            {"recall": 0.8, "latency_p50_ms": 2.0},  # dominated by the first
+        ]
+        objectives = {"recall": "max", "latency_p50_ms": "min"}
+        self.assertEqual([0, 3], pareto_frontier(points, objectives))
+        # Equal points do not dominate each other
+        self.assertEqual([0, 1], pareto_frontier([points[0], dict(points[0])], objectives))
+        # Objectives without a value for every point are ignored
+        self.assertEqual([0, 3], pareto_frontier([{**point, "memory_gb": None} for point in points]))
+        # Points are compared on the objectives both have values for, so a point without memory (e.g. a reused
+        # index) does not remove memory from the comparison of the others
+        with_memory = [{**point, "memory_gb": memory} for point, memory in zip(points, [1.0, 0.5, 2.0, 1.0, 0.2])]
+        objectives["memory_gb"] = "min"
+        self.assertEqual([0, 1, 3, 4], pareto_frontier(with_memory, objectives))
+        with_memory[4]["memory_gb"] = None
+        self.assertEqual([0, 1, 3], pareto_frontier(with_memory, objectives))
+        self.assertEqual([], pareto_frontier([]))
+
+    def sweep(self, **kwargs):
+        return AnnSweep(self.server.url, self.corpus, self.queries, m=[8, 16], ef_construction=[64],
+                        ef_search=[10, 40], k=5, use_docker=False, **kwargs)
+
+    def test_sweeps_every_configuration(self):
+        cases = self.sweep().run()
+
+        self.assertEqual(["m8_efc64_ef10", "m8_efc64_ef40", "m16_efc64_ef10", "m16_efc64_ef40"],
+                         [case["name"] for case in cases])
+        for case in cases:
+            self.assertEqual(1.0, case["recall"])
+            self.assertFalse(case["reused"])
+            self.assertGreater(case["ingest_s"], 0)
+            self.assertIn("marqo_memory_gb", case["memory"])
+            self.assertEqual(20, case["count"])
+        self.assertEqual({"m": 16, "ef_construction": 64, "ef_search": 40, "k": 5, "number_of_vectors": 300,
+                          "space_type": "prenormalized-angular"}, cases[-1]["params"])
+        self.assertTrue(any(case["pareto"] for case in cases))
+        # The indexes are deleted after the sweep
+        self.assertEqual({}, self.server.marqo.indexes)
+
+        table = format_table(cases).splitlines()
+        self.assertEqual(5, len(table))
+        self.assertEqual(["m", "ef_construction", "ef_search", "recall", "latency_p50_ms", "latency_p99_ms",
+                          "ingest_s", "memory_gb"], table[0].split())
+        self.assertTrue(table[1].startswith("*"))
+
+    def test_reuses_filled_indexes(self):
+        self.sweep(keep_indexes=True).run()
+        self.addCleanup(self.server.marqo.indexes.clear)
+        with mock.patch("tests.benchmarks.recall.RecallEvaluator.ingest") as ingest:
+            cases = self.sweep(reuse=True).run()
+        ingest.assert_not_called()
+        self.assertTrue(all(case["reused"] and case["recall"] == 1.0 for case in cases))
+
+    def test_reports_rejected_configurations(self):
+        handle = self.server.marqo.handle
+
+        def limited_handle(method, path, query, body):
+            # Marqo's default MARQO_EF_CONSTRUCTION_MAX_VALUE
+            if method == "POST" and "m16" in path and body["annParameters"]["parameters"]["efConstruction"] > 4096:
+                raise StandinError(400, "invalid_argument", "efConstruction must be at most 4096")
+            return handle(method, path, query, body)
+
+        with mock.patch.object(self.server.marqo, "handle", limited_handle):
+            cases = AnnSweep(self.server.url, self.corpus, self.queries, m=[8, 16], ef_construction=[5000],
+                             ef_search=[10], k=5, use_docker=False).run()
+
+        self.assertNotIn("error", cases[0])
+        self.assertTrue(cases[0]["pareto"])
+        self.assertIn("efConstruction must be at most 4096", cases[1]["error"])
+        self.assertNotIn("pareto", cases[1])
+        self.assertIn("error: ", format_table(cases).splitlines()[2])
+        self.assertEqual({}, self.server.marqo.indexes)
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.dict(os.environ, {"MARQO_API_TESTS_BENCHMARK_DIR": directory}):
+            output = os.path.join(directory, "sweep.json")
+            self.assertEqual(0, main(["--url", self.server.url, "--generate", "200,10,8", "--m", "8",
+                                      "--ef-construction", "32", "--ef-search", "10,20", "--output", output]))
+            with open(output) as f:
+                self.assertEqual(2, len(json.load(f)))
+            self.assertTrue(any(name.startswith("ann_sweep_") for name in os.listdir(directory)))
@@ -0,0 +1,40 @@
+import threading
+import unittest
+
+import pytest
+
+from tests.benchmarks.benchmark_case import MarqoBenchmarkCase
+
+
+@pytest.mark.fixed
+class TestMeasureConcurrent(unittest.TestCase):
+
+    def setUp(self):
+        self.benchmark = MarqoBenchmarkCase()
+        self.benchmark.benchmark_results = []
+
+    def test_every_thread_runs_its_iterations(self):
+        lock = threading.Lock()
+        calls = []
+
+        def operation(thread_index):
+            with lock:
+                calls.append(thread_index)
+
+        result = self.benchmark.measure_concurrent("case", {"selection": "uniform"}, operation, threads=4,
+                                                   iterations_per_thread=5, warmup_iterations=2,
+                                                   items_per_operation=16)
+
+        self.assertEqual(22, len(calls))
+        self.assertEqual([0, 0], calls[:2])
+        self.assertEqual({0: 7, 1: 5, 2: 5, 3: 5}, {i: calls.count(i) for i in range(4)})
+        self.assertEqual(20, result["count"])
+        self.assertEqual(320, result["items"])
+        self.assertEqual({"threads": 4, "selection": "uniform"}, result["params"])
+        self.assertEqual([result], self.benchmark.benchmark_results)
+
+    def test_record_result(self):
+        result = self.benchmark.record_result({"name": "ef_search_10", "params": {"ef_search": 10}, "recall": 0.9},
+                                              duration_s=1.5)
+        self.assertEqual([result], self.benchmark.benchmark_results)
+        self.assertEqual(0.9, result["recall"])
@@ -0,0 +1,44 @@
+import json
+import os
+import tempfile
+import unittest
+
+import pytest
+
+from tests.benchmarks import reporting
+
+
+@pytest.mark.fixed
+class TestBenchmarkReporting(unittest.TestCase):
+
+    def test_summarize_latencies(self):
+        summary = reporting.summarize_latencies([i / 1000 for i in range(1, 101)], duration_s=2.0)
+        self.assertEqual(100, summary["count"])
+        self.assertEqual(50.0, summary["throughput_per_s"])
+        self.assertAlmostEqual(50.5, summary["latency_ms"]["p50"])
+        self.assertAlmostEqual(99.01, summary["latency_ms"]["p99"])
+        self.assertEqual(100.0, summary["latency_ms"]["max"])
+        self.assertEqual(100, len(summary["samples_ms"]))
+        self.assertNotIn("items_per_s", summary)
+
+    def test_summarize_latencies_with_items(self):
+        summary = reporting.summarize_latencies([0.1, 0.1], duration_s=0.2, items_per_operation=[64, 36])
+        self.assertEqual(100, summary["items"])
+        self.assertEqual(500.0, summary["items_per_s"])
+
+    def test_summarize_no_latencies(self):
+        summary = reporting.summarize_latencies([], duration_s=0)
+        self.assertEqual({}, summary["latency_ms"])
+        self.assertIsNone(summary["throughput_per_s"])
+
+    def test_write_results(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            path = reporting.write_results("search_latency", [{"name": "case"}], output_dir=output_dir)
+            self.assertEqual(output_dir, os.path.dirname(path))
+            with open(path) as f:
+                written = json.load(f)
+            self.assertTrue(os.path.exists(os.path.join(output_dir, "results.sqlite")))
+        self.assertEqual("search_latency", written["benchmark"])
+        self.assertEqual([{"name": "case"}], written["results"])
+        self.assertIn("image", written["metadata"])
+        self.assertEqual(reporting.host_fingerprint(), written["metadata"]["host_fingerprint"])
@@ -0,0 +1,99 @@
+import json
+import os
+import tempfile
+import unittest
+from collections import Counter
+
+import numpy as np
+import pytest
+from marqo import Client
+
+from tests.corpus_generator import CorpusGenerator, load_vocabulary, zipf_probabilities
+from tests.marqo_standin import StandinMarqoServer
+
+ALL_FIELDS = [
+    {"name": "title", "type": "text", "features": ["lexical_search"]},
+    {"name": "views", "type": "int", "features": ["filter"]},
+    {"name": "big_number", "type": "long"},
+    {"name": "price", "type": "float", "features": ["score_modifier"]},
+    {"name": "ratio", "type": "double"},
+    {"name": "in_stock", "type": "bool", "features": ["filter"]},
+    {"name": "tags", "type": "array<text>", "features": ["filter"]},
+    {"name": "sizes", "type": "array<int>"},
+    {"name": "image", "type": "image_pointer"},
+    {"name": "combined", "type": "multimodal_combination", "dependentFields": {"title": 0.5, "image": 0.5}},
+]
+
+
+@pytest.mark.fixed
+class TestCorpusGenerator(unittest.TestCase):
+
+    def test_documents_match_the_schema(self):
+        documents = CorpusGenerator(ALL_FIELDS, seed=3, field_options={
+            "views": {"min": 10, "max": 20}, "title": {"words": 4}, "sizes": {"length": [0, 2]}}).generate(500)
+        self.assertEqual([f"doc_{i}" for i in range(500)], [document["_id"] for document in documents])
+        for document in documents:
+            self.assertNotIn("combined", document)
+            self.assertEqual(4, len(document["title"].split()))
+            self.assertTrue(10 <= document["views"] <= 20)
+            self.assertIsInstance(document["big_number"], int)
+            self.assertEqual(document["price"], float(np.float32(document["price"])))
+            self.assertIsInstance(document["in_stock"], bool)
+            self.assertTrue(1 <= len(document["tags"]) <= 5)
+            self.assertTrue(all(isinstance(tag, str) for tag in document["tags"]))
+            self.assertTrue(0 <= len(document["sizes"]) <= 2)
+            self.assertTrue(document["image"].startswith("https://"))
+        # JSON-serializable, i.e. no numpy types left
+        json.dumps(documents)
+
+    def test_seeded_and_streaming(self):
+        first = CorpusGenerator(ALL_FIELDS, seed=1)
+        batches = list(first.batches(25, batch_size=10))
+        self.assertEqual([10, 10, 5], [len(batch) for batch in batches])
+        self.assertEqual("doc_24", batches[-1][-1]["_id"])
+        self.assertEqual(CorpusGenerator(ALL_FIELDS, seed=1).generate(10), batches[0])
+        self.assertNotEqual(CorpusGenerator(ALL_FIELDS, seed=2).generate(10), batches[0])
+
+    def test_zipfian_words(self):
+        vocabulary = load_vocabulary()
+        self.assertGreater(len(vocabulary), 1000)
+        self.assertEqual(len(vocabulary), len(set(vocabulary)))
+        probabilities = zipf_probabilities(len(vocabulary))
+        self.assertAlmostEqual(1.0, probabilities.sum())
+
+        documents = CorpusGenerator([{"name": "text", "type": "text"}], field_options={"text": {"words": 100}}
+                                    ).generate(1000)
+        counts = Counter(word for document in documents for word in document["text"].split())
+        total = sum(counts.values())
+        for rank in (0, 1, 9):
+            self.assertAlmostEqual(probabilities[rank], counts[vocabulary[rank]] / total, delta=0.01)
+
+    def test_custom_vector_and_invalid_fields(self):
+        with self.assertRaises(ValueError):
+            CorpusGenerator([{"name": "vector", "type": "custom_vector"}])
+        with self.assertRaises(ValueError):
+            CorpusGenerator([{"name": "location", "type": "geo_point"}])
+        document = CorpusGenerator([{"name": "vector", "type": "custom_vector"}],
+                                   field_options={"vector": {"dimension": 8}}).generate(1)[0]
+        self.assertEqual(8, len(document["vector"]["vector"]))
+        self.assertAlmostEqual(1.0, float(np.linalg.norm(document["vector"]["vector"])), places=5)
+        self.assertIsInstance(document["vector"]["content"], str)
+
+    def test_write_jsonl(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "corpus.jsonl")
+            self.assertEqual(25, CorpusGenerator(ALL_FIELDS).write_jsonl(path, 25, batch_size=7))
+            with open(path) as f:
+                documents = [json.loads(line) for line in f]
+        self.assertEqual([document for batch in CorpusGenerator(ALL_FIELDS).batches(25, batch_size=7)
+                          for document in batch], documents)
+
+    def test_documents_are_accepted_by_a_structured_index(self):
+        with StandinMarqoServer() as server:
+            client = Client(url=server.url)
+            client.create_index("corpus_index", type="structured", model="random/small", all_fields=ALL_FIELDS,
+                                tensor_fields=["title", "combined"])
+            documents = CorpusGenerator(ALL_FIELDS).generate(200)
+            results = client.index("corpus_index").add_documents(documents, client_batch_size=100)
+            self.assertFalse(any(result["errors"] for result in results))
+            self.assertEqual(200, client.index("corpus_index").get_stats()["numberOfDocuments"])
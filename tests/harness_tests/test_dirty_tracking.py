@@ -0,0 +1,84 @@
+import unittest
+from unittest import mock
+
+import pytest
+import requests
+from marqo.errors import MarqoWebError
+from marqo.index import Index
+
+from tests.dirty_tracking import DirtyIndexTracker
+from tests.marqo_test import MarqoTestCase
+
+
+@pytest.mark.fixed
+class TestDirtyIndexTracker(unittest.TestCase):
+
+    def setUp(self):
+        self.tracker = DirtyIndexTracker()
+        self.index = Index.__new__(Index)
+        self.index.index_name = "my_index"
+
+    def test_unknown_index_is_dirty(self):
+        self.assertFalse(self.tracker.is_clean("my_index"))
+
+    def test_client_writes_mark_the_index_dirty(self):
+        for method_name in DirtyIndexTracker.WRITE_METHODS:
+            with self.subTest(method_name):
+                with mock.patch.object(Index, method_name, return_value={"errors": False}) as mock_write:
+                    self.tracker.install()
+                    try:
+                        self.tracker.mark_clean(["my_index", "other_index"])
+                        res = getattr(self.index, method_name)([{"_id": "1"}])
+                    finally:
+                        self.tracker.uninstall()
+                self.assertEqual({"errors": False}, res)
+                mock_write.assert_called_once()
+                self.assertFalse(self.tracker.is_clean("my_index"))
+                self.assertTrue(self.tracker.is_clean("other_index"))
+
+    def test_install_is_idempotent(self):
+        with mock.patch.object(Index, "add_documents") as mock_add:
+            self.tracker.install()
+            self.tracker.install()
+            try:
+                self.index.add_documents([])
+            finally:
+                self.tracker.uninstall()
+            self.assertIs(mock_add, Index.add_documents)
+        mock_add.assert_called_once()
+
+
+@pytest.mark.fixed
+class TestClearIndexes(unittest.TestCase):
+
+    def setUp(self):
+        self.tracker = DirtyIndexTracker()
+        self.session = mock.Mock()
+        patches = [
+            mock.patch.object(MarqoTestCase, "dirty_index_tracker", self.tracker),
+            mock.patch.object(MarqoTestCase, "get_session", return_value=self.session),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def cleared_index_names(self):
+        return sorted(call.args[0].split("/")[-3] for call in self.session.delete.call_args_list)
+
+    def test_only_dirty_indexes_are_cleared(self):
+        self.tracker.mark_clean(["clean_index"])
+        MarqoTestCase.clear_indexes(["clean_index", "dirty_index_1", "dirty_index_2"])
+        self.assertEqual(["dirty_index_1", "dirty_index_2"], self.cleared_index_names())
+
+        # Cleared indexes are clean until the next write
+        self.session.delete.reset_mock()
+        MarqoTestCase.clear_indexes(["clean_index", "dirty_index_1", "dirty_index_2"])
+        self.assertEqual([], self.cleared_index_names())
+
+    def test_failed_clear_raises_and_leaves_the_index_dirty(self):
+        failed_response = mock.Mock()
+        failed_response.raise_for_status.side_effect = requests.exceptions.HTTPError("500")
+        self.session.delete.return_value = failed_response
+        with self.assertRaises(MarqoWebError):
+            MarqoTestCase.clear_indexes(["dirty_index"])
+        self.assertFalse(self.tracker.is_clean("dirty_index"))
@@ -0,0 +1,59 @@
+import types
+import unittest
+
+import pytest
+import requests
+from marqo import Client
+
+from tests.http_accounting import SESSION, HttpAccounting
+from tests.marqo_standin import StandinMarqoServer
+
+
+@pytest.mark.fixed
+class TestHttpAccounting(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StandinMarqoServer().start()
+        cls.client = Client(url=cls.server.url)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def run_phase(self, accounting, nodeid, phase, function):
+        hook = {"setup": accounting.pytest_runtest_setup, "call": accounting.pytest_runtest_call,
+                "teardown": accounting.pytest_runtest_teardown}[phase]
+        wrapper = hook(types.SimpleNamespace(nodeid=nodeid))
+        next(wrapper)
+        function()
+        with self.assertRaises(StopIteration):
+            next(wrapper)
+
+    def test_accounts_calls_to_tests_phases_and_sources(self):
+        accounting = HttpAccounting(self.server.url, repeated_calls=5).install()
+        try:
+            requests.get(f"{self.server.url}/")
+            self.run_phase(accounting, "test_a", "setup",
+                           lambda: self.client.create_index("accounting_index", model="random/small"))
+            index = self.client.index("accounting_index")
+            self.run_phase(accounting, "test_a", "call", lambda: [index.get_stats() for _ in range(6)])
+            self.run_phase(accounting, "test_a", "teardown",
+                           lambda: requests.post(f"{self.server.url}/batch/indexes/delete",
+                                                 data='["accounting_index"]'))
+        finally:
+            accounting.uninstall()
+        # Not accounted once uninstalled
+        self.client.get_indexes()
+
+        report = accounting.report()
+        self.assertEqual({SESSION, "test_a"}, set(report))
+        test = report["test_a"]
+        self.assertEqual(8, test["calls"])
+        self.assertEqual(["setup", "call", "teardown"], list(test["phases"]))
+        self.assertEqual({"client": 6}, {source: values["calls"]
+                                         for source, values in test["phases"]["call"]["sources"].items()})
+        self.assertEqual(["harness POST /batch/indexes/delete"], list(test["phases"]["teardown"]["endpoints"]))
+        self.assertGreater(test["phases"]["teardown"]["bytes_sent"], 0)
+        self.assertGreater(test["phases"]["call"]["bytes_received"], 0)
+        self.assertEqual([("test_a", "call", "client GET /indexes/{index}/stats", 6)], accounting.repeated_endpoints())
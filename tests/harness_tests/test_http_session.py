@@ -0,0 +1,57 @@
+import threading
+import unittest
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from tests.http_session import PooledSession
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"Welcome to Marqo"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.mark.fixed
+class TestPooledSession(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_are_reused(self):
+        session = PooledSession(pool_size=2, retries=0)
+        for _ in range(5):
+            self.assertEqual(200, session.get(self.url).status_code)
+        self.assertEqual({"requests_sent": 5, "connections_opened": 1, "connections_reused": 4},
+                         session.connection_stats())
+
+    def test_default_timeout_is_applied(self):
+        session = PooledSession(timeout=(1, 2))
+        sent_kwargs = {}
+
+        def fake_request(method, url, **kwargs):
+            sent_kwargs.update(kwargs)
+
+        with mock.patch("requests.Session.request", side_effect=fake_request):
+            session.get(self.url)
+        self.assertEqual((1, 2), sent_kwargs["timeout"])
+
+    def test_stats_are_empty_before_any_request(self):
+        self.assertEqual({"requests_sent": 0, "connections_opened": 0, "connections_reused": 0},
+                         PooledSession().connection_stats())
@@ -0,0 +1,91 @@
+import unittest
+
+import pytest
+
+from tests.index_pool import IndexPool
+
+
+@pytest.mark.fixed
+class TestIndexPool(unittest.TestCase):
+
+    def setUp(self):
+        self.create_calls = []
+        self.delete_calls = []
+        self.clear_calls = []
+        self.pool = IndexPool(
+            create_indexes=self.create_calls.append,
+            delete_indexes=self.delete_calls.append,
+            clear_indexes=self.clear_calls.append
+        )
+        self.text_settings = {"type": "unstructured", "model": "sentence-transformers/all-MiniLM-L6-v2"}
+        self.image_settings = {"type": "unstructured", "model": "open_clip/ViT-B-32/openai"}
+
+    def test_fingerprint_ignores_key_order_and_index_name(self):
+        self.assertEqual(
+            IndexPool.fingerprint({"type": "unstructured", "model": "m"}),
+            IndexPool.fingerprint({"model": "m", "type": "unstructured", "indexName": "abc"})
+        )
+        self.assertNotEqual(
+            IndexPool.fingerprint({"type": "unstructured", "model": "m"}),
+            IndexPool.fingerprint({"type": "structured", "model": "m"})
+        )
+
+    def test_lease_creates_missing_indexes_in_one_batch(self):
+        names = self.pool.lease([self.text_settings, self.image_settings, self.text_settings])
+        self.assertEqual(3, len(set(names)))
+        self.assertEqual(1, len(self.create_calls))
+        self.assertEqual(names, [settings["indexName"] for settings in self.create_calls[0]])
+        self.assertEqual([], self.clear_calls)
+
+    def test_released_index_is_reused_and_cleared(self):
+        text_index, image_index = self.pool.lease([self.text_settings, self.image_settings])
+        self.pool.release([text_index, image_index])
+
+        self.assertEqual([text_index], self.pool.lease([dict(reversed(list(self.text_settings.items())))]))
+        self.assertEqual(1, len(self.create_calls))
+        self.assertEqual([[text_index]], self.clear_calls)
+
+    def test_leased_index_is_not_shared(self):
+        first = self.pool.lease([self.text_settings])
+        second = self.pool.lease([self.text_settings])
+        self.assertNotEqual(first, second)
+        self.assertEqual(2, len(self.create_calls))
+
+    def test_release_unknown_index_raises(self):
+        with self.assertRaises(ValueError):
+            self.pool.release(["not_leased"])
+
+    def test_failed_creation_leaves_pool_unchanged(self):
+        def failing_create(index_settings):
+            raise RuntimeError("deployment failed")
+
+        pool = IndexPool(create_indexes=failing_create, delete_indexes=self.delete_calls.append,
+                         clear_indexes=self.clear_calls.append)
+        with self.assertRaises(RuntimeError):
+            pool.lease([self.text_settings])
+        self.assertEqual([], pool.index_names())
+
+    def test_delete_all_deletes_in_one_batch(self):
+        names = self.pool.lease([self.text_settings, self.image_settings])
+        self.pool.release(names[:1])
+        self.pool.delete_all()
+        self.assertEqual([sorted(names)], [sorted(call) for call in self.delete_calls])
+        self.assertEqual([], self.pool.index_names())
+
+    def test_provision_creates_the_most_used_count_per_fingerprint(self):
+        created = self.pool.provision([
+            [self.text_settings, self.image_settings],
+            [self.text_settings, self.text_settings],
+            [self.image_settings],
+        ], batch_size=2)
+        self.assertEqual(3, len(created))
+        self.assertEqual([2, 1], [len(call) for call in self.create_calls])
+
+        # Every class can now lease its indexes without creating any
+        names = self.pool.lease([self.text_settings, self.text_settings])
+        self.assertEqual(2, len(set(names) & set(created)))
+        self.assertEqual(2, len(self.create_calls))
+
+    def test_provision_counts_existing_indexes(self):
+        self.pool.lease([self.text_settings])
+        self.assertEqual(1, len(self.pool.provision([[self.text_settings, self.text_settings]])))
@@ -0,0 +1,172 @@
+import itertools
+import threading
+import unittest
+from unittest import mock
+
+import pytest
+from marqo import Client
+
+from tests.ingestion_pipeline import IngestionPipeline, _AdaptiveLimit
+from tests.marqo_standin import StandinError, StandinMarqoServer
+
+
+@pytest.mark.fixed
+class TestIngestionPipeline(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StandinMarqoServer().start()
+        cls.client = Client(url=cls.server.url)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.client.create_index("pipeline_index", model="random/small")
+        self.addCleanup(self.client.delete_index, "pipeline_index")
+        self.handle = self.server.marqo.handle
+        self.lock = threading.Lock()
+        self.consumed = 0
+        self.handled = 0
+
+    def documents(self, count):
+        for i in range(count):
+            with self.lock:
+                self.consumed += 1
+            yield {"_id": str(i), "title": f"document {i}"}
+
+    def pipeline(self, **kwargs):
+        pipeline = IngestionPipeline(self.server.url, "pipeline_index", tensor_fields=["title"],
+                                     progress_interval_s=0, backoff_s=0.001, **kwargs)
+        self.addCleanup(pipeline.close)
+        return pipeline
+
+    def is_add_documents(self, method, path):
+        return method == "POST" and path.rstrip("/").endswith("/pipeline_index/documents")
+
+    def test_adds_all_documents_with_bounded_memory(self):
+        batch_size, max_in_flight = 10, 3
+        ahead = []
+
+        def handle(method, path, query, body):
+            if self.is_add_documents(method, path):
+                with self.lock:
+                    ahead.append(self.consumed - self.handled)
+                    self.handled += len(body["documents"])
+            return self.handle(method, path, query, body)
+
+        progress = []
+        pipeline = self.pipeline(batch_size=batch_size, max_in_flight=max_in_flight)
+        pipeline.progress_interval_s, pipeline.on_progress = 0.001, progress.append
+        with mock.patch.object(self.server.marqo, "handle", handle):
+            result = pipeline.run(self.documents(1005))
+
+        self.assertEqual(1005, result["documents"])
+        self.assertEqual(1005, result["vectors"])
+        self.assertEqual(101, result["batches"])
+        self.assertEqual((0, 0), (result["failed"], result["retries"]))
+        self.assertEqual(1005, self.handled)
+        self.assertEqual(1005, self.client.index("pipeline_index").get_stats()["numberOfDocuments"])
+        self.assertGreater(result["docs_per_s"], 0)
+        self.assertGreater(result["batch_latency_ms"]["max"], 0)
+        # Documents are read from the generator only as batches complete
+        self.assertLessEqual(max(ahead), batch_size * max_in_flight)
+        self.assertTrue(progress)
+        self.assertEqual({"documents", "elapsed_s", "docs_per_s", "vectors", "vectors_per_s", "in_flight_limit"},
+                         set(progress[0]))
+
+    def test_backs_off_on_throttling(self):
+        calls = itertools.count()
+        throttled = set()
+
+        def handle(method, path, query, body):
+            if self.is_add_documents(method, path):
+                ids = [document["_id"] for document in body["documents"]]
+                # Every third request is throttled whole, and every even document once in a batch response
+                if next(calls) % 3 == 0 and ids[0] not in throttled:
+                    throttled.add(ids[0])
+                    raise StandinError(429, "too_many_requests", "Throttled")
+                response = self.handle(method, path, query, body)
+                for item in response["items"]:
+                    if int(item["_id"]) % 2 == 0 and item["_id"] not in throttled:
+                        throttled.add(item["_id"])
+                        item.update(status=429, message="Throttled")
+                return response
+            return self.handle(method, path, query, body)
+
+        with mock.patch.object(self.server.marqo, "handle", handle):
+            result = self.pipeline(batch_size=8, max_in_flight=4).run(self.documents(200))
+
+        self.assertEqual(200, result["documents"])
+        self.assertEqual(0, result["failed"])
+        self.assertGreater(result["retries"], 10)
+        self.assertEqual(200, self.client.index("pipeline_index").get_stats()["numberOfDocuments"])
+
+    def test_gives_up_after_max_retries(self):
+        def handle(method, path, query, body):
+            if self.is_add_documents(method, path):
+                raise StandinError(503, "unavailable", "Vespa is down")
+            return self.handle(method, path, query, body)
+
+        with mock.patch.object(self.server.marqo, "handle", handle):
+            result = self.pipeline(batch_size=5, max_in_flight=2, max_retries=2).run(self.documents(12))
+
+        self.assertEqual((0, 12, 3), (result["documents"], result["failed"], result["batches"]))
+        self.assertEqual(6, result["retries"])
+        self.assertIn("gave up after 2 retries", result["error_samples"][0])
+        self.assertEqual(1, result["in_flight_limit"])
+
+    def test_counts_rejected_documents_without_retrying(self):
+        documents = [{"_id": "1", "title": "valid"}, {"_id": "", "title": "invalid id"}]
+        result = self.pipeline().run(documents)
+        self.assertEqual((1, 1, 0), (result["documents"], result["failed"], result["retries"]))
+        self.assertEqual(1, len(result["error_samples"]))
+
+    def test_retries_throttled_documents_without_ids(self):
+        throttled = []
+
+        def handle(method, path, query, body):
+            if self.is_add_documents(method, path) and not throttled:
+                # The first document of the first batch is throttled, and matched back by its position
+                throttled.append(body["documents"][0]["title"])
+                response = self.handle(method, path, query, {**body, "documents": body["documents"][1:]})
+                response["items"].insert(0, {"_id": "", "status": 429, "message": "Throttled"})
+                return response
+            return self.handle(method, path, query, body)
+
+        documents = [{"title": f"document {i}"} for i in range(10)]
+        with mock.patch.object(self.server.marqo, "handle", handle):
+            result = self.pipeline(batch_size=5).run(documents)
+        self.assertEqual((10, 0, 1), (result["documents"], result["failed"], result["retries"]))
+        self.assertEqual(10, self.client.index("pipeline_index").get_stats()["numberOfDocuments"])
+
+    def test_counts_batches_with_unexpected_responses_as_failed(self):
+        pipeline = self.pipeline(batch_size=4)
+        response = mock.Mock(status_code=200, ok=True, json=mock.Mock(side_effect=ValueError("Expecting value")))
+        with mock.patch.object(pipeline, "_post", return_value=response):
+            result = pipeline.run(self.documents(10))
+        self.assertEqual((0, 10, 3), (result["documents"], result["failed"], result["batches"]))
+        self.assertIn("Expecting value", result["error_samples"][0])
+
+        # Items missing from a response are counted as failed
+        response = mock.Mock(status_code=200, ok=True, json=mock.Mock(return_value={"items": [{"status": 200}]}))
+        with mock.patch.object(pipeline, "_post", return_value=response):
+            result = pipeline.run(self.documents(4))
+        self.assertEqual((1, 3), (result["documents"], result["failed"]))
+        self.assertIn("1 items in the response to 4 documents", result["error_samples"][0])
+
+    def test_adaptive_limit(self):
+        limit = _AdaptiveLimit(8)
+        limit.throttled()
+        limit.throttled()
+        self.assertEqual(2, limit.limit)
+        for _ in range(2):
+            limit.succeeded()
+        self.assertEqual(3, limit.limit)
+        for _ in range(100):
+            limit.succeeded()
+        self.assertEqual(8, limit.limit)
+        for _ in range(10):
+            limit.throttled()
+        self.assertEqual(1, limit.limit)
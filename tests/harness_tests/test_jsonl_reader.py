@@ -0,0 +1,83 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import pytest
+
+from tests.benchmarks.jsonl_reader import JsonlFile
+
+
+@pytest.mark.fixed
+class TestJsonlFile(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, "records.jsonl")
+        self.records = [{"i": i, "text": "x" * (i % 7)} for i in range(100)]
+        self.write(self.records)
+
+    def write(self, records, blank_lines=False):
+        with open(self.path, "w") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+                if blank_lines:
+                    f.write("\n")
+
+    def test_random_access(self):
+        with JsonlFile(self.path) as jsonl:
+            self.assertEqual(100, len(jsonl))
+            self.assertEqual(self.records[42], jsonl[42])
+            self.assertEqual(self.records[-1], jsonl[-1])
+            self.assertEqual(self.records, list(jsonl))
+            with self.assertRaises(IndexError):
+                jsonl[100]
+
+    def test_blank_lines_and_missing_final_line_break(self):
+        self.write(self.records[:3], blank_lines=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(self.records[3]))
+        with JsonlFile(self.path) as jsonl:
+            self.assertEqual(self.records[:4], list(jsonl))
+
+    def test_index_is_persisted_and_rebuilt_when_the_file_changes(self):
+        with JsonlFile(self.path) as jsonl:
+            self.assertEqual(100, len(jsonl))
+        self.assertTrue(os.path.exists(f"{self.path}.idx"))
+
+        with JsonlFile(self.path) as jsonl:
+            self.assertIsNotNone(jsonl._load_index())
+            self.assertEqual(self.records[99], jsonl[99])
+
+        self.write(self.records[:10])
+        with JsonlFile(self.path) as jsonl:
+            self.assertEqual(10, len(jsonl))
+            self.assertEqual(self.records[9], jsonl[9])
+
+    def test_unwritable_index_is_kept_in_memory(self):
+        with JsonlFile(self.path, index_path=os.path.join(self.directory, "missing", "records.idx")) as jsonl:
+            self.assertEqual(self.records[5], jsonl[5])
+
+    def test_empty_file(self):
+        self.write([])
+        with JsonlFile(self.path) as jsonl:
+            self.assertEqual(0, len(jsonl))
+            self.assertEqual([(0, 0), (0, 0)], jsonl.shards(2))
+
+    def test_shards(self):
+        with JsonlFile(self.path) as jsonl:
+            for count in [1, 3, 8]:
+                with self.subTest(count=count):
+                    shards = jsonl.shards(count)
+                    self.assertEqual(count, len(shards))
+                    self.assertEqual(0, shards[0][0])
+                    self.assertEqual(100, shards[-1][1])
+                    self.assertTrue(all(shards[k][1] == shards[k + 1][0] for k in range(count - 1)))
+                    self.assertEqual(self.records, [record for start, stop in shards
+                                                    for record in jsonl.lines(start, stop)])
+            sizes = [stop - start for start, stop in jsonl.shards(4)]
+            self.assertLessEqual(max(sizes) - min(sizes), 2)
+            with self.assertRaises(ValueError):
+                jsonl.shards(0)
@@ -0,0 +1,70 @@
+import time
+import unittest
+
+import pytest
+
+from tests.benchmarks.load_generator import LatencyHistogram, OpenLoopLoadGenerator, workers_for_rate
+
+
+@pytest.mark.fixed
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_percentiles_are_within_the_relative_error(self):
+        histogram = LatencyHistogram(significant_digits=2)
+        for latency_ms in range(1, 10001):
+            histogram.record(latency_ms / 1000)
+
+        summary = histogram.summary()
+        self.assertEqual(10000, summary["count"])
+        for percentile, expected_ms in [("p50", 5000), ("p90", 9000), ("p99", 9900), ("p99.9", 9990)]:
+            with self.subTest(percentile):
+                self.assertAlmostEqual(expected_ms, summary["latency_ms"][percentile], delta=expected_ms / 100)
+        self.assertEqual(1.0, summary["latency_ms"]["min"])
+        self.assertEqual(10000.0, summary["latency_ms"]["max"])
+        self.assertAlmostEqual(5000.5, summary["latency_ms"]["mean"])
+
+    def test_merge(self):
+        first, second = LatencyHistogram(), LatencyHistogram()
+        first.record(0.001)
+        second.record(0.5)
+        first.merge(second)
+        self.assertEqual(2, first.count)
+        self.assertEqual(500.0, first.value_at_percentile(100))
+        self.assertAlmostEqual(1.0, first.value_at_percentile(50), delta=0.01)
+
+    def test_empty(self):
+        self.assertEqual({"count": 0, "latency_ms": {}}, LatencyHistogram().summary())
+        self.assertIsNone(LatencyHistogram().value_at_percentile(50))
+
+
+@pytest.mark.fixed
+class TestOpenLoopLoadGenerator(unittest.TestCase):
+
+    def test_requests_are_sent_at_the_target_rate(self):
+        calls = []
+        result = OpenLoopLoadGenerator(calls.append, rate_per_s=100, duration_s=0.3, workers=4).run()
+        self.assertEqual(list(range(30)), sorted(calls))
+        self.assertEqual(30, result["sent"])
+        self.assertEqual(0, result["errors"])
+        self.assertGreaterEqual(result["duration_s"], 0.29)
+
+    def test_queueing_delay_is_measured_from_the_scheduled_send_time(self):
+        # One worker taking 20ms per request cannot hold 100 requests/s, so requests queue up
+        result = OpenLoopLoadGenerator(lambda _: time.sleep(0.02), rate_per_s=100, duration_s=0.2, workers=1).run()
+        self.assertEqual(20, result["sent"])
+        self.assertLess(result["service_time_ms"]["max"], 100)
+        # The last request is scheduled at 190ms but only finishes after 20 x 20ms
+        self.assertGreater(result["latency_ms"]["max"], 150)
+
+    def test_errors_are_counted(self):
+        def fail(request_index):
+            if request_index % 2:
+                raise RuntimeError("failed")
+        result = OpenLoopLoadGenerator(fail, rate_per_s=100, duration_s=0.1, workers=2).run()
+        self.assertEqual(5, result["errors"])
+        self.assertEqual(10, result["sent"])
+
+    def test_workers_for_rate(self):
+        self.assertEqual(15, workers_for_rate(100, 0.1))
+        self.assertEqual(1, workers_for_rate(1, 0.01))
+        self.assertEqual(256, workers_for_rate(10000, 1))
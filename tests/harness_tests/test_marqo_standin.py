@@ -0,0 +1,117 @@
+import unittest
+
+import numpy as np
+import pytest
+from marqo import Client
+from marqo.errors import MarqoWebError
+
+from tests.marqo_standin import StandinMarqoServer, hash_embedding, parse_filter
+
+
+@pytest.mark.fixed
+class TestStandinHelpers(unittest.TestCase):
+
+    def test_hash_embedding_is_deterministic_and_normalized(self):
+        vector = hash_embedding("rocket launch mission", 32)
+        np.testing.assert_array_equal(vector, hash_embedding("rocket launch mission", 32))
+        self.assertAlmostEqual(1.0, float(np.linalg.norm(vector)), places=5)
+        # Shared words bring embeddings closer
+        self.assertGreater(float(vector @ hash_embedding("rocket launch", 32)),
+                           float(vector @ hash_embedding("newspaper editor", 32)))
+
+    def test_parse_filter(self):
+        doc = {"_id": "1", "title": "hello world", "n": 5, "flag": True, "tags": ["a", "b"]}
+        test_cases = [
+            ("n:5", True),
+            ("n:[1 TO 5]", True),
+            ("n:[6 TO *]", False),
+            ("flag:true AND tags:b", True),
+            ("NOT n:5 OR _id:1", True),
+            ("(n:4 OR n:6) AND flag:true", False),
+            ('title:"hello world"', True),
+            ("title:(hello world)", True),
+            ("title:hello\\ world", True),
+            ("_id in (2, 1)", True),
+            ("missing:1", False),
+        ]
+        for filter_string, expected in test_cases:
+            with self.subTest(filter_string):
+                self.assertEqual(expected, parse_filter(filter_string)(doc))
+
+    def test_invalid_filter(self):
+        for filter_string in ["n:", "(n:5", "n:[1 5]", "n:5 AND"]:
+            with self.subTest(filter_string):
+                with self.assertRaises(Exception):
+                    parse_filter(filter_string)
+
+
+@pytest.mark.fixed
+class TestStandinServer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StandinMarqoServer().start()
+        cls.client = Client(url=cls.server.url)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.client.create_index("standin_index", model="random/small")
+        self.addCleanup(self.client.delete_index, "standin_index")
+        self.index = self.client.index("standin_index")
+
+    def test_documents_and_search(self):
+        res = self.index.add_documents([
+            {"_id": "1", "title": "rocket launch mission", "n": 1},
+            {"_id": "2", "title": "newspaper editor", "n": 2},
+            {"_id": "3", "title": "rocket engine", "n": 3},
+        ], tensor_fields=["title"], client_batch_size=2)
+        self.assertFalse(any(batch["errors"] for batch in res))
+        self.assertEqual({"numberOfDocuments": 3, "numberOfVectors": 3},
+                         {k: v for k, v in self.index.get_stats().items() if k != "backend"})
+
+        tensor_hits = self.index.search("rocket launch")["hits"]
+        self.assertEqual("1", tensor_hits[0]["_id"])
+        self.assertEqual([{"title": "rocket launch mission"}], tensor_hits[0]["_highlights"])
+        lexical_hits = self.index.search("rocket", search_method="LEXICAL", filter_string="n:[2 TO 3]")["hits"]
+        self.assertEqual(["3"], [hit["_id"] for hit in lexical_hits])
+
+        self.index.delete_documents(["1"])
+        self.assertEqual(2, self.index.get_stats()["numberOfDocuments"])
+        with self.assertRaises(MarqoWebError) as e:
+            self.index.get_document("1")
+        self.assertEqual("document_not_found", e.exception.code)
+
+    def test_models_are_loaded_by_use_and_ejected(self):
+        self.index.search("warm up")
+        self.assertIn({"model_name": "random/small", "model_device": "cpu"},
+                      self.index.get_loaded_models()["models"])
+        self.index.eject_model("random/small", "cpu")
+        with self.assertRaises(MarqoWebError) as e:
+            self.index.eject_model("random/small", "cpu")
+        self.assertEqual("model_not_in_cache", e.exception.code)
+
+    def test_unknown_index(self):
+        with self.assertRaises(MarqoWebError) as e:
+            self.client.index("missing_index").search("test")
+        self.assertEqual("index_not_found", e.exception.code)
+        self.assertEqual(404, e.exception.status_code)
+
+    def test_validation_errors(self):
+        with self.assertRaises(MarqoWebError) as e:
+            self.index.add_documents([], tensor_fields=["title"])
+        self.assertEqual("bad_request", e.exception.code)
+
+        res = self.index.add_documents([{"_id": "1", "bad field": "x"}, {"_id": "2", "n": 2 ** 70}],
+                                       tensor_fields=[])
+        self.assertTrue(res["errors"])
+        self.assertEqual([400, 400], [item["status"] for item in res["items"]])
+
+        with self.assertRaises(MarqoWebError) as e:
+            self.index.update_documents([{"_id": "1", "title": "x"}])
+        self.assertEqual("invalid_argument", e.exception.code)
+
+        self.assertEqual("prenormalized-angular",
+                         self.index.get_settings()["annParameters"]["spaceType"])
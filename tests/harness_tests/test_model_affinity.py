@@ -0,0 +1,82 @@
+import unittest
+
+import pytest
+
+from tests import model_affinity
+
+
+class _FakeItem:
+    def __init__(self, test_class, name):
+        self.cls = test_class
+        self.name = name
+
+
+def _test_class(name, models):
+    return type(name, (), {"index_models": models})
+
+
+@pytest.mark.fixed
+class TestModelAffinity(unittest.TestCase):
+
+    def test_class_models_reads_pooled_indexes_and_index_models(self):
+        test_class = type("TestClass", (), {
+            "pooled_indexes": {
+                "text_index_name": {"type": "unstructured", "model": "sentence-transformers/all-MiniLM-L6-v2"},
+                "default_index_name": {"type": "unstructured"},
+            },
+            "index_models": ["sentence-transformers/all-MiniLM-L6-v2", "google/owlvit-base-patch32"]
+        })
+        self.assertEqual(("sentence-transformers/all-MiniLM-L6-v2", model_affinity.DEFAULT_MODEL, "google/owlvit-base-patch32"),
+                         model_affinity.class_models(test_class))
+
+    def test_estimate_model_loads_is_lru(self):
+        self.assertEqual(3, model_affinity.estimate_model_loads([["a", "b", "a", "c", "a"]], 2))
+        self.assertEqual(5, model_affinity.estimate_model_loads([["a", "b", "a", "c", "a"]], 1))
+
+    def test_estimate_model_loads_counts_the_eject_after_each_class(self):
+        model_sequence = [["a"], ["a", "b"], ["b"], ["a"]]
+        # Only the models of the next class are kept
+        self.assertEqual(3, model_affinity.estimate_model_loads(model_sequence, 2))
+        self.assertEqual(5, model_affinity.estimate_model_loads(model_sequence, 2, keep_next_models=False))
+
+    def test_order_groups_classes_by_model(self):
+        model_sequence = [["a"], ["b"], ["a"], ["b"], ["a"]]
+        order = model_affinity.order_by_model_affinity(model_sequence, cache_size=1)
+        self.assertEqual([0, 2, 4, 1, 3], order)
+
+    def test_reorder_items_keeps_classes_together_and_unknown_classes_in_place(self):
+        clip_1 = _test_class("Clip1", ["open_clip/ViT-B-32/openai"])
+        mini_lm = _test_class("MiniLM", ["sentence-transformers/all-MiniLM-L6-v2"])
+        unknown = _test_class("Unknown", [])
+        clip_2 = _test_class("Clip2", ["open_clip/ViT-B-32/openai"])
+        items = [_FakeItem(clip_1, "1"), _FakeItem(clip_1, "2"), _FakeItem(mini_lm, "3"),
+                 _FakeItem(unknown, "4"), _FakeItem(clip_2, "5"), _FakeItem(None, "6")]
+
+        reordered, loads_before, loads_after = model_affinity.reorder_items(items, cache_size=1)
+
+        self.assertEqual(["1", "2", "5", "4", "3", "6"], [item.name for item in reordered])
+        self.assertEqual((3, 2), (loads_before, loads_after))
+
+    def test_skipped_classes_do_not_load_models(self):
+        clip = _test_class("Clip", ["open_clip/ViT-B-32/openai"])
+        skipped = _test_class("Skipped", ["sentence-transformers/all-MiniLM-L6-v2"])
+        items = [_FakeItem(clip, "1"), _FakeItem(skipped, "2"), _FakeItem(clip, "3")]
+
+        reordered, loads_before, loads_after = model_affinity.reorder_items(
+            items, cache_size=1, is_skipped=lambda item: item.cls is skipped)
+
+        self.assertEqual(["1", "2", "3"], [item.name for item in reordered])
+        self.assertEqual((2, 1), (loads_before, loads_after))
+
+    def test_models_to_keep_are_the_next_declared_models(self):
+        clip = _test_class("Clip", ["open_clip/ViT-B-32/openai"])
+        unknown = _test_class("Unknown", [])
+        skipped = _test_class("Skipped", ["hf/e5-base-v2"])
+        mini_lm = _test_class("MiniLM", ["sentence-transformers/all-MiniLM-L6-v2", "open_clip/ViT-B-32/openai"])
+        items = [_FakeItem(clip, "1"), _FakeItem(unknown, "2"), _FakeItem(skipped, "3"), _FakeItem(mini_lm, "4"),
+                 _FakeItem(None, "5")]
+
+        keep = model_affinity.models_to_keep(items, is_skipped=lambda item: item.cls is skipped)
+
+        mini_lm_models = tuple(mini_lm.index_models)
+        self.assertEqual({clip: mini_lm_models, unknown: mini_lm_models, skipped: mini_lm_models, mini_lm: ()}, keep)
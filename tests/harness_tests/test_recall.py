@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pytest
+from marqo import Client
+
+from tests.benchmarks.recall import (RecallEvaluator, SPACE_TYPES, custom_vector_index_settings, exact_top_k,
+                                     load_vectors, recall_at_k)
+from tests.dirty_tracking import DirtyIndexTracker
+from tests.marqo_standin import StandinMarqoServer
+
+
+def brute_force_top_k(corpus, queries, k, space_type):
+    corpus, queries = corpus.astype(np.float64), queries.astype(np.float64)
+    if space_type == "euclidean":
+        scores = -((queries[:, None, :] - corpus[None, :, :]) ** 2).sum(axis=2)
+    else:
+        if space_type in ("angular", "prenormalized-angular"):
+            corpus = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+        scores = queries @ corpus.T
+    return np.argsort(-scores, axis=1, kind="stable")[:, :k]
+
+
+@pytest.mark.fixed
+class TestRecall(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.corpus = rng.standard_normal((1000, 16)).astype(np.float32)
+        self.queries = rng.standard_normal((30, 16)).astype(np.float32)
+
+    def test_exact_top_k_matches_brute_force(self):
+        for space_type in SPACE_TYPES:
+            with self.subTest(space_type):
+                expected = brute_force_top_k(self.corpus, self.queries, 10, space_type)
+                # Blocks that do not divide the corpus or the queries evenly, and smaller than k
+                np.testing.assert_array_equal(expected, exact_top_k(
+                    self.corpus, self.queries, 10, space_type, block_size=7, query_block_size=4))
+                np.testing.assert_array_equal(expected, exact_top_k(self.corpus, self.queries, 10, space_type))
+
+    def test_exact_top_k_of_a_memory_mapped_corpus(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "corpus.npy")
+            np.save(path, self.corpus)
+            corpus = load_vectors(path)
+            self.assertIsInstance(corpus, np.memmap)
+            np.testing.assert_array_equal(exact_top_k(self.corpus, self.queries, 5),
+                                          exact_top_k(corpus, self.queries, 5, block_size=100))
+            self.assertEqual((30, 3), exact_top_k(corpus[:3], self.queries, 5).shape)
+
+            np.save(path, np.arange(10))
+            with self.assertRaises(ValueError):
+                load_vectors(path)
+        with self.assertRaises(ValueError):
+            exact_top_k(self.corpus, self.queries[:, :8])
+
+    def test_recall_at_k(self):
+        truth = np.array([[1, 2, 3, 4], [5, 6, 7, 8]])
+        results = np.array([[4, 3, 9, 1], [5, -1, -1, -1]])
+        np.testing.assert_array_equal([0.75, 0.25], recall_at_k(results, truth, 4))
+        np.testing.assert_array_equal([0.0, 0.5], recall_at_k(results, truth, 2))
+
+    def test_evaluates_against_marqo(self):
+        with StandinMarqoServer() as server:
+            client = Client(url=server.url)
+            client.create_index("recall_index", settings_dict=custom_vector_index_settings(16))
+            evaluator = RecallEvaluator(client, server.url, "recall_index", k=10)
+            tracker = DirtyIndexTracker()
+            tracker.mark_clean(["recall_index"])
+            ingested = evaluator.ingest(self.corpus, batch_size=100, progress_interval_s=0,
+                                        dirty_index_tracker=tracker)
+            self.assertEqual(1000, ingested["documents"])
+            # A pooled index is cleared before it is leased again
+            self.assertFalse(tracker.is_clean("recall_index"))
+
+            truth = exact_top_k(self.corpus, self.queries, 10)
+            result = evaluator.evaluate(self.queries, truth, ef_search=64, warmup_queries=2)
+            # The stand-in searches exhaustively
+            self.assertEqual({"mean": 1.0, "min": 1.0, "p10": 1.0, "p50": 1.0}, result["recall"])
+            self.assertEqual((10, 64, 30, 30), (result["k"], result["ef_search"], result["queries"], result["count"]))
+            self.assertIn("p99", result["latency_ms"])
+
+            shuffled = truth[::-1]
+            self.assertLess(evaluator.evaluate(self.queries, shuffled, warmup_queries=0)["recall"]["mean"], 0.5)
@@ -0,0 +1,69 @@
+import unittest
+from unittest import mock
+
+import pytest
+from marqo.errors import MarqoWebError
+
+from tests.marqo_test import MarqoTestCase
+
+
+@pytest.mark.fixed
+class TestRemoveAllModels(unittest.TestCase):
+
+    def setUp(self):
+        self.index = mock.Mock()
+        self.index.get_cpu_info.side_effect = [{"memory_used_gb": "3.5"}, {"memory_used_gb": "2.25"}]
+        self.client = mock.Mock()
+        self.client.get_indexes.return_value = {"results": [{"indexName": f"index_{i}"} for i in range(23)]}
+        self.client.index.return_value = self.index
+        patches = [
+            mock.patch("tests.marqo_test.Client", return_value=self.client),
+            mock.patch.object(MarqoTestCase, "client_settings", {"url": "http://localhost:8882"}, create=True),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_models_are_fetched_once_and_ejected_once(self):
+        self.index.get_loaded_models.return_value = {"models": [
+            {"model_name": "open_clip/ViT-B-32/openai", "model_device": "cpu"},
+            {"model_name": "open_clip/ViT-B-32/openai", "model_device": "cpu"},
+            {"model_name": "open_clip/ViT-B-32/openai", "model_device": "cuda"},
+            {"model_name": "hf/all-MiniLM-L6-v2", "model_device": "cpu"},
+        ]}
+
+        summary = MarqoTestCase.removeAllModels()
+
+        self.index.get_loaded_models.assert_called_once()
+        self.assertEqual(3, self.index.eject_model.call_count)
+        self.assertEqual(3, len(summary["models_ejected"]))
+        self.assertEqual([], summary["models_failed"])
+        self.assertEqual(1.25, summary["memory_freed_gb"])
+
+    def test_kept_models_are_not_ejected(self):
+        self.index.get_loaded_models.return_value = {"models": [
+            {"model_name": "open_clip/ViT-B-32/openai", "model_device": "cpu"},
+            {"model_name": "hf/e5-base-v2", "model_device": "cpu"},
+        ]}
+
+        summary = MarqoTestCase.removeAllModels(keep=("hf/e5-base-v2",))
+
+        self.index.eject_model.assert_called_once_with(model_name="open_clip/ViT-B-32/openai", model_device="cpu")
+        self.assertEqual([("open_clip/ViT-B-32/openai", "cpu")], summary["models_ejected"])
+
+    def test_failed_ejection_is_retried_then_reported(self):
+        self.index.get_loaded_models.return_value = {"models": [
+            {"model_name": "hf/all-MiniLM-L6-v2", "model_device": "cpu"},
+        ]}
+        self.index.eject_model.side_effect = MarqoWebError("model_not_in_cache")
+
+        summary = MarqoTestCase.removeAllModels()
+
+        self.assertEqual(2, self.index.eject_model.call_count)
+        self.assertEqual([("hf/all-MiniLM-L6-v2", "cpu")], summary["models_failed"])
+
+    def test_no_indexes(self):
+        self.client.get_indexes.return_value = {"results": []}
+        summary = MarqoTestCase.removeAllModels()
+        self.assertEqual([], summary["models_ejected"])
+        self.index.get_loaded_models.assert_not_called()
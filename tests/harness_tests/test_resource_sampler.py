@@ -0,0 +1,73 @@
+import json
+import subprocess
+import time
+import unittest
+from unittest import mock
+
+import pytest
+from marqo import Client
+
+from tests.marqo_standin import StandinMarqoServer
+from tests.resource_sampler import ResourceSampler, parse_memory_gb, parse_number
+
+
+@pytest.mark.fixed
+class TestResourceSampler(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StandinMarqoServer().start()
+        cls.client = Client(url=cls.server.url)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def test_parse(self):
+        self.assertEqual(12.5, parse_number("12.5 %"))
+        self.assertEqual(3.0, parse_number("3 GB"))
+        self.assertIsNone(parse_number(None))
+        self.assertAlmostEqual(1.5 * 1024 ** 3 / 1e9, parse_memory_gb("1.5GiB "))
+        self.assertAlmostEqual(0.512, parse_memory_gb("512MB"))
+        self.assertIsNone(parse_memory_gb("--"))
+
+    def test_samples_marqo_in_the_background(self):
+        self.client.create_index("sampler_index", model="random/small")
+        self.addCleanup(self.client.delete_index, "sampler_index")
+
+        with ResourceSampler(self.server.url, interval_s=0.02, use_docker=False) as sampler:
+            start = sampler.now()
+            time.sleep(0.1)
+            self.client.index("sampler_index").add_documents(
+                [{"_id": str(i), "title": f"document {i}"} for i in range(50)], tensor_fields=["title"])
+            time.sleep(0.1)
+            end = sampler.now()
+
+        summary = sampler.summarize(start, end)
+        self.assertEqual({"marqo_cpu_percent", "marqo_memory_gb", "marqo_memory_percent", "loaded_models"},
+                         set(summary))
+        memory = summary["marqo_memory_gb"]
+        self.assertGreater(memory["count"], 3)
+        self.assertGreater(memory["last"], memory["first"])
+        self.assertEqual(memory["last"], memory["peak"])
+        self.assertEqual(1, summary["loaded_models"]["last"])
+        series = sampler.series(start, end)["marqo_memory_gb"]
+        self.assertEqual(memory["count"], len(series))
+        self.assertEqual(sorted(series), series)
+        self.assertEqual({}, sampler.summarize(end + 10, end + 20))
+
+    def test_unreachable_marqo(self):
+        sampler = ResourceSampler("http://localhost:1", use_docker=False)
+        self.assertEqual({}, sampler.sample_marqo())
+
+    def test_docker_stats(self):
+        lines = [{"Name": "marqo", "CPUPerc": "150.25%", "MemUsage": "2GiB / 15GiB"},
+                 {"Name": "other", "CPUPerc": "1%", "MemUsage": "1GiB / 15GiB"}]
+        completed = subprocess.CompletedProcess([], 0, stdout="\n".join(json.dumps(line) for line in lines))
+        sampler = ResourceSampler(self.server.url, use_docker=True)
+        with mock.patch("subprocess.run", return_value=completed):
+            metrics = sampler.sample_docker()
+        self.assertEqual({"marqo_container_cpu_percent": 150.25,
+                          "marqo_container_memory_gb": 2 * 1024 ** 3 / 1e9}, metrics)
+        with mock.patch("subprocess.run", side_effect=FileNotFoundError):
+            self.assertEqual({}, sampler.sample_docker())
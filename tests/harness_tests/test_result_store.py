@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pytest
+
+from tests.benchmarks import reporting
+from tests.benchmarks.result_store import BenchmarkResultStore, compare, compare_metric, main
+
+
+def _metadata(image):
+    return {"image": image, "branch": "mainline", "testing_configuration": "DOCKER_MARQO",
+            "host_fingerprint": "host", "timestamp": "2024-01-01T00:00:00"}
+
+
+def _case(name, latencies_s, duration_s=1.0):
+    return {"name": name, "params": {"limit": 10}, **reporting.summarize_latencies(latencies_s, duration_s)}
+
+
+@pytest.mark.fixed
+class TestBenchmarkResultStore(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "results.sqlite")
+        self.store = BenchmarkResultStore(self.path)
+        self.addCleanup(self.store.close)
+        rng = np.random.default_rng(0)
+        self.baseline_latencies = list(rng.normal(0.020, 0.001, 200))
+        self.slower_latencies = list(rng.normal(0.030, 0.001, 200))
+
+    def test_save_and_read_runs(self):
+        first = self.store.save_run("search", _metadata("old"), [_case("tensor", [0.01, 0.02])])
+        second = self.store.save_run("search", _metadata("old"), [_case("tensor", [0.03])])
+        self.store.save_run("search", _metadata("new"), [_case("tensor", [0.04])])
+        self.assertEqual([second, first], [run["id"] for run in self.store.runs(image="old")])
+        self.assertEqual([second], [run["id"] for run in self.store.runs(last=1, image="old")])
+        with self.assertRaises(ValueError):
+            self.store.runs(colour="blue")
+
+        cases = self.store.cases([first, second])
+        self.assertEqual(1, len(cases))
+        (benchmark, key), runs = next(iter(cases.items()))
+        self.assertEqual("search", benchmark)
+        self.assertEqual('tensor {"limit": 10}', key)
+        self.assertEqual([[10.0, 20.0], [30.0]], sorted(case["samples_ms"] for case in runs))
+
+    def test_compare_metric_from_samples(self):
+        baseline = [_case("tensor", self.baseline_latencies)]
+        comparison = compare_metric(baseline, [_case("tensor", self.slower_latencies)], "p50")
+        self.assertAlmostEqual(50, comparison["change_pct"], delta=5)
+        self.assertLess(comparison["ci_pct"][0], comparison["change_pct"])
+        self.assertGreater(comparison["ci_pct"][1], comparison["change_pct"])
+        self.assertGreater(comparison["ci_pct"][0], 40)
+
+        unchanged = compare_metric(baseline, baseline, "p99")
+        self.assertEqual(0, unchanged["change_pct"])
+        self.assertLessEqual(unchanged["ci_pct"][0], 0)
+        self.assertGreaterEqual(unchanged["ci_pct"][1], 0)
+
+    def test_compare_metric_without_samples(self):
+        def open_loop_case(p99):
+            return {"name": "rate", "latency_ms": {"p99": p99}, "throughput_per_s": 10}
+
+        comparison = compare_metric([open_loop_case(10), open_loop_case(12)], [open_loop_case(22)], "p99")
+        self.assertEqual(100, comparison["change_pct"])
+        self.assertIsNone(compare_metric([open_loop_case(10)], [open_loop_case(10)], "items_per_s"))
+
+    def test_compare_and_thresholds(self):
+        self.store.save_run("search", _metadata("old"), [_case("tensor", self.baseline_latencies, 4.0)])
+        self.store.save_run("search", _metadata("new"), [_case("tensor", self.slower_latencies, 6.0),
+                                                         _case("lexical", [0.01])])
+        rows = compare(self.store, {"image": "old"}, {"image": "new"}, {"*": 10, "p99": 80})
+        by_metric = {row["metric"]: row for row in rows}
+        self.assertEqual({"tensor"}, {row["case"].split()[0] for row in rows})
+        self.assertTrue(by_metric["p50"]["regression"])
+        self.assertFalse(by_metric["p99"]["regression"])
+        # Throughput went down by a third, which is a regression
+        self.assertAlmostEqual(-33.33, by_metric["throughput_per_s"]["change_pct"], places=1)
+        self.assertTrue(by_metric["throughput_per_s"]["regression"])
+
+        self.assertEqual(1, main(["--db", self.path, "compare", "--baseline", "image=old", "--candidate",
+                                  "image=new", "--threshold", "10"]))
+        self.assertEqual(0, main(["--db", self.path, "compare", "--baseline", "image=old", "--candidate",
+                                  "image=old"]))
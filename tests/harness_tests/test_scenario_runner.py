@@ -0,0 +1,81 @@
+import copy
+import os
+import random
+import unittest
+
+import pytest
+
+from tests.benchmarks import scenario_runner
+from tests.marqo_standin import StandinMarqoServer
+
+SCENARIO = {
+    "name": "small",
+    "workers": 2,
+    "indexes": {"docs": {"type": "structured", "model": "random/small",
+                         "allFields": [{"name": "title", "type": "text", "features": ["lexical_search"]},
+                                       {"name": "score", "type": "float", "features": ["score_modifier"]}],
+                         "tensorFields": ["title"]}},
+    "corpus": [{"index": "docs", "documents": 20, "fields": {"title": {"type": "text", "words": 5},
+                                                             "score": {"type": "float", "min": 0, "max": 1}}}],
+    "operations": [
+        {"type": "search", "index": "docs", "weight": 5, "queries": ["rocket", "ocean"]},
+        {"type": "add_documents", "index": "docs", "weight": 2, "batchSize": 2},
+        {"type": "update_documents", "index": "docs", "weight": 2, "batchSize": 2},
+        {"type": "delete_documents", "index": "docs", "weight": 1},
+        {"type": "get_stats", "index": "docs", "weight": 1},
+    ],
+    "phases": [{"name": "first", "rate": 40, "duration": 0.5}, {"name": "second", "rate": 80, "duration": 0.5}],
+}
+
+
+@pytest.mark.fixed
+class TestScenarioRunner(unittest.TestCase):
+
+    def test_bundled_scenarios_are_valid(self):
+        for file_name in os.listdir(scenario_runner.SCENARIOS_DIR):
+            with self.subTest(file_name):
+                scenario = scenario_runner.load_scenario(os.path.join(scenario_runner.SCENARIOS_DIR, file_name))
+                self.assertTrue(scenario["phases"])
+
+    def test_invalid_scenarios(self):
+        test_cases = [
+            (lambda s: s.pop("phases"), "missing `phases`"),
+            (lambda s: s["operations"].append({"type": "reindex", "index": "docs"}), "Unknown operation type"),
+            (lambda s: s["operations"][0].update(index="other"), "not in `indexes`"),
+            (lambda s: s["operations"][0].pop("queries"), "needs `queries`"),
+            (lambda s: s["phases"][0].update(rate=0), "positive `rate`"),
+            (lambda s: s["corpus"][0]["fields"]["title"].update(type="image"), "has type `image`"),
+            (lambda s: s["corpus"][0].update(batchSize=129), "batchSize of the corpus of `docs`"),
+            (lambda s: s["operations"][0].update(batchSize=0), "batchSize of operation `search` on `docs`"),
+            (lambda s: s["operations"][0].update(batchSize="16"), "from 1 to 128, got `16`"),
+        ]
+        for change, message in test_cases:
+            with self.subTest(message):
+                scenario = copy.deepcopy(SCENARIO)
+                change(scenario)
+                with self.assertRaises(ValueError) as e:
+                    scenario_runner.validate_scenario(scenario)
+                self.assertIn(message, str(e.exception))
+
+    def test_generate_document(self):
+        fields = {"title": {"type": "text", "words": 3}, "n": {"type": "int", "min": 1, "max": 1},
+                  "c": {"type": "choice", "values": ["a"]}, "b": {"type": "bool"}}
+        doc = scenario_runner.generate_document(fields, random.Random(0), "id")
+        self.assertEqual(3, len(doc["title"].split()))
+        self.assertEqual({"_id": "id", "n": 1, "c": "a"}, {k: doc[k] for k in ["_id", "n", "c"]})
+        self.assertIsInstance(doc["b"], bool)
+
+    def test_run_scenario_against_the_standin(self):
+        with StandinMarqoServer() as server:
+            result = scenario_runner.run_scenario(SCENARIO, server.url)
+            self.assertEqual({"results": []}, server.marqo.handle("GET", "/indexes", {}, None))
+
+        self.assertEqual(2, result["workers"])
+        self.assertEqual(["first", "second"], [phase["name"] for phase in result["phases"]])
+        self.assertEqual({"rate_per_s": 40, "duration_s": 0.5}, result["phases"][0]["params"])
+        first, second = result["phases"]
+        self.assertEqual(20, first["sent"])
+        self.assertEqual(40, second["sent"])
+        self.assertEqual(0, first["errors"] + second["errors"], first["error_samples"] + second["error_samples"])
+        self.assertEqual(second["sent"], sum(operation["count"] for operation in second["operations"].values()))
+        self.assertIn("search", second["operations"])
@@ -0,0 +1,127 @@
+import io
+import sys
+import time
+import unittest
+import zipfile
+from unittest import mock
+
+import pytest
+
+from scripts import start_vespa
+from scripts.vespa_standin import StandinVespa, StandinVespaServer
+
+
+@pytest.mark.fixed
+class TestStartVespa(unittest.TestCase):
+
+    def standin(self, **kwargs) -> StandinVespaServer:
+        server = StandinVespaServer(StandinVespa(**kwargs)).start()
+        self.addCleanup(server.stop)
+        return server
+
+    def readiness(self, server, timeout_s=10.0):
+        readiness = start_vespa.VespaReadiness(server.config_url, server.query_url, timeout_s=timeout_s)
+        self.addCleanup(readiness.stop)
+        return readiness
+
+    def test_phases_follow_readiness(self):
+        server = self.standin(config_delay_s=0.3, activation_delay_s=0.1, deploy_failures=2)
+        readiness = self.readiness(server)
+        readiness.start_probes()
+        with mock.patch.object(readiness, "_container_running", return_value=True):
+            readiness.wait_container_running()
+        readiness.wait_config_server()
+        self.assertTrue(start_vespa.deploy_application_package(*start_vespa.generate_application_package(),
+                                                               readiness))
+        readiness.wait_serving()
+
+        phases = dict(readiness.log.phases)
+        self.assertEqual(["container up", "config server ready", "deployed", "serving"], list(phases))
+        # The config server is seen soon after it is up, and the package is deployed after the failed attempts
+        self.assertLess(phases["config server ready"], 0.3 + 0.5)
+        self.assertEqual(3, server.vespa.deploys)
+        self.assertEqual(["deploy requested", "deploy failed", "deploy requested", "deploy failed",
+                          "deploy requested", "activated"], [event for event, _ in server.vespa.events])
+        # Serving is seen soon after the query API comes up
+        self.assertLess(phases["serving"] - phases["deployed"], 0.1 + 0.2)
+        self.assertIn("serving at", readiness.log.summary())
+
+    def test_times_out(self):
+        server = self.standin(config_delay_s=60)
+        readiness = self.readiness(server, timeout_s=0.3)
+        readiness.start_probes()
+        with self.assertRaises(TimeoutError):
+            readiness.wait_config_server()
+        with mock.patch.object(readiness, "_container_running", return_value=False), \
+                self.assertRaises(TimeoutError):
+            readiness.wait_container_running()
+
+    def test_never_serving_times_out(self):
+        server = self.standin(never_serve=True)
+        readiness = self.readiness(server, timeout_s=0.5)
+        readiness.start_probes()
+        readiness.wait_config_server()
+        self.assertTrue(start_vespa.deploy_application_package(*start_vespa.generate_application_package(),
+                                                               readiness))
+        with self.assertRaisesRegex(TimeoutError, "deployed at"):
+            readiness.wait_serving()
+
+    def test_rejected_package(self):
+        server = self.standin()
+        readiness = self.readiness(server)
+        with self.assertRaisesRegex(RuntimeError, "rejected.*not a zip file"):
+            start_vespa.deploy_application_package(b"zip", "hash", readiness)
+        with mock.patch.object(start_vespa, "get_test_vespa_client_schema_content", return_value="schema other {}"), \
+                self.assertRaisesRegex(RuntimeError, "must define `schema test_vespa_client`"):
+            start_vespa.deploy_application_package(*start_vespa.generate_application_package(), readiness)
+        self.assertIsNone(server.vespa.activated_at)
+
+    def test_application_package(self):
+        package, content_hash = start_vespa.generate_application_package()
+        # The same content gives the same zip and hash
+        self.assertEqual((package, content_hash), start_vespa.generate_application_package())
+        with zipfile.ZipFile(io.BytesIO(package)) as archive:
+            self.assertEqual(["schemas/test_vespa_client.sd", "services.xml"], archive.namelist())
+            services_xml = archive.read("services.xml").decode()
+        self.assertTrue(services_xml.startswith('<?xml version="1.0" encoding="utf-8" ?>\n'))
+        self.assertIn(f"<!-- application-package-hash: {content_hash} -->", services_xml)
+        files = start_vespa.application_package_files()
+        files["services.xml"] += "<!-- changed -->"
+        self.assertNotEqual(content_hash, start_vespa.package_hash(files))
+
+    def test_skips_deploying_an_unchanged_package(self):
+        server = self.standin()
+        package, content_hash = start_vespa.generate_application_package()
+        self.assertIsNone(start_vespa.active_package_hash(server.config_url))
+        self.assertTrue(start_vespa.deploy_application_package(package, content_hash, self.readiness(server)))
+        self.assertEqual(content_hash, start_vespa.active_package_hash(server.config_url))
+
+        readiness = self.readiness(server)
+        self.assertFalse(start_vespa.deploy_application_package(package, content_hash, readiness))
+        self.assertEqual(1, server.vespa.deploys)
+        self.assertEqual(["deploy skipped (unchanged)"], [phase for phase, _ in readiness.log.phases])
+
+        schema = start_vespa.get_test_vespa_client_schema_content().replace(
+            "field id type string", "field year type int {\n indexing: attribute\n }\n field id type string")
+        with mock.patch.object(start_vespa, "get_test_vespa_client_schema_content", return_value=schema):
+            self.assertTrue(start_vespa.deploy_application_package(*start_vespa.generate_application_package(),
+                                                                   self.readiness(server)))
+        self.assertEqual(2, server.vespa.deploys)
+
+    def test_main_without_docker(self):
+        server = self.standin(config_delay_s=0.2, activation_delay_s=0.1)
+        argv = ["start_vespa.py", "--no-docker", "--config-url", server.config_url, "--query-url",
+                server.query_url, "--timeout", "10"]
+        with mock.patch.object(sys, "argv", argv), mock.patch("os.system") as system:
+            start_vespa.main()
+        system.assert_not_called()
+        self.assertTrue(server.vespa.serving())
+
+    def test_poll_until_backs_off(self):
+        calls = []
+        self.assertFalse(start_vespa.poll_until(lambda: calls.append(time.monotonic()) and False,
+                                                time.monotonic() + 0.5, initial_interval=0.01, max_interval=0.2))
+        intervals = [later - earlier for earlier, later in zip(calls, calls[1:])]
+        self.assertLess(intervals[0], intervals[-2])
+        self.assertLess(max(intervals), 0.3)
+        self.assertTrue(start_vespa.poll_until(lambda: True, time.monotonic()))
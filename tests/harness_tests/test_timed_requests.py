@@ -0,0 +1,25 @@
+import unittest
+from unittest import mock
+
+import pytest
+from marqo._httprequests import HttpRequests
+
+from tests.benchmarks.benchmark_case import timed_requests
+
+
+@pytest.mark.fixed
+class TestTimedRequests(unittest.TestCase):
+
+    def test_only_matching_requests_are_timed(self):
+        http_requests = HttpRequests.__new__(HttpRequests)
+        with mock.patch.object(HttpRequests, "send_request", return_value={"errors": False}) as mock_send:
+            with timed_requests("/documents") as latencies:
+                res = http_requests.post("indexes/my_index/documents", body=[{"_id": "1"}])
+                http_requests.get("indexes/my_index/stats")
+                http_requests.post("indexes/my_index/documents", body=[{"_id": "2"}])
+            self.assertIs(mock_send, HttpRequests.send_request)
+
+        self.assertEqual({"errors": False}, res)
+        self.assertEqual(3, mock_send.call_count)
+        self.assertEqual(2, len(latencies))
+        self.assertTrue(all(latency >= 0 for latency in latencies))
@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+
+import pytest
+from marqo import Client
+from marqo.errors import MarqoWebError
+
+from tests.benchmarks.jsonl_reader import JsonlFile
+from tests.benchmarks.traces import TraceRecorder, TraceReplayer, load_trace
+from tests.endpoints import endpoint_of, index_of
+from tests.marqo_standin import StandinMarqoServer
+
+
+@pytest.mark.fixed
+class TestTracePaths(unittest.TestCase):
+
+    def test_index_of(self):
+        self.assertEqual("my_index", index_of("/indexes/my_index/search"))
+        self.assertEqual("my_index", index_of("indexes/my_index"))
+        self.assertEqual("", index_of("/indexes/bulk/search"))
+        self.assertEqual("", index_of("/batch/indexes/create"))
+        self.assertEqual("", index_of("/models"))
+
+    def test_endpoint_of(self):
+        self.assertEqual("/indexes/{index}/search", endpoint_of("/indexes/my_index/search"))
+        self.assertEqual("/indexes/{index}/documents", endpoint_of("/indexes/my_index/documents?refresh=false"))
+        self.assertEqual("/indexes/{index}/documents/{id}", endpoint_of("/indexes/my_index/documents/doc1"))
+        self.assertEqual("/indexes/{index}/documents/delete-batch",
+                         endpoint_of("/indexes/my_index/documents/delete-batch"))
+
+
+@pytest.mark.fixed
+class TestTraceRecordAndReplay(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StandinMarqoServer().start()
+        cls.client = Client(url=cls.server.url)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        fd, self.trace_path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(fd)
+        self.addCleanup(os.remove, self.trace_path)
+
+    def record(self):
+        with TraceRecorder(self.trace_path, self.server.url) as recorder:
+            self.client.create_index("trace_index", model="random/small")
+            index = self.client.index("trace_index")
+            index.add_documents([{"_id": "1", "title": "rocket launch"}, {"_id": "2", "title": "newspaper"}],
+                                tensor_fields=["title"])
+            index.search("rocket")
+            with self.assertRaises(MarqoWebError):
+                index.get_document("missing")
+            self.client.delete_index("trace_index")
+        return recorder
+
+    def test_records_requests(self):
+        recorder = self.record()
+        trace = load_trace(self.trace_path)
+        self.assertEqual(recorder.records, len(trace))
+        requests_sent = [(record["method"], endpoint_of(record["path"]), record["status"]) for record in trace]
+        self.assertIn(("POST", "/indexes/{index}/search", 200), requests_sent)
+        self.assertIn(("GET", "/indexes/{index}/documents/{id}", 404), requests_sent)
+        search = next(record for record in trace if record["path"].endswith("/search"))
+        self.assertEqual("trace_index", search["index"])
+        self.assertEqual("rocket", search["body"]["q"])
+        self.assertEqual(sorted(record["t"] for record in trace), [record["t"] for record in trace])
+
+    def test_replay_matches_recording(self):
+        self.record()
+        trace = load_trace(self.trace_path)
+        for speed in [0, 5]:
+            with self.subTest(speed=speed):
+                report = TraceReplayer(trace, self.server.url, speed=speed, index_suffix=f"_{speed}").run()
+                self.assertEqual(len(trace), report["requests"])
+                self.assertEqual(0, report["status_mismatches"], report["mismatch_samples"])
+                self.assertEqual(1, report["endpoints"]["POST /indexes/{index}/search"]["count"])
+        self.assertNotIn("trace_index_0", [index["indexName"] for index in self.client.get_indexes()["results"]])
+
+    def test_replay_from_jsonl_file(self):
+        self.record()
+        with JsonlFile(self.trace_path) as trace_file:
+            self.addCleanup(os.remove, trace_file.index_path)
+            report = TraceReplayer(trace_file.lines(0, len(trace_file)), self.server.url, speed=0,
+                                   index_suffix="_jsonl").run()
+            self.assertEqual(len(trace_file), report["requests"])
+            self.assertEqual(0, report["status_mismatches"], report["mismatch_samples"])
+
+    def test_replay_reports_status_mismatches(self):
+        self.record()
+        trace = load_trace(self.trace_path)
+        # Without the creation of the index, every request on it fails
+        trace = [record for record in trace if not (record["method"] == "POST" and
+                                                    endpoint_of(record["path"]) == "/indexes/{index}")]
+        report = TraceReplayer(trace, self.server.url, speed=0).run()
+        self.assertGreater(report["status_mismatches"], 0)
+        self.assertEqual(404, report["mismatch_samples"][0]["replayed_status"])
+
+    def test_negative_speed(self):
+        with self.assertRaises(ValueError):
+            TraceReplayer([], self.server.url, speed=-1)
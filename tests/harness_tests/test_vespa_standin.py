@@ -0,0 +1,108 @@
+import io
+import time
+import unittest
+import zipfile
+
+import pytest
+import requests
+
+from scripts import start_vespa
+from scripts.vespa_standin import (CONTENT_PATH, DEPLOY_PATH, StandinVespa, StandinVespaServer,
+                                   VespaStandinError, validate_application_package, validate_schema)
+
+
+def _package(files) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+@pytest.mark.fixed
+class TestVespaStandin(unittest.TestCase):
+
+    def setUp(self):
+        self.files = start_vespa.application_package_files()
+
+    def assertInvalid(self, files, message):
+        with self.assertRaisesRegex(VespaStandinError, message) as context:
+            validate_application_package(_package(files))
+        self.assertEqual(400, context.exception.status)
+        self.assertEqual("INVALID_APPLICATION_PACKAGE", context.exception.error_code)
+
+    def test_validates_services_xml(self):
+        _, document_types = validate_application_package(_package(self.files))
+        self.assertEqual(["test_vespa_client"], document_types)
+
+        self.assertInvalid({"schemas/test_vespa_client.sd": self.files["schemas/test_vespa_client.sd"]},
+                           "services.xml is missing")
+        self.assertInvalid({**self.files, "services.xml": "<services>"}, "not valid XML")
+        self.assertInvalid({**self.files, "services.xml": "<application/>"}, "must be <services>")
+        self.assertInvalid({**self.files, "services.xml": '<services version="1.0"/>'}, "<container> or a <content>")
+        services = self.files["services.xml"]
+        self.assertInvalid({**self.files, "services.xml": services.replace('type="test_vespa_client"', 'type="other"')},
+                           "document type other, which has no schemas/other.sd")
+        self.assertInvalid({**self.files, "services.xml": services.replace('mode="index"', 'mode="fast"')},
+                           "unknown mode `fast`")
+
+    def test_validates_schemas(self):
+        schema = self.files["schemas/test_vespa_client.sd"]
+        validate_schema("test_vespa_client", schema)
+        for content, message in [
+            (schema + "}", "unmatched"),
+            (schema.rstrip().rstrip("}"), "1 unclosed"),
+            (schema.replace("schema test_vespa_client", "schema other"), "must define `schema test_vespa_client`"),
+            (schema.replace("document test_vespa_client", "document other"), "must have a `document"),
+            (schema.replace("field title type string", "field title type text"), "field title .* unknown type"),
+        ]:
+            with self.subTest(message=message), self.assertRaisesRegex(VespaStandinError, message):
+                validate_schema("test_vespa_client", content)
+        for field_type in ["array<string>", "map<string, array<int>>", "tensor<float>(x[384])",
+                           "weightedset<string>", "reference<other>"]:
+            with self.subTest(field_type=field_type):
+                validate_schema("test_vespa_client", schema.replace("type string", f"type {field_type}", 1))
+
+    def test_deploys_and_serves_documents(self):
+        vespa = StandinVespa(activation_delay_s=0.2)
+        with StandinVespaServer(vespa) as server:
+            self.assertEqual(404, requests.get(f"{server.config_url}{CONTENT_PATH}services.xml").status_code)
+            response = requests.post(f"{server.config_url}{DEPLOY_PATH}", data=b"not a zip")
+            self.assertEqual(400, response.status_code)
+            self.assertEqual("INVALID_APPLICATION_PACKAGE", response.json()["error-code"])
+
+            package, _ = start_vespa.generate_application_package()
+            response = requests.post(f"{server.config_url}{DEPLOY_PATH}", data=package)
+            self.assertEqual("1", response.json()["session-id"])
+            with zipfile.ZipFile(io.BytesIO(package)) as archive:
+                self.assertEqual(archive.read("services.xml"),
+                                 requests.get(f"{server.config_url}{CONTENT_PATH}services.xml").content)
+            # The query/document API comes up activation_delay_s after the deploy
+            self.assertEqual(503, requests.get(f"{server.query_url}/state/v1/health").status_code)
+            self.assertFalse(vespa.serving())
+            self.assertTrue(start_vespa.poll_until(vespa.serving, vespa.activated_at + 1))
+            self.assertEqual("up", requests.get(f"{server.query_url}/state/v1/health").json()["status"]["code"])
+
+            document = f"{server.query_url}/document/v1/ns/test_vespa_client/docid/1"
+            self.assertEqual(404, requests.get(document).status_code)
+            requests.post(document, json={"fields": {"title": "a", "contents": "b"}}).raise_for_status()
+            requests.put(document, json={"fields": {"title": "c"}}).raise_for_status()
+            response = requests.get(document).json()
+            self.assertEqual("id:ns:test_vespa_client::1", response["id"])
+            self.assertEqual({"title": "c", "contents": "b"}, response["fields"])
+            requests.delete(document).raise_for_status()
+            self.assertEqual(404, requests.get(document).status_code)
+            self.assertEqual(400, requests.get(f"{server.query_url}/document/v1/ns/other/docid/1").status_code)
+        self.assertEqual(["deploy requested", "deploy rejected", "deploy requested", "activated"],
+                         [event for event, _ in vespa.events])
+
+    def test_config_server_starts_after_its_delay(self):
+        with StandinVespaServer(StandinVespa(config_delay_s=0.3)) as server:
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                requests.get(f"{server.config_url}/state/v1/health")
+            self.assertTrue(start_vespa.poll_until(lambda: start_vespa._is_healthy(server.config_url),
+                                                   time.monotonic() + 1.0))
+        # Stopping before the delay has passed does not wait for it
+        server = StandinVespaServer(StandinVespa(config_delay_s=60)).start()
+        server.stop()
+
@@ -0,0 +1,94 @@
+import json
+import os
+import socket
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import pytest
+
+from scripts import wait_for_marqo
+from scripts.wait_for_marqo import MarqoReadiness, models_to_preload
+from tests.marqo_standin import StandinMarqoServer
+
+
+@pytest.mark.fixed
+class TestWaitForMarqo(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandinMarqoServer().start()
+        self.addCleanup(self.server.stop)
+
+    def test_times_each_phase(self):
+        started_at = time.time() - 1.0
+        timings = MarqoReadiness(self.server.url, timeout_s=10, started_at=started_at).wait()
+
+        self.assertEqual(["accepting connections", "root endpoint", "healthy"], list(timings["phases_s"]))
+        # The phases are measured from started_at
+        self.assertGreaterEqual(timings["phases_s"]["accepting connections"], 1.0)
+        self.assertEqual(timings["phases_s"]["healthy"], timings["duration_s"])
+        self.assertAlmostEqual(timings["duration_s"], sum(timings["phase_durations_s"].values()), places=2)
+        self.assertIsNotNone(timings["version"])
+
+    def test_waits_for_health(self):
+        handle = self.server.marqo.handle
+        healthy_at = time.monotonic() + 0.3
+        health_requests = []
+
+        def starting_handle(method, path, query, body):
+            if path == "/health":
+                health_requests.append(path)
+                if time.monotonic() < healthy_at:
+                    return {"status": "red", "inference": {"status": "green"}, "backend": {"status": "red"}}
+            return handle(method, path, query, body)
+
+        with mock.patch.object(self.server.marqo, "handle", starting_handle):
+            readiness = MarqoReadiness(self.server.url, timeout_s=10)
+            readiness.wait()
+        self.assertGreaterEqual(time.monotonic(), healthy_at)
+        # Polls back off, rather than running every 0.1s or faster
+        self.assertLess(len(health_requests), 10)
+
+        with mock.patch.object(self.server.marqo, "handle", starting_handle):
+            healthy_at = time.monotonic() + 60
+            with self.assertRaisesRegex(TimeoutError, "waiting for `healthy`.*backend is red"):
+                MarqoReadiness(self.server.url, timeout_s=0.3).wait()
+
+    def test_waits_for_models(self):
+        with self.assertRaisesRegex(TimeoutError, r"models \['hf/e5-base-v2'\] are not loaded"):
+            MarqoReadiness(self.server.url, timeout_s=0.3, models=["hf/e5-base-v2"]).wait()
+        self.server.marqo.loaded_models[("hf/e5-base-v2", "cpu")] = True
+        timings = MarqoReadiness(self.server.url, timeout_s=10, models=["hf/e5-base-v2"]).wait()
+        self.assertIn("models loaded", timings["phases_s"])
+
+    def test_diagnoses_a_marqo_that_does_not_start(self):
+        with socket.socket() as unused:
+            unused.bind(("127.0.0.1", 0))
+            url = f"http://127.0.0.1:{unused.getsockname()[1]}"
+        with self.assertRaisesRegex(TimeoutError, "waiting for `accepting connections`.*ConnectionError"):
+            MarqoReadiness(url, timeout_s=0.3).wait()
+
+        with mock.patch.object(wait_for_marqo, "container_status", return_value="exited"), \
+                mock.patch("subprocess.run", return_value=mock.Mock(stdout="Traceback ...", stderr="")), \
+                self.assertRaisesRegex(RuntimeError, "container is exited(.|\n)*Traceback"):
+            MarqoReadiness(url, timeout_s=10, container="marqo").wait()
+
+    def test_models_to_preload(self):
+        self.assertIsNone(models_to_preload(["-e", "MARQO_ENABLE_BATCH_APIS=TRUE"]))
+        self.assertEqual([], models_to_preload(["-e", "MARQO_MODELS_TO_PRELOAD=[]"]))
+        self.assertEqual(["hf/e5-base-v2", "my-model"], models_to_preload([
+            "-eMARQO_MODELS_TO_PRELOAD=[\"a\"]",
+            "-e", 'MARQO_MODELS_TO_PRELOAD=["hf/e5-base-v2", {"model": "my-model", "modelProperties": {}}]',
+        ]))
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.dict(os.environ, {"MARQO_API_TESTS_BENCHMARK_DIR": directory}):
+            output = os.path.join(directory, "startup.json")
+            self.assertEqual(0, wait_for_marqo.main(["--url", self.server.url, "--output", output, "--record",
+                                                     "--", "-e", "MARQO_MODELS_TO_PRELOAD=[]"]))
+            with open(output) as f:
+                self.assertEqual("startup", json.load(f)["name"])
+            self.assertTrue(any(name.startswith("marqo_startup_") for name in os.listdir(directory)))
+            self.assertEqual(1, wait_for_marqo.main(["--url", self.server.url, "--timeout", "0.3", "--model", "x"]))
@@ -0,0 +1,200 @@
+"""A pytest plugin that accounts for the HTTP calls each test makes, to find where the suite's time goes.
+
+Enabled with `pytest --http-accounting` (see conftest.py). Every request sent through `requests` to Marqo is
+attributed to the test and phase (setup, call or teardown) running at the time, with its endpoint, bytes sent and
+received and wall time. Requests sent by the marqo client (`HttpRequests`) are told apart from the harness's own
+calls (`create_indexes`, `clear_indexes`, raw `requests` calls), so that e.g. the cost of clearing indexes in setUp
+shows up under setup/harness. setUpClass is accounted to the setup of the first test of its class, and
+tearDownClass to the teardown of the last one. Requests made outside of a test, such as provisioning pooled
+indexes, are accounted to "<session>".
+
+At the end of the run the tests with the most HTTP time are printed with their top endpoints, and endpoints called
+many times within one phase of a test (the N+1 pattern, e.g. get_document in a loop) are flagged.
+"""
+import json
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from unittest import mock
+
+import pytest
+import requests
+from marqo._httprequests import HttpRequests
+
+from tests.endpoints import endpoint_of
+
+SESSION = "<session>"
+
+
+def _body_size(kwargs: Dict) -> int:
+    body = kwargs.get("data")
+    if body is None and kwargs.get("json") is not None:
+        body = json.dumps(kwargs["json"])
+    if isinstance(body, str):
+        body = body.encode()
+    return len(body) if isinstance(body, bytes) else 0
+
+
+class _Counter:
+    __slots__ = ("calls", "bytes_sent", "bytes_received", "time_s")
+
+    def __init__(self):
+        self.calls = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.time_s = 0.0
+
+    def add(self, bytes_sent: int, bytes_received: int, time_s: float) -> None:
+        self.calls += 1
+        self.bytes_sent += bytes_sent
+        self.bytes_received += bytes_received
+        self.time_s += time_s
+
+    def to_dict(self) -> Dict:
+        return {"calls": self.calls, "bytes_sent": self.bytes_sent, "bytes_received": self.bytes_received,
+                "time_s": round(self.time_s, 4)}
+
+
+class HttpAccounting:
+    """Counts the requests sent to base_url per test, phase, source ("client" or "harness") and endpoint.
+
+    Args:
+        base_url: only requests to this URL are accounted
+        top: the number of tests printed at the end of the run
+        repeated_calls: the number of calls to one endpoint within one phase of a test from which it is flagged
+        output: if given, the accounting of every test is written to this JSON file
+    """
+
+    def __init__(self, base_url: str, top: int = 10, repeated_calls: int = 20, output: Optional[str] = None):
+        self.base_url = base_url.rstrip("/")
+        self.top = top
+        self.repeated_calls = repeated_calls
+        self.output = output
+        # (test, phase) -> (source, endpoint) -> counter
+        self.counters: Dict[Tuple[str, str], Dict[Tuple[str, str], _Counter]] = {}
+        # (test, phase) -> the wall time of the phase
+        self.phase_time_s: Dict[Tuple[str, str], float] = {}
+        # The test and phase running now. Not thread-local, as the harness sends requests from worker threads
+        # (e.g. clear_indexes) and tests run one at a time.
+        self._current: Tuple[str, str] = (SESSION, "")
+        self._client_call = threading.local()
+        self._lock = threading.Lock()
+        self._patches = []
+
+    def install(self) -> "HttpAccounting":
+        send_request = HttpRequests.send_request
+        request = requests.Session.request
+        accounting = self
+
+        def client_send_request(http_requests, *args, **kwargs):
+            accounting._client_call.active = True
+            try:
+                return send_request(http_requests, *args, **kwargs)
+            finally:
+                accounting._client_call.active = False
+
+        def accounted_request(session, method, url, *args, **kwargs):
+            if not str(url).startswith(accounting.base_url):
+                return request(session, method, url, *args, **kwargs)
+            source = "client" if getattr(accounting._client_call, "active", False) else "harness"
+            start = time.perf_counter()
+            bytes_received = 0
+            try:
+                response = request(session, method, url, *args, **kwargs)
+                bytes_received = len(response.content)
+                return response
+            finally:
+                accounting.add(source, f"{method.upper()} {endpoint_of(str(url)[len(accounting.base_url):])}",
+                               _body_size(kwargs), bytes_received, time.perf_counter() - start)
+
+        self._patches = [mock.patch.object(HttpRequests, "send_request", client_send_request),
+                         mock.patch.object(requests.Session, "request", accounted_request)]
+        for patch in self._patches:
+            patch.start()
+        return self
+
+    def uninstall(self) -> None:
+        for patch in reversed(self._patches):
+            patch.stop()
+        self._patches = []
+
+    def add(self, source: str, endpoint: str, bytes_sent: int, bytes_received: int, time_s: float) -> None:
+        with self._lock:
+            counters = self.counters.setdefault(self._current, {})
+            counters.setdefault((source, endpoint), _Counter()).add(bytes_sent, bytes_received, time_s)
+
+    def _phase(self, item, phase: str):
+        self._current = (item.nodeid, phase)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_time_s[(item.nodeid, phase)] = time.perf_counter() - start
+            self._current = (SESSION, "")
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_setup(self, item):
+        yield from self._phase(item, "setup")
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        yield from self._phase(item, "call")
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_teardown(self, item):
+        yield from self._phase(item, "teardown")
+
+    def report(self) -> Dict[str, Dict]:
+        """The accounting of every test: totals, and per phase the totals, wall time, sources and endpoints."""
+        tests: Dict[str, Dict] = {}
+        for (test, phase), counters in self.counters.items():
+            entry = tests.setdefault(test, {"total": _Counter(), "phases": {}})
+            phase_total, sources = _Counter(), {}
+            for (source, endpoint), counter in counters.items():
+                for total in (entry["total"], phase_total, sources.setdefault(source, _Counter())):
+                    total.calls += counter.calls
+                    total.bytes_sent += counter.bytes_sent
+                    total.bytes_received += counter.bytes_received
+                    total.time_s += counter.time_s
+            entry["phases"][phase or SESSION] = {
+                **phase_total.to_dict(),
+                "wall_time_s": round(self.phase_time_s.get((test, phase), 0.0), 4),
+                "sources": {source: counter.to_dict() for source, counter in sorted(sources.items())},
+                "endpoints": {f"{source} {endpoint}": counter.to_dict() for (source, endpoint), counter in
+                              sorted(counters.items(), key=lambda item: -item[1].time_s)},
+            }
+        return {test: {**entry["total"].to_dict(), "phases": entry["phases"]} for test, entry in tests.items()}
+
+    def repeated_endpoints(self) -> List[Tuple[str, str, str, int]]:
+        """The (test, phase, endpoint, calls) called at least repeated_calls times within one phase."""
+        repeated = []
+        for (test, phase), counters in self.counters.items():
+            for (source, endpoint), counter in counters.items():
+                if counter.calls >= self.repeated_calls:
+                    repeated.append((test, phase or SESSION, f"{source} {endpoint}", counter.calls))
+        return sorted(repeated, key=lambda row: -row[3])
+
+    def pytest_terminal_summary(self, terminalreporter):
+        report = self.report()
+        if self.output:
+            with open(self.output, "w") as f:
+                json.dump(report, f, indent=2)
+        if not report:
+            return
+        total_calls = sum(test["calls"] for test in report.values())
+        total_time = sum(test["time_s"] for test in report.values())
+        terminalreporter.write_sep("-", f"HTTP accounting: {total_calls} requests, {total_time:.1f}s")
+        for test, entry in sorted(report.items(), key=lambda item: -item[1]["time_s"])[:self.top]:
+            phases = ", ".join(f"{phase} {values['calls']} calls/{values['time_s']:.2f}s"
+                               for phase, values in entry["phases"].items())
+            terminalreporter.write_line(f"{entry['time_s']:.2f}s {entry['calls']} calls {test} ({phases})")
+            endpoints = sorted(((endpoint, values) for phase in entry["phases"].values()
+                                for endpoint, values in phase["endpoints"].items()),
+                               key=lambda item: -item[1]["time_s"])
+            for endpoint, values in endpoints[:3]:
+                terminalreporter.write_line(f"    {values['time_s']:.2f}s {values['calls']}x {endpoint}")
+        repeated = self.repeated_endpoints()
+        if repeated:
+            terminalreporter.write_line(f"Endpoints called {self.repeated_calls}+ times within one phase of a test:")
+            for test, phase, endpoint, calls in repeated[:self.top]:
+                terminalreporter.write_line(f"    {calls}x {endpoint} in {test} ({phase})")
@@ -0,0 +1,64 @@
+"""A keep-alive HTTP session for the harness calls the test suite makes directly against Marqo.
+
+The Marqo client already pools its own connections. The harness calls (batch index create/delete,
+delete-all) used bare `requests` calls, which open a fresh TCP connection every time. `PooledSession`
+keeps those connections alive and counts how many were opened versus reused.
+
+Settings are read from environment variables so they can be tuned per tox environment:
+    MARQO_API_TESTS_HTTP_POOL_SIZE: max connections kept alive per host (default 10)
+    MARQO_API_TESTS_HTTP_RETRIES: retries on connection errors only (default 3)
+    MARQO_API_TESTS_HTTP_CONNECT_TIMEOUT: seconds to wait for a connection (default 5)
+    MARQO_API_TESTS_HTTP_READ_TIMEOUT: seconds to wait for a response (default 600, index creation is slow)
+"""
+import os
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class PooledSession(requests.Session):
+    """A `requests.Session` with a sized connection pool, connection retries and a default timeout."""
+
+    def __init__(self, pool_size: int = 10, retries: int = 3,
+                 timeout: Tuple[float, Optional[float]] = (5, 600), backoff_factor: float = 0.2):
+        super().__init__()
+        self.timeout = timeout
+        # Only connection errors are retried. Read and status retries could resend a non-idempotent
+        # request (e.g. a batch index create) that the server already processed.
+        retry = Retry(total=retries, connect=retries, read=0, status=0, backoff_factor=backoff_factor)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+
+    @classmethod
+    def from_env(cls) -> "PooledSession":
+        return cls(
+            pool_size=int(os.environ.get("MARQO_API_TESTS_HTTP_POOL_SIZE", 10)),
+            retries=int(os.environ.get("MARQO_API_TESTS_HTTP_RETRIES", 3)),
+            timeout=(float(os.environ.get("MARQO_API_TESTS_HTTP_CONNECT_TIMEOUT", 5)),
+                     float(os.environ.get("MARQO_API_TESTS_HTTP_READ_TIMEOUT", 600)))
+        )
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+    def connection_stats(self) -> Dict[str, int]:
+        """Returns the number of requests sent, and connections opened and reused, across all hosts."""
+        requests_sent = 0
+        connections_opened = 0
+        for adapter in set(self.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                requests_sent += pool.num_requests
+                connections_opened += pool.num_connections
+        return {
+            "requests_sent": requests_sent,
+            "connections_opened": connections_opened,
+            "connections_reused": max(requests_sent - connections_opened, 0)
+        }
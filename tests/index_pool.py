@@ -0,0 +1,156 @@
+"""A session-level pool of Marqo indexes, keyed by a fingerprint of their settings.
+
+Deploying a Vespa schema is the slowest part of creating an index, and many test classes create indexes
+with identical settings. A class that declares its indexes in `MarqoTestCase.pooled_indexes` leases a clean
+index with matching settings from this pool, and returns it in tearDownClass. The next class that asks for
+the same settings gets the already-deployed index instead of creating a new one. All pooled indexes are
+deleted at the end of the pytest session.
+
+The indexes declared by every collected class can also be provisioned up front (see `IndexPool.provision`
+and tests/conftest.py), so schema deployments happen in a few large batch calls before the first test.
+"""
+import hashlib
+import json
+import threading
+import uuid
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List
+
+
+class IndexPool:
+    """Creates, leases and reuses indexes by settings fingerprint.
+
+    The pool does not talk to Marqo itself. It is given the functions used to create, delete and clear
+    a batch of indexes, so it can be shared by every test class and tested without a Marqo instance.
+    """
+
+    def __init__(self, create_indexes: Callable[[List[Dict]], None], delete_indexes: Callable[[List[str]], None],
+                 clear_indexes: Callable[[List[str]], None], name_prefix: str = "pooled"):
+        self._create_indexes = create_indexes
+        self._delete_indexes = delete_indexes
+        self._clear_indexes = clear_indexes
+        self._name_prefix = name_prefix
+        self._lock = threading.Lock()
+        # fingerprint -> names of created indexes that are not leased
+        self._available: Dict[str, List[str]] = defaultdict(list)
+        # index name -> fingerprint, for every index the pool has created
+        self._fingerprints: Dict[str, str] = {}
+        self._leased: set = set()
+
+    @staticmethod
+    def fingerprint(index_settings: Dict) -> str:
+        """Returns a canonical hash of the index settings, ignoring "indexName"."""
+        settings = {key: value for key, value in index_settings.items() if key != "indexName"}
+        canonical = json.dumps(settings, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _new_index_name(self, fingerprint: str) -> str:
+        return f"{self._name_prefix}_{fingerprint[:12]}_{uuid.uuid4().hex[:8]}"
+
+    def lease(self, index_settings: List[Dict]) -> List[str]:
+        """Leases one clean index per item of index_settings, creating the missing ones in a single batch.
+
+        Returns:
+            The leased index names, in the same order as index_settings.
+        """
+        names: List[str] = []
+        reused: List[str] = []
+        to_create: List[Dict] = []
+        with self._lock:
+            for settings in index_settings:
+                fingerprint = self.fingerprint(settings)
+                if self._available[fingerprint]:
+                    name = self._available[fingerprint].pop()
+                    reused.append(name)
+                else:
+                    name = self._new_index_name(fingerprint)
+                    to_create.append({**settings, "indexName": name})
+                self._leased.add(name)
+                names.append(name)
+
+        try:
+            if to_create:
+                self._create_indexes(to_create)
+        except Exception:
+            with self._lock:
+                self._leased.difference_update(names)
+                for name in reused:
+                    self._available[self._fingerprints[name]].append(name)
+            raise
+
+        with self._lock:
+            for settings in to_create:
+                self._fingerprints[settings["indexName"]] = self.fingerprint(settings)
+
+        # Indexes returned by a previous class may still hold its documents
+        if reused:
+            self._clear_indexes(reused)
+        return names
+
+    def provision(self, index_settings_per_class: List[List[Dict]], batch_size: int = 10) -> List[str]:
+        """Creates, in a few batch calls, every index the given classes will lease.
+
+        Classes run one after another and return their indexes to the pool, so each fingerprint needs as
+        many indexes as the class that uses it the most. Indexes the pool already has are counted.
+
+        Args:
+            index_settings_per_class: the index settings declared by each test class
+            batch_size: the maximum number of indexes created in one batch call
+
+        Returns:
+            The names of the indexes that were created.
+        """
+        required: Dict[str, int] = {}
+        settings_by_fingerprint: Dict[str, Dict] = {}
+        for index_settings in index_settings_per_class:
+            counts = Counter()
+            for settings in index_settings:
+                fingerprint = self.fingerprint(settings)
+                counts[fingerprint] += 1
+                settings_by_fingerprint[fingerprint] = settings
+            for fingerprint, count in counts.items():
+                required[fingerprint] = max(required.get(fingerprint, 0), count)
+
+        to_create: List[Dict] = []
+        with self._lock:
+            existing = Counter(self._fingerprints.values())
+            for fingerprint, count in required.items():
+                for _ in range(count - existing[fingerprint]):
+                    to_create.append({**settings_by_fingerprint[fingerprint],
+                                      "indexName": self._new_index_name(fingerprint)})
+
+        created: List[str] = []
+        for start in range(0, len(to_create), batch_size):
+            batch = to_create[start:start + batch_size]
+            self._create_indexes(batch)
+            with self._lock:
+                for settings in batch:
+                    fingerprint = self.fingerprint(settings)
+                    self._fingerprints[settings["indexName"]] = fingerprint
+                    self._available[fingerprint].append(settings["indexName"])
+            created.extend(settings["indexName"] for settings in batch)
+        return created
+
+    def release(self, index_names: List[str]) -> None:
+        """Returns leased indexes to the pool so that other classes can reuse them."""
+        with self._lock:
+            for name in index_names:
+                if name not in self._leased:
+                    raise ValueError(f"Index {name} is not leased from this pool")
+                self._leased.remove(name)
+                self._available[self._fingerprints[name]].append(name)
+
+    def index_names(self) -> List[str]:
+        """Returns the names of all indexes the pool has created."""
+        with self._lock:
+            return list(self._fingerprints)
+
+    def delete_all(self) -> None:
+        """Deletes every index the pool has created, in one batch call."""
+        with self._lock:
+            names = list(self._fingerprints)
+            self._fingerprints.clear()
+            self._available.clear()
+            self._leased.clear()
+        if names:
+            self._delete_indexes(names)
@@ -0,0 +1,277 @@
+"""Loads documents into an index from a lazy iterable through a bounded pool of concurrent batch requests.
+
+`add_documents(..., client_batch_size=N)` sends its batches one after another and needs the whole corpus in a
+list. IngestionPipeline instead reads documents from any iterable (e.g. CorpusGenerator.batches or a JSONL file)
+only as fast as batches complete, and keeps at most `max_in_flight` batches in flight, so a corpus of millions of
+documents loads at the server's pace with a few batches in memory:
+
+    pipeline = IngestionPipeline(url, index_name, batch_size=64, max_in_flight=8, tensor_fields=["title"])
+    result = pipeline.run(document for batch in CorpusGenerator(all_fields).batches(1_000_000) for document in batch)
+
+When Marqo pushes back, with a 429 or 5xx response or with 429/5xx items in a batch response, the throttled
+documents are retried after an exponential backoff with jitter and the number of batches in flight is halved. It
+then grows by one batch for every `limit` batches that succeed (additive increase, multiplicative decrease), up to
+max_in_flight. Progress (documents/s and vectors/s) is reported every progress_interval_s seconds.
+
+The documents are sent with a PooledSession rather than the client, so that the connection pool matches the
+number of batches in flight. They are therefore not seen by MarqoTestCase's dirty index tracking unless a
+dirty_index_tracker is passed.
+"""
+import itertools
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+import requests
+
+from tests.benchmarks.load_generator import LatencyHistogram
+from tests.dirty_tracking import DirtyIndexTracker
+from tests.http_session import PooledSession
+
+# Responses (and batch response items) with these statuses are retried
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class _AdaptiveLimit:
+    """A concurrency limit that halves when the server pushes back and grows back by one after `limit` successes."""
+
+    def __init__(self, maximum: int):
+        self.maximum = maximum
+        self.limit = maximum
+        self.in_flight = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._condition:
+            self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    def release(self) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def throttled(self) -> None:
+        with self._condition:
+            self.limit = max(1, self.limit // 2)
+            self._successes = 0
+
+    def succeeded(self) -> None:
+        with self._condition:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.maximum:
+                self.limit += 1
+                self._successes = 0
+                self._condition.notify_all()
+
+
+class IngestionPipeline:
+    """Adds documents to an index in concurrent batches, with bounded memory and backoff.
+
+    Args:
+        url: the Marqo URL
+        index_name: the index to add documents to
+        batch_size: the number of documents per add_documents request
+        max_in_flight: the maximum number of batches being sent at once, and so held in memory
+        tensor_fields, mappings: passed on to add_documents (tensor_fields is required for unstructured indexes)
+        max_retries: how many times a throttled batch or document is retried before it counts as failed
+        backoff_s: the first retry delay. It doubles with every retry of the same batch, up to max_backoff_s.
+        progress_interval_s: how often progress is reported. 0 disables progress reports.
+        on_progress: called with each progress report. Defaults to printing it.
+        dirty_index_tracker: if given, the index is marked dirty before the first batch is sent
+    """
+
+    def __init__(self, url: str, index_name: str, batch_size: int = 64, max_in_flight: int = 8,
+                 tensor_fields: Optional[List[str]] = None, mappings: Optional[Dict] = None, max_retries: int = 8,
+                 backoff_s: float = 0.5, max_backoff_s: float = 30.0, progress_interval_s: float = 10.0,
+                 on_progress: Optional[Callable[[Dict], None]] = None,
+                 dirty_index_tracker: Optional[DirtyIndexTracker] = None):
+        if batch_size < 1 or max_in_flight < 1:
+            raise ValueError("batch_size and max_in_flight must be at least 1")
+        self.url = url.rstrip("/")
+        self.index_name = index_name
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.tensor_fields = tensor_fields
+        self.mappings = mappings
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.progress_interval_s = progress_interval_s
+        self.on_progress = on_progress or (lambda progress: print(
+            f"Ingested {progress['documents']} documents into {self.index_name} ({progress['docs_per_s']} docs/s, "
+            f"{progress['vectors_per_s']} vectors/s, {progress['in_flight_limit']} batches in flight)"))
+        self.dirty_index_tracker = dirty_index_tracker
+        self._session = PooledSession(pool_size=max_in_flight)
+        self._lock = threading.Lock()
+
+    def _vectors(self) -> Optional[int]:
+        try:
+            response = self._session.get(f"{self.url}/indexes/{self.index_name}/stats")
+            return response.json()["numberOfVectors"] if response.ok else None
+        except (requests.RequestException, ValueError, KeyError):
+            return None
+
+    def _post(self, documents: List[Dict]) -> requests.Response:
+        body = {"documents": documents}
+        if self.tensor_fields is not None:
+            body["tensorFields"] = self.tensor_fields
+        if self.mappings is not None:
+            body["mappings"] = self.mappings
+        return self._session.post(f"{self.url}/indexes/{self.index_name}/documents", data=json.dumps(body),
+                                  headers={"Content-Type": "application/json"})
+
+    def _send_batch(self, documents: List[Dict], limit: _AdaptiveLimit, stats: Dict,
+                    latency: LatencyHistogram) -> None:
+        attempt = 0
+        # The documents of the batch counted as added or failed so far, so that the rest are counted as failed if
+        # something unexpected happens
+        settled = 0
+        total = len(documents)
+
+        def count(succeeded: int = 0, failed: int = 0, error: Optional[str] = None) -> None:
+            nonlocal settled
+            settled += succeeded + failed
+            self._count(stats, succeeded=succeeded, failed=failed, error=error)
+
+        try:
+            while documents:
+                start = time.perf_counter()
+                throttled: List[Dict] = []
+                error = None
+                try:
+                    response = self._post(documents)
+                    latency.record(time.perf_counter() - start)
+                    if response.status_code in RETRY_STATUSES:
+                        throttled, error = documents, f"{response.status_code}: {response.text[:200]}"
+                    elif not response.ok:
+                        count(failed=len(documents), error=f"{response.status_code}: {response.text[:200]}")
+                    else:
+                        items = response.json().get("items", [])
+                        # The items are in the order of the documents, which may not have an _id
+                        for document, item in zip(documents, items):
+                            status = item.get("status", 200)
+                            if status in RETRY_STATUSES:
+                                throttled.append(document)
+                            elif status >= 400:
+                                count(failed=1, error=item.get("message") or item.get("error"))
+                            else:
+                                count(succeeded=1)
+                        if len(items) < len(documents):
+                            count(failed=len(documents) - len(items),
+                                  error=f"{len(items)} items in the response to {len(documents)} documents")
+                        if throttled:
+                            error = f"{len(throttled)} documents throttled"
+                except requests.RequestException as e:
+                    throttled, error = documents, repr(e)
+
+                if not throttled:
+                    limit.succeeded()
+                    return
+                limit.throttled()
+                attempt += 1
+                if attempt > self.max_retries:
+                    count(failed=len(throttled), error=f"gave up after {self.max_retries} retries: {error}")
+                    return
+                self._count(stats, retries=1)
+                delay = min(self.max_backoff_s, self.backoff_s * 2 ** (attempt - 1))
+                # Full jitter, so that throttled workers do not retry in lockstep
+                time.sleep(random.uniform(delay / 2, delay))
+                documents = throttled
+        except Exception as e:
+            # E.g. a response body that is not JSON, or items of an unexpected shape
+            count(failed=total - settled, error=repr(e))
+
+    def _count(self, stats: Dict, succeeded: int = 0, failed: int = 0, retries: int = 0,
+               error: Optional[str] = None) -> None:
+        with self._lock:
+            stats["documents"] += succeeded
+            stats["failed"] += failed
+            stats["retries"] += retries
+            if error is not None and len(stats["error_samples"]) < 5:
+                stats["error_samples"].append(error)
+
+    def _progress(self, stats: Dict, start: float, vectors_before: Optional[int], limit: _AdaptiveLimit) -> Dict:
+        elapsed = time.perf_counter() - start
+        vectors = self._vectors()
+        vectors_added = None if vectors is None or vectors_before is None else vectors - vectors_before
+        with self._lock:
+            documents = stats["documents"]
+        return {
+            "documents": documents,
+            "elapsed_s": round(elapsed, 3),
+            "docs_per_s": round(documents / elapsed, 3) if elapsed > 0 else None,
+            "vectors": vectors_added,
+            "vectors_per_s": round(vectors_added / elapsed, 3) if vectors_added is not None and elapsed > 0 else None,
+            "in_flight_limit": limit.limit,
+        }
+
+    def run(self, documents: Iterable[Dict]) -> Dict:
+        """Adds all documents and returns the totals, throughput and batch latencies."""
+        if self.dirty_index_tracker is not None:
+            self.dirty_index_tracker.mark_dirty(self.index_name)
+        stats = {"documents": 0, "failed": 0, "retries": 0, "batches": 0, "error_samples": []}
+        latency = LatencyHistogram()
+        limit = _AdaptiveLimit(self.max_in_flight)
+        vectors_before = self._vectors()
+        done = threading.Event()
+        start = time.perf_counter()
+
+        def report_progress() -> None:
+            while not done.wait(self.progress_interval_s):
+                self.on_progress(self._progress(stats, start, vectors_before, limit))
+
+        reporter = None
+        if self.progress_interval_s > 0:
+            reporter = threading.Thread(target=report_progress, daemon=True, name="ingestion-progress")
+            reporter.start()
+
+        def send(batch: List[Dict]) -> None:
+            try:
+                self._send_batch(batch, limit, stats, latency)
+            finally:
+                limit.release()
+
+        futures = []
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+                iterator = iter(documents)
+                while True:
+                    # Waiting for a free slot before reading the next batch is what bounds memory
+                    limit.acquire()
+                    batch = list(itertools.islice(iterator, self.batch_size))
+                    if not batch:
+                        limit.release()
+                        break
+                    stats["batches"] += 1
+                    futures.append(executor.submit(send, batch))
+            # Raise anything a batch raised, rather than losing the batch
+            for future in futures:
+                future.result()
+        finally:
+            done.set()
+            if reporter is not None:
+                reporter.join()
+
+        progress = self._progress(stats, start, vectors_before, limit)
+        return {
+            **progress,
+            "failed": stats["failed"],
+            "batches": stats["batches"],
+            "retries": stats["retries"],
+            "error_samples": stats["error_samples"],
+            "batch_latency_ms": latency.summary()["latency_ms"],
+        }
+
+    def close(self) -> None:
+        self._session.close()
+
+    def __enter__(self) -> "IngestionPipeline":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
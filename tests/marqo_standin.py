@@ -0,0 +1,947 @@
+"""An in-process stand-in for the Marqo API, for running the harness and client paths without Docker.
+
+The stand-in serves the endpoints the suite and the Python client use (index create/delete, the batch index calls,
+documents add/update/get/delete/delete-all, search, stats, settings, health, models and device info) from memory.
+It is selected with TESTING_CONFIGURATION=STANDIN_MARQO, in which case conftest.py starts it on a free port (or on
+MARQO_API_TESTS_STANDIN_PORT) and points MarqoTestCase at it. It can also be run on its own:
+
+    python -m tests.marqo_standin --port 8882
+
+It is not a Marqo implementation. Embeddings are deterministic hash-based vectors (the sum of one random vector
+per token, seeded by the token), so documents that share words are close but there is no semantic similarity.
+Tensor search is a brute-force numpy kNN over these vectors, lexical search is BM25 over the text fields, and there
+is no chunking, so each tensor field has exactly one vector. Requests are validated as Marqo does (field names and
+types, integer ranges, filterable fields, score modifiers, request bodies), with Marqo's error codes and messages.
+Tests that check model output, scores, chunking, reranking or model loading fail against it, and the
+standin_marqo tox environment deselects them; it is meant for measuring the test harness and the client, and for
+fast iteration on tests that only check API behaviour.
+"""
+import argparse
+import copy
+import functools
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Collection, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+import numpy as np
+
+# The version reported at the root endpoint. The client checks it against its minimum supported version.
+MARQO_VERSION = "2.11.0"
+# The model Marqo uses for an index that does not set "model"
+DEFAULT_MODEL = "hf/e5-base-v2"
+MODEL_DIMENSIONS = {
+    "hf/e5-base-v2": 768,
+    "hf/e5-small-v2": 384,
+    "hf/e5-large-v2": 1024,
+    "hf/all-MiniLM-L6-v2": 384,
+    "sentence-transformers/all-MiniLM-L6-v2": 384,
+    "open_clip/ViT-B-32/openai": 512,
+    "open_clip/ViT-B-32/laion400m_e31": 512,
+    "ViT-B/32": 512,
+    "random/small": 32,
+    "random": 384,
+}
+DEFAULT_DIMENSIONS = 384
+# The maximum number of documents in one add or update request
+MAX_DOCUMENTS_PER_REQUEST = 128
+# The settings Marqo fills in for an index that does not set them, and those of unstructured indexes only
+DEFAULT_INDEX_SETTINGS = {
+    "normalizeEmbeddings": True,
+    "textPreprocessing": {"splitLength": 2, "splitOverlap": 0, "splitMethod": "sentence"},
+    "imagePreprocessing": {},
+    "vectorNumericType": "float",
+    "annParameters": {"spaceType": "prenormalized-angular", "parameters": {"efConstruction": 512, "m": 16}},
+}
+DEFAULT_UNSTRUCTURED_INDEX_SETTINGS = {"treatUrlsAndPointersAsImages": False, "filterStringMaxLength": 20}
+# Field names are letters, digits and underscores, not starting with a digit, and not one of Marqo's own fields
+_FIELD_NAME = re.compile(r"[a-zA-Z_][a-zA-Z0-9_]*")
+RESERVED_FIELD_NAMES = ("_tensor_facets", "_highlights", "_score", "_found")
+# The values of the numeric field types. Vespa uses the smallest int and long for missing values.
+INT_RANGE = (-2 ** 31 + 1, 2 ** 31 - 1)
+LONG_RANGE = (-2 ** 63 + 1, 2 ** 63 - 1)
+FLOAT_MAX = 3.4028235e38
+# Control characters that Vespa cannot index
+_UNPARSEABLE_CHARACTERS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+SCORE_MODIFIER_TYPES = ("multiply_score_by", "add_to_score")
+
+
+class StandinError(Exception):
+    """An error returned to the client as a Marqo error response."""
+
+    def __init__(self, status: int, code: str, message: str, error_type: str = "invalid_request"):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+        self.error_type = error_type
+
+    def to_dict(self) -> Dict:
+        return {"message": self.message, "code": self.code, "type": self.error_type, "link": ""}
+
+
+class StandinValidationError(StandinError):
+    """A request body that does not match the API's schema, returned like the 422 errors of Marqo's API framework."""
+
+    def __init__(self, location: List[str], message: str):
+        super().__init__(422, "unprocessable_entity", message)
+        self.location = location
+
+    def to_dict(self) -> Dict:
+        return {"detail": [{"loc": self.location, "msg": self.message, "type": "value_error"}]}
+
+
+def _tokens(text: str) -> List[str]:
+    return re.findall(r"\w+", text.lower())
+
+
+@functools.lru_cache(maxsize=65536)
+def _token_vector(token: str, dimensions: int) -> np.ndarray:
+    seed = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+    return np.random.default_rng(seed).standard_normal(dimensions).astype(np.float32)
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def hash_embedding(content: str, dimensions: int) -> np.ndarray:
+    """A deterministic unit vector for content: the normalized sum of one random vector per token."""
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for token in _tokens(content) or [content]:
+        vector += _token_vector(token, dimensions)
+    return _normalize(vector)
+
+
+class _FilterParser:
+    """Parses a Marqo filter string into a predicate over documents.
+
+    Supports `field:value`, `field:"quoted value"`, `field:(value with spaces)`, `field:[low TO high]`,
+    `field in (a, b)`, AND, OR, NOT, parentheses and backslash-escaped characters in values. If filterable_fields
+    is given, filtering on another field is an error, as it is for structured indexes.
+    """
+
+    def __init__(self, filter_string: str, filterable_fields: Optional[Collection[str]] = None):
+        self.text = filter_string
+        self.filterable_fields = filterable_fields
+        self.position = 0
+
+    def parse(self) -> Callable[[Dict], bool]:
+        predicate = self._or()
+        self._skip_spaces()
+        if self.position != len(self.text):
+            raise self._error("unexpected input")
+        return predicate
+
+    def _error(self, reason: str) -> StandinError:
+        return StandinError(400, "invalid_argument",
+                            f"Error parsing filter string `{self.text}` at position {self.position}: {reason}")
+
+    def _skip_spaces(self):
+        while self.position < len(self.text) and self.text[self.position].isspace():
+            self.position += 1
+
+    def _keyword(self, keyword: str) -> bool:
+        self._skip_spaces()
+        end = self.position + len(keyword)
+        if self.text[self.position:end] == keyword and (end == len(self.text) or self.text[end] in " ()"):
+            self.position = end
+            return True
+        return False
+
+    def _or(self) -> Callable[[Dict], bool]:
+        predicates = [self._and()]
+        while self._keyword("OR"):
+            predicates.append(self._and())
+        return predicates[0] if len(predicates) == 1 else lambda doc: any(p(doc) for p in predicates)
+
+    def _and(self) -> Callable[[Dict], bool]:
+        predicates = [self._not()]
+        while self._keyword("AND"):
+            predicates.append(self._not())
+        return predicates[0] if len(predicates) == 1 else lambda doc: all(p(doc) for p in predicates)
+
+    def _not(self) -> Callable[[Dict], bool]:
+        if self._keyword("NOT"):
+            predicate = self._not()
+            return lambda doc: not predicate(doc)
+        return self._primary()
+
+    def _primary(self) -> Callable[[Dict], bool]:
+        self._skip_spaces()
+        if self.position < len(self.text) and self.text[self.position] == "(":
+            self.position += 1
+            predicate = self._or()
+            self._skip_spaces()
+            if self.position >= len(self.text) or self.text[self.position] != ")":
+                raise self._error("expected `)`")
+            self.position += 1
+            return predicate
+        return self._term()
+
+    def _value(self, stop: str) -> str:
+        self._skip_spaces()
+        if self.position < len(self.text) and self.text[self.position] == '"':
+            end = self.text.find('"', self.position + 1)
+            if end == -1:
+                raise self._error("unterminated quote")
+            value = self.text[self.position + 1:end]
+            self.position = end + 1
+            return value
+        value = []
+        while self.position < len(self.text) and self.text[self.position] not in stop:
+            if self.text[self.position] == "\\" and self.position + 1 < len(self.text):
+                self.position += 1
+            value.append(self.text[self.position])
+            self.position += 1
+        if not value:
+            raise self._error("expected a value")
+        return "".join(value)
+
+    def _term(self) -> Callable[[Dict], bool]:
+        field = self._value(stop=": ()")
+        if self.filterable_fields is not None and field not in self.filterable_fields:
+            raise StandinError(400, "invalid_argument",
+                               f"Error parsing filter string `{self.text}`: the index has no filterable field "
+                               f"`{field}`. Available filterable fields are: {sorted(self.filterable_fields)}")
+        if self._keyword("in"):
+            values = self._in_values()
+            return lambda doc: any(_equals(field_value, value) for field_value in _field_values(doc, field)
+                                   for value in values)
+        if self.position >= len(self.text) or self.text[self.position] != ":":
+            raise self._error("expected `:`")
+        self.position += 1
+        if self.position < len(self.text) and self.text[self.position] == "(":
+            # A value with spaces: field:(two words)
+            end = self.text.find(")", self.position)
+            if end == -1:
+                raise self._error("expected `)`")
+            value = self.text[self.position + 1:end]
+            self.position = end + 1
+            return lambda doc: any(_equals(field_value, value) for field_value in _field_values(doc, field))
+        if self.position < len(self.text) and self.text[self.position] == "[":
+            self.position += 1
+            low = self._value(stop=" ]")
+            if not self._keyword("TO"):
+                raise self._error("expected `TO`")
+            high = self._value(stop=" ]")
+            self._skip_spaces()
+            if self.position >= len(self.text) or self.text[self.position] != "]":
+                raise self._error("expected `]`")
+            self.position += 1
+            return lambda doc: any(_in_range(value, low, high) for value in _field_values(doc, field))
+        value = self._value(stop=" ()")
+        return lambda doc: any(_equals(field_value, value) for field_value in _field_values(doc, field))
+
+    def _in_values(self) -> List[str]:
+        """Parses the `(a, b, c)` of a `field in (a, b, c)` term."""
+        self._skip_spaces()
+        if self.position >= len(self.text) or self.text[self.position] != "(":
+            raise self._error("expected `(`")
+        self.position += 1
+        values = [self._value(stop=",)")]
+        while self.position < len(self.text) and self.text[self.position] == ",":
+            self.position += 1
+            values.append(self._value(stop=",)"))
+        if self.position >= len(self.text) or self.text[self.position] != ")":
+            raise self._error("expected `)`")
+        self.position += 1
+        return [value.strip() for value in values]
+
+
+def _field_values(doc: Dict, field: str) -> List[Any]:
+    value = doc.get(field)
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _equals(field_value: Any, filter_value: str) -> bool:
+    if isinstance(field_value, bool):
+        return filter_value.lower() == str(field_value).lower()
+    if isinstance(field_value, (int, float)):
+        try:
+            return float(filter_value) == field_value
+        except ValueError:
+            return False
+    return str(field_value) == filter_value
+
+
+def _in_range(field_value: Any, low: str, high: str) -> bool:
+    if isinstance(field_value, bool) or not isinstance(field_value, (int, float)):
+        return False
+    return (low == "*" or float(low) <= field_value) and (high == "*" or field_value <= float(high))
+
+
+def parse_filter(filter_string: Optional[str],
+                 filterable_fields: Optional[Collection[str]] = None) -> Callable[[Dict], bool]:
+    if not filter_string:
+        return lambda doc: True
+    return _FilterParser(filter_string, filterable_fields).parse()
+
+
+def validate_field_name(name: Any) -> None:
+    if not isinstance(name, str) or name in RESERVED_FIELD_NAMES or not _FIELD_NAME.fullmatch(name):
+        raise StandinError(400, "invalid_field_name",
+                           f"Field name `{name}` is not valid. Field names can only contain letters, digits and "
+                           f"underscores, can not start with a digit and can not be one of "
+                           f"{list(RESERVED_FIELD_NAMES)}")
+
+
+def _invalid_value(name: str, value: Any, field_type: str) -> StandinError:
+    return StandinError(400, "invalid_argument", f"Invalid value `{value}` for field `{name}` of type `{field_type}`")
+
+
+def _string_value(name: str, value: str) -> str:
+    if _UNPARSEABLE_CHARACTERS.search(value):
+        raise StandinError(400, "invalid_argument",
+                           f"The document could not be indexed: Vespa could not parse field `{name}`, which contains "
+                           f"a control character")
+    return value
+
+
+def structured_value(name: str, value: Any, field_type: str) -> Any:
+    """Validates the value of a structured index field, and returns it as Marqo stores it."""
+    if field_type.startswith("array<"):
+        if not isinstance(value, list):
+            raise _invalid_value(name, value, field_type)
+        return [structured_value(name, item, field_type[len("array<"):-1]) for item in value]
+    if field_type in ("text", "image_pointer"):
+        if not isinstance(value, str):
+            raise _invalid_value(name, value, field_type)
+        return _string_value(name, value)
+    if field_type == "bool":
+        if not isinstance(value, bool):
+            raise _invalid_value(name, value, field_type)
+        return value
+    is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+    if field_type in ("int", "long"):
+        low, high = INT_RANGE if field_type == "int" else LONG_RANGE
+        if not is_number or not isinstance(value, int) or not low <= value <= high:
+            raise _invalid_value(name, value, field_type)
+        return value
+    if field_type in ("float", "double"):
+        if not is_number or not math.isfinite(value) or (field_type == "float" and abs(value) > FLOAT_MAX):
+            raise _invalid_value(name, value, field_type)
+        # A float is stored with single precision, and returned in its shortest representation
+        return float(str(np.float32(value))) if field_type == "float" else value
+    # custom_vector values are validated when they are embedded
+    return value
+
+
+def unstructured_value(name: str, value: Any) -> Any:
+    """Validates the value of an unstructured index field."""
+    if isinstance(value, str):
+        return _string_value(name, value)
+    if isinstance(value, list):
+        return [_string_value(name, item) if isinstance(item, str) else item for item in value]
+    if isinstance(value, int) and not isinstance(value, bool) and not LONG_RANGE[0] <= value <= LONG_RANGE[1]:
+        raise _invalid_value(name, value, "long")
+    if isinstance(value, float) and not math.isfinite(value):
+        raise _invalid_value(name, value, "double")
+    return value
+
+
+def _is_number(value: Any) -> bool:
+    """Whether value is a number, or a string the API would convert to one."""
+    if isinstance(value, bool):
+        return False
+    try:
+        float(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def validate_score_modifiers(score_modifiers: Any) -> None:
+    is_valid = isinstance(score_modifiers, dict) and set(score_modifiers) <= set(SCORE_MODIFIER_TYPES) and all(
+        isinstance(modifiers, list) and all(
+            isinstance(modifier, dict) and isinstance(modifier.get("field_name"), str) and
+            set(modifier) <= {"field_name", "weight"} and _is_number(modifier.get("weight", 1))
+            for modifier in modifiers)
+        for modifiers in score_modifiers.values())
+    if not is_valid:
+        raise StandinError(400, "invalid_argument",
+                           f"Invalid score_modifiers `{score_modifiers}`: score_modifiers can only have "
+                           f"{list(SCORE_MODIFIER_TYPES)}, each a list of {{field_name, weight}} objects")
+
+
+def _documents(body: Any) -> List:
+    """The `documents` of an add or update documents request body."""
+    documents = body.get("documents") if isinstance(body, dict) else None
+    if not isinstance(documents, list):
+        raise StandinValidationError(["body", "documents"], "value is not a valid list")
+    return documents
+
+
+class StandinIndex:
+    """The documents and vectors of one index."""
+
+    def __init__(self, name: str, settings: Dict):
+        self.name = name
+        index_type = settings.get("type", "unstructured")
+        self.settings = {"type": index_type, "model": DEFAULT_MODEL, **copy.deepcopy(DEFAULT_INDEX_SETTINGS),
+                         **(copy.deepcopy(DEFAULT_UNSTRUCTURED_INDEX_SETTINGS) if index_type == "unstructured" else {}),
+                         **settings}
+        self.settings.pop("indexName", None)
+        self.type = self.settings["type"]
+        self.model = self.settings["model"]
+        self.dimensions = (self.settings.get("modelProperties") or {}).get(
+            "dimensions", MODEL_DIMENSIONS.get(self.model, DEFAULT_DIMENSIONS))
+        if self.type == "structured":
+            self.settings["allFields"] = [{**field, "features": field.get("features", [])}
+                                          for field in self.settings.get("allFields", [])]
+            for field in self.settings["allFields"]:
+                validate_field_name(field["name"])
+        self.fields = {field["name"]: field for field in self.settings.get("allFields", [])}
+        if self.type == "structured":
+            unknown_tensor_fields = set(self.settings.get("tensorFields", [])) - set(self.fields)
+            if unknown_tensor_fields:
+                raise StandinError(400, "invalid_argument",
+                                   f"Tensor fields {sorted(unknown_tensor_fields)} are not in allFields")
+        self.documents: Dict[str, Dict] = {}
+        # _id -> tensor field -> (content, unit vector)
+        self.tensors: Dict[str, Dict[str, Tuple[str, np.ndarray]]] = {}
+        self._matrix: Optional[Tuple[np.ndarray, List[Tuple[str, str]]]] = None
+
+    @property
+    def number_of_vectors(self) -> int:
+        return sum(len(fields) for fields in self.tensors.values())
+
+    def memory_bytes(self) -> int:
+        return self.number_of_vectors * self.dimensions * 4
+
+    def _embed(self, content: Any) -> np.ndarray:
+        return hash_embedding(content if isinstance(content, str) else json.dumps(content), self.dimensions)
+
+    def _custom_vector(self, value: Any) -> Tuple[str, np.ndarray]:
+        if not isinstance(value, dict) or len(value.get("vector", [])) != self.dimensions:
+            raise StandinError(400, "invalid_argument",
+                               f"A custom vector must be an object with a `vector` of {self.dimensions} floats")
+        # Returned as given, and normalized for search with the other vectors
+        return value.get("content", ""), np.asarray(value["vector"], dtype=np.float32)
+
+    def _document_tensors(self, doc: Dict, tensor_fields: List[str],
+                          mappings: Dict) -> Dict[str, Tuple[str, np.ndarray]]:
+        tensors = {}
+        # The fields of the document in its order, then the multimodal combinations
+        fields = [field for field in doc if field in tensor_fields] + [field for field in tensor_fields
+                                                                       if field not in doc]
+        for field in fields:
+            field_type = (mappings.get(field) or {}).get("type")
+            if field_type == "multimodal_combination":
+                weights = mappings[field].get("weights", {})
+                present = {name: weight for name, weight in weights.items() if name in doc}
+                if present:
+                    combined = sum(weight * self._embed(doc[name]) for name, weight in present.items())
+                    tensors[field] = (json.dumps({name: doc[name] for name in present}), _normalize(combined))
+            elif field in doc:
+                if field_type == "custom_vector":
+                    tensors[field] = self._custom_vector(doc[field])
+                elif isinstance(doc[field], str):
+                    tensors[field] = (doc[field], self._embed(doc[field]))
+                elif isinstance(doc[field], list) and all(isinstance(item, str) for item in doc[field]):
+                    content = " ".join(doc[field])
+                    tensors[field] = (content, self._embed(content))
+        return tensors
+
+    def _structured_mappings(self) -> Dict:
+        mappings = {}
+        for name, field in self.fields.items():
+            if field["type"] == "multimodal_combination":
+                mappings[name] = {"type": "multimodal_combination", "weights": field.get("dependentFields", {})}
+            elif field["type"] == "custom_vector":
+                mappings[name] = {"type": "custom_vector"}
+        return mappings
+
+    def add_documents(self, body: Dict) -> Dict:
+        start = time.perf_counter()
+        documents = _documents(body)
+        if not documents:
+            raise StandinError(400, "bad_request", "Received empty add documents request")
+        if len(documents) > MAX_DOCUMENTS_PER_REQUEST:
+            raise StandinError(400, "invalid_argument",
+                               f"Number of docs in add documents request ({len(documents)}) exceeds limit of "
+                               f"{MAX_DOCUMENTS_PER_REQUEST}")
+        if self.type == "structured":
+            tensor_fields = self.settings.get("tensorFields", [])
+            mappings = self._structured_mappings()
+        else:
+            if body.get("tensorFields") is None:
+                raise StandinError(400, "bad_request", "tensor_fields must be explicitly provided for unstructured "
+                                                       "indexes")
+            tensor_fields = body["tensorFields"]
+            mappings = body.get("mappings") or {}
+
+        items = []
+        for doc in documents:
+            try:
+                _id, fields = self._validate_document(doc)
+                tensors = self._document_tensors(doc, tensor_fields, mappings)
+                stored = {name: (tensors[name][0] if (mappings.get(name) or {}).get("type") == "custom_vector"
+                                 else value) for name, value in fields.items()}
+                self.documents[_id] = {"_id": _id, **stored}
+                self.tensors[_id] = tensors
+                items.append({"_id": _id, "result": "created", "status": 200})
+            except StandinError as e:
+                items.append({"_id": doc.get("_id", "") if isinstance(doc, dict) else "", "status": e.status,
+                              "code": e.code, "message": e.message, "error": e.message})
+        self._matrix = None
+        return self._write_response(items, start)
+
+    def _validate_document(self, doc: Any) -> Tuple[str, Dict]:
+        """Validates a document, and returns its _id and its other fields as they are stored."""
+        if not isinstance(doc, dict):
+            raise StandinError(400, "invalid_argument", "Docs must be dicts")
+        _id = doc.get("_id", str(uuid.uuid4()))
+        if not isinstance(_id, str) or not _id:
+            raise StandinError(400, "invalid_document_id", f"Document _id must be a non-empty string, got `{_id}`")
+        fields = {}
+        for name, value in doc.items():
+            if name == "_id":
+                continue
+            if self.type == "structured":
+                if name not in self.fields:
+                    raise StandinError(400, "invalid_field_name",
+                                       f"Invalid field name `{name}`: it is not in the index schema")
+                fields[name] = structured_value(name, value, self.fields[name]["type"])
+            else:
+                validate_field_name(name)
+                fields[name] = unstructured_value(name, value)
+        return _id, fields
+
+    def update_documents(self, body: Dict) -> Dict:
+        start = time.perf_counter()
+        if self.type != "structured":
+            raise StandinError(400, "invalid_argument",
+                               "The update_documents API is not supported for unstructured indexes")
+        documents = _documents(body)
+        if len(documents) > MAX_DOCUMENTS_PER_REQUEST:
+            raise StandinError(400, "invalid_argument",
+                               f"Number of docs in update_documents request ({len(documents)}) exceeds limit of "
+                               f"{MAX_DOCUMENTS_PER_REQUEST}")
+        tensor_fields = set(self.settings.get("tensorFields", []))
+        dependent_fields = {name for field in self.fields.values() for name in field.get("dependentFields", {})}
+        items = []
+        for doc in documents:
+            try:
+                if not isinstance(doc, dict) or "_id" not in doc:
+                    raise StandinError(400, "invalid_argument", "'_id' is a required field but it does not exist")
+                _id, fields = self._validate_document(doc)
+                for name in fields:
+                    if name in tensor_fields:
+                        raise StandinError(400, "invalid_argument",
+                                           f"Cannot update field `{name}` as this is a tensor field")
+                    if name in dependent_fields:
+                        raise StandinError(400, "invalid_argument",
+                                           f"Cannot update field `{name}` as this is a dependent field of a "
+                                           f"multimodal combination field")
+                if _id not in self.documents:
+                    raise StandinError(404, "document_not_found", f"Document `{_id}` does not exist")
+                self.documents[_id].update(fields)
+                items.append({"_id": _id, "status": 200})
+            except StandinError as e:
+                items.append({"_id": doc.get("_id", "") if isinstance(doc, dict) else "", "status": e.status,
+                              "code": e.code, "message": e.message, "error": e.message})
+        return self._write_response(items, start)
+
+    def _write_response(self, items: List[Dict], start: float) -> Dict:
+        return {"errors": any(item["status"] >= 400 for item in items), "index_name": self.name, "items": items,
+                "processingTimeMs": (time.perf_counter() - start) * 1000}
+
+    def delete_documents(self, ids: List[str]) -> Dict:
+        if not ids:
+            raise StandinError(400, "bad_request", "The list of document ids to delete can't be empty")
+        started_at = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime())
+        start = time.perf_counter()
+        deleted = 0
+        for _id in ids:
+            if self.documents.pop(_id, None) is not None:
+                deleted += 1
+            self.tensors.pop(_id, None)
+        self._matrix = None
+        return {"index_name": self.name, "status": "succeeded", "type": "documentDeletion",
+                "items": [{"_id": _id, "status": 200, "result": "deleted"} for _id in ids],
+                "details": {"receivedDocumentIds": len(ids), "deletedDocuments": deleted},
+                "duration": f"PT{time.perf_counter() - start:.6f}S", "startedAt": started_at,
+                "finishedAt": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime())}
+
+    def delete_all_documents(self) -> Dict:
+        deleted = len(self.documents)
+        self.documents.clear()
+        self.tensors.clear()
+        self._matrix = None
+        return {"numberOfDeletedDocuments": deleted}
+
+    def get_document(self, _id: str, expose_facets: bool = False) -> Dict:
+        if _id not in self.documents:
+            raise StandinError(404, "document_not_found", f"Document `{_id}` does not exist")
+        doc = dict(self.documents[_id])
+        if expose_facets:
+            doc["_tensor_facets"] = [{field: content, "_embedding": vector.tolist()}
+                                     for field, (content, vector) in self.tensors[_id].items()]
+        return doc
+
+    def stats(self) -> Dict:
+        return {"numberOfDocuments": len(self.documents), "numberOfVectors": self.number_of_vectors,
+                "backend": {"memoryUsedPercentage": 0.0, "storageUsedPercentage": 0.0}}
+
+    def _vectors(self) -> Tuple[np.ndarray, List[Tuple[str, str]]]:
+        if self._matrix is None:
+            keys = [(_id, field) for _id, fields in self.tensors.items() for field in fields]
+            matrix = (np.stack([_normalize(self.tensors[_id][field][1]) for _id, field in keys]) if keys
+                      else np.zeros((0, self.dimensions), dtype=np.float32))
+            self._matrix = (matrix, keys)
+        return self._matrix
+
+    def _query_vector(self, q: Any, context: Optional[Dict]) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        if isinstance(q, str):
+            vector += self._embed(q)
+        elif isinstance(q, dict):
+            for query, weight in q.items():
+                vector += weight * self._embed(query)
+        for tensor in (context or {}).get("tensor", []):
+            if len(tensor.get("vector", [])) != self.dimensions:
+                raise StandinError(400, "invalid_argument",
+                                   f"Context vectors must have {self.dimensions} dimensions")
+            vector += tensor.get("weight", 1) * np.asarray(tensor["vector"], dtype=np.float32)
+        if q is None and not context:
+            raise StandinError(400, "invalid_argument", "One of Query(q) or context is required for tensor search")
+        return _normalize(vector)
+
+    def _lexical_fields(self, searchable_attributes: Optional[List[str]]) -> Optional[List[str]]:
+        if searchable_attributes is not None:
+            return searchable_attributes
+        if self.type == "structured":
+            return [name for name, field in self.fields.items() if "lexical_search" in field.get("features", [])]
+        return None
+
+    def search(self, body: Dict) -> Dict:
+        start = time.perf_counter()
+        search_method = (body.get("searchMethod") or "TENSOR").upper()
+        limit = body.get("limit", 10)
+        offset = body.get("offset", 0)
+        if not isinstance(limit, int) or limit < 1:
+            raise StandinError(400, "invalid_argument", "limit must be a positive integer")
+        if not isinstance(offset, int) or offset < 0:
+            raise StandinError(400, "invalid_argument", "offset must be a non-negative integer")
+        filterable_fields = None
+        if self.type == "structured":
+            filterable_fields = ["_id"] + [name for name, field in self.fields.items()
+                                           if "filter" in field.get("features", [])]
+        matches = parse_filter(body.get("filter"), filterable_fields)
+        if body.get("scoreModifiers") is not None:
+            validate_score_modifiers(body["scoreModifiers"])
+        searchable_attributes = body.get("searchableAttributes")
+
+        if search_method == "TENSOR":
+            scores, highlights = self._tensor_scores(body, matches, searchable_attributes)
+        elif search_method == "LEXICAL":
+            if not isinstance(body.get("q"), str):
+                raise StandinError(400, "invalid_argument", "Lexical search requires a string query")
+            scores = self._lexical_scores(body["q"], matches, self._lexical_fields(searchable_attributes))
+            highlights = {}
+        else:
+            raise StandinError(400, "invalid_argument", f"Unknown search method `{search_method}`")
+
+        scores = self._apply_score_modifiers(scores, body.get("scoreModifiers"))
+        ranked = sorted(scores.items(), key=lambda item: -item[1])[offset:offset + limit]
+        attributes_to_retrieve = body.get("attributesToRetrieve")
+        hits = []
+        for _id, score in ranked:
+            doc = self.documents[_id]
+            if attributes_to_retrieve is not None:
+                doc = {name: value for name, value in doc.items() if name in attributes_to_retrieve}
+            hit = {**doc, "_id": _id, "_score": float(score)}
+            if body.get("showHighlights", True):
+                hit["_highlights"] = [highlights[_id]] if _id in highlights else []
+            hits.append(hit)
+        return {"hits": hits, "query": body.get("q"), "limit": limit, "offset": offset,
+                "processingTimeMs": (time.perf_counter() - start) * 1000}
+
+    def _tensor_scores(self, body: Dict, matches: Callable[[Dict], bool],
+                       searchable_attributes: Optional[List[str]]) -> Tuple[Dict[str, float], Dict[str, Dict]]:
+        query = self._query_vector(body.get("q"), body.get("context"))
+        matrix, keys = self._vectors()
+        scores: Dict[str, float] = {}
+        highlights: Dict[str, Dict] = {}
+        if not keys:
+            return scores, highlights
+        similarities = matrix @ query
+        for position in np.argsort(-similarities):
+            _id, field = keys[position]
+            if _id in scores or (searchable_attributes is not None and field not in searchable_attributes):
+                continue
+            if not matches(self.documents[_id]):
+                continue
+            # Vectors are visited from the most similar, so the first vector of a document is its best one
+            scores[_id] = float(similarities[position])
+            highlights[_id] = {field: self.tensors[_id][field][0]}
+        return scores, highlights
+
+    def _lexical_scores(self, q: str, matches: Callable[[Dict], bool],
+                        fields: Optional[List[str]]) -> Dict[str, float]:
+        """BM25 over the text of the given fields (all string fields if fields is None)."""
+        query_tokens = set(_tokens(q))
+        documents = {}
+        for _id, doc in self.documents.items():
+            if not matches(doc):
+                continue
+            text = " ".join(value if isinstance(value, str) else " ".join(value)
+                            for name, value in doc.items()
+                            if name != "_id" and (fields is None or name in fields) and
+                            (isinstance(value, str) or
+                             (isinstance(value, list) and all(isinstance(item, str) for item in value))))
+            documents[_id] = _tokens(text)
+        if not documents or not query_tokens:
+            return {}
+        average_length = sum(len(tokens) for tokens in documents.values()) / len(documents) or 1
+        document_frequency = {token: sum(1 for tokens in documents.values() if token in tokens)
+                              for token in query_tokens}
+        scores = {}
+        k1, b = 1.2, 0.75
+        for _id, tokens in documents.items():
+            score = 0.0
+            for token in query_tokens:
+                frequency = tokens.count(token)
+                if frequency:
+                    idf = math.log(1 + (len(documents) - document_frequency[token] + 0.5) /
+                                   (document_frequency[token] + 0.5))
+                    score += idf * frequency * (k1 + 1) / (
+                            frequency + k1 * (1 - b + b * len(tokens) / average_length))
+            if score > 0:
+                scores[_id] = score
+        return scores
+
+    def _apply_score_modifiers(self, scores: Dict[str, float], score_modifiers: Optional[Dict]) -> Dict[str, float]:
+        if not score_modifiers:
+            return scores
+        modified = {}
+        for _id, score in scores.items():
+            doc = self.documents[_id]
+            for modifier in score_modifiers.get("multiply_score_by", []):
+                value = doc.get(modifier["field_name"])
+                if isinstance(value, (int, float)):
+                    score *= float(modifier.get("weight", 1)) * value
+            for modifier in score_modifiers.get("add_to_score", []):
+                value = doc.get(modifier["field_name"])
+                if isinstance(value, (int, float)):
+                    score += float(modifier.get("weight", 1)) * value
+            modified[_id] = score
+        return modified
+
+
+class StandinMarqo:
+    """The state of the stand-in: its indexes and the models they have loaded."""
+
+    def __init__(self):
+        self.indexes: Dict[str, StandinIndex] = {}
+        self.loaded_models: Dict[Tuple[str, str], bool] = {}
+        # One lock for all state: the stand-in is for correctness of the client paths, not for write throughput
+        self.lock = threading.RLock()
+
+    def index(self, name: str) -> StandinIndex:
+        if name not in self.indexes:
+            raise StandinError(404, "index_not_found", f"Index `{name}` does not exist")
+        self.loaded_models[(self.indexes[name].model, "cpu")] = True
+        return self.indexes[name]
+
+    def create_indexes(self, settings_list: List[Dict]) -> Dict:
+        names = [settings.get("indexName") for settings in settings_list]
+        for name in names:
+            if not isinstance(name, str) or not name:
+                raise StandinError(400, "invalid_index_name", f"Invalid index name `{name}`")
+            if name in self.indexes or names.count(name) > 1:
+                raise StandinError(409, "index_already_exists", f"Index `{name}` already exists")
+        created = {name: StandinIndex(name, settings) for name, settings in zip(names, settings_list)}
+        self.indexes.update(created)
+        return {"acknowledged": True, "indexes": names}
+
+    def delete_indexes(self, names: List[str]) -> Dict:
+        for name in names:
+            self.indexes.pop(name, None)
+        return {"acknowledged": True, "indexes": names}
+
+    def eject_model(self, model_name: str, model_device: str) -> Dict:
+        if self.loaded_models.pop((model_name, model_device), None) is None:
+            raise StandinError(404, "model_not_in_cache",
+                               f"The model_name `{model_name}` device `{model_device}` is not cached or found")
+        return {"result": "success",
+                "message": f"successfully eject model_name `{model_name}` from device `{model_device}`"}
+
+    def cpu_info(self) -> Dict:
+        memory_gb = (sum(index.memory_bytes() for index in self.indexes.values()) +
+                     sum(MODEL_DIMENSIONS.get(model, DEFAULT_DIMENSIONS) for model, _ in self.loaded_models) *
+                     1_000_000) / 1e9
+        return {"cpu_usage_percent": "0.0 %", "memory_used_percent": "0.0 %",
+                "memory_used_gb": str(round(memory_gb, 3))}
+
+    def handle(self, method: str, path: str, query: Dict[str, List[str]], body: Any) -> Any:
+        """Routes a request and returns the response body. Raises StandinError for error responses."""
+        parts = [unquote(part) for part in path.strip("/").split("/") if part]
+        with self.lock:
+            if not parts:
+                return {"message": "Welcome to Marqo", "version": MARQO_VERSION}
+            if parts == ["health"] or (len(parts) == 3 and parts[0] == "indexes" and parts[2] == "health"):
+                if len(parts) == 3:
+                    self.index(parts[1])
+                return {"status": "green", "inference": {"status": "green"},
+                        "backend": {"status": "green", "memoryIsAvailable": True, "storageIsAvailable": True}}
+            if parts == ["models"]:
+                if method == "DELETE":
+                    return self.eject_model(query.get("model_name", [""])[0], query.get("model_device", [""])[0])
+                return {"models": [{"model_name": model, "model_device": device}
+                                   for model, device in self.loaded_models]}
+            if parts == ["device", "cpu"]:
+                return self.cpu_info()
+            if parts == ["device", "cuda"]:
+                raise StandinError(400, "hardware_compatibility_error",
+                                   "ERROR: cuda is not supported in your machine!!", "invalid_request")
+            if parts[:2] == ["batch", "indexes"] and len(parts) == 3 and method == "POST":
+                if parts[2] == "create":
+                    return self.create_indexes(body)
+                if parts[2] == "delete":
+                    return self.delete_indexes(body)
+            if parts == ["indexes"] and method == "GET":
+                return {"results": [{"indexName": name} for name in self.indexes]}
+            if parts[0] == "indexes" and len(parts) >= 2:
+                return self._handle_index(method, parts[1], parts[2:], query, body)
+        raise StandinError(404, "not_found", f"{method} /{'/'.join(parts)} is not supported by the stand-in")
+
+    def _handle_index(self, method: str, name: str, parts: List[str], query: Dict[str, List[str]], body: Any) -> Any:
+        if not parts:
+            if method == "POST":
+                return self.create_indexes([{**(body or {}), "indexName": name}])
+            if method == "DELETE":
+                self.index(name)
+                return self.delete_indexes([name])
+        index = self.index(name)
+        expose_facets = query.get("expose_facets", ["false"])[0].lower() == "true"
+        if parts == ["stats"] and method == "GET":
+            return index.stats()
+        if parts == ["settings"] and method == "GET":
+            return index.settings
+        if parts == ["search"] and method == "POST":
+            return index.search(body or {})
+        if parts == ["documents"]:
+            if method == "POST":
+                return index.add_documents(body or {})
+            if method == "PATCH":
+                return index.update_documents(body or {})
+            if method == "GET":
+                results = []
+                for _id in body or []:
+                    try:
+                        results.append({**index.get_document(_id, expose_facets), "_found": True})
+                    except StandinError:
+                        results.append({"_id": _id, "_found": False})
+                return {"results": results}
+        if parts == ["documents", "delete-batch"] and method == "POST":
+            return index.delete_documents(body or [])
+        if parts == ["documents", "delete-all"] and method == "DELETE":
+            return index.delete_all_documents()
+        if len(parts) == 2 and parts[0] == "documents" and method == "GET":
+            return index.get_document(parts[1], expose_facets)
+        raise StandinError(404, "not_found", f"{method} /indexes/{name}/{'/'.join(parts)} is not supported by the "
+                                             f"stand-in")
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so that the harness session and the client reuse connections as they would with Marqo
+    protocol_version = "HTTP/1.1"
+    # The headers and body are written separately, which Nagle's algorithm would delay by a round trip
+    disable_nagle_algorithm = True
+
+    def _handle(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        raw_body = self.rfile.read(length) if length else b""
+        try:
+            try:
+                body = json.loads(raw_body) if raw_body else None
+            except json.JSONDecodeError as e:
+                raise StandinError(400, "bad_request", f"Invalid JSON body: {e}")
+            status, response = 200, self.server.marqo.handle(self.command, url.path, parse_qs(url.query), body)
+        except StandinError as e:
+            status, response = e.status, e.to_dict()
+        except Exception as e:
+            status, response = 500, StandinError(500, "internal", repr(e), "internal").to_dict()
+        encoded = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandinMarqoServer:
+    """Serves a StandinMarqo over HTTP from a background thread.
+
+    Usage:
+        with StandinMarqoServer() as server:
+            client = marqo.Client(url=server.url)
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._server = ThreadingHTTPServer((host, port), _RequestHandler)
+        self._server.daemon_threads = True
+        self._server.marqo = StandinMarqo()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def marqo(self) -> StandinMarqo:
+        return self._server.marqo
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandinMarqoServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="marqo-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StandinMarqoServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the in-process Marqo stand-in server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8882)
+    args = parser.parse_args()
+    server = StandinMarqoServer(args.host, args.port)
+    print(f"Marqo stand-in listening on {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
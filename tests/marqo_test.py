@@ -2,8 +2,10 @@
 
 Pass its settings to local_marqo_settings.
 """
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Dict, Optional, Sequence, Tuple
 import json
+import os
 import time
 
 import unittest
@@ -12,11 +14,40 @@ from marqo import Client
 from marqo.errors import MarqoWebError
 import requests
 
+from tests.dirty_tracking import DirtyIndexTracker
+from tests.http_session import PooledSession
+from tests.index_pool import IndexPool
+from tests.resource_sampler import ResourceSampler
+
 
 class MarqoTestCase(unittest.TestCase):
 
     indexes_to_delete = []
     _MARQO_URL = "http://localhost:8882"
+    # A keep-alive session shared by every test class for the harness calls below. It is created lazily
+    # on first use so that importing this module does not require a running Marqo instance.
+    _session: Optional[PooledSession] = None
+    # The pool of indexes shared by every test class, created lazily like the session above
+    _index_pool: Optional[IndexPool] = None
+    # The background resource sampler, set by conftest.py when pytest is run with --sample-resources
+    _resource_sampler: Optional[ResourceSampler] = None
+    # Indexes a class leases from the index pool, as a mapping from a class attribute name to the index
+    # settings (camelCase, without "indexName"). setUpClass sets each attribute to the leased index name.
+    # Only declare indexes here if the tests do not modify or delete them.
+    pooled_indexes: Dict[str, Dict] = {}
+    # Models used by the indexes (and rerankers) a class creates itself, used by --model-affinity-order
+    # to run classes that share models together. The models of pooled_indexes do not need to be listed.
+    index_models: List[str] = []
+    # The models tearDownClass does not eject, because the next class uses them. Set by conftest.py when pytest
+    # is run with --model-affinity-order.
+    _models_to_keep: Tuple[str, ...] = ()
+    # Tracks the indexes the client has written to, so that clear_indexes can skip empty ones. Tests that
+    # write to an index without the client (e.g. a raw request) must call dirty_index_tracker.mark_dirty.
+    dirty_index_tracker = DirtyIndexTracker()
+    # The maximum number of indexes cleared at the same time
+    _CLEAR_INDEXES_MAX_WORKERS = int(os.environ.get("MARQO_API_TESTS_CLEAR_WORKERS", 4))
+    # The maximum number of models ejected at the same time
+    _EJECT_MODELS_MAX_WORKERS = int(os.environ.get("MARQO_API_TESTS_EJECT_WORKERS", 4))
 
     @classmethod
     def setUpClass(cls) -> None:
@@ -28,18 +59,47 @@ class MarqoTestCase(unittest.TestCase):
         # A list with index names to be cleared in each setUp call and to be deleted in tearDownClass call
         cls.indexes_to_delete: List[str] = []
         cls.client = Client(**cls.client_settings)
+        cls.dirty_index_tracker.install()
+        # A list with index names leased from the index pool, to be cleared in each setUp call and to be
+        # returned to the pool in tearDownClass call
+        cls.leased_indexes: List[str] = []
+        if cls.pooled_indexes:
+            attributes = list(cls.pooled_indexes)
+            cls.leased_indexes = cls.get_index_pool().lease([cls.pooled_indexes[a] for a in attributes])
+            for attribute, index_name in zip(attributes, cls.leased_indexes):
+                setattr(cls, attribute, index_name)
 
     @classmethod
     def tearDownClass(cls) -> None:
         # A function that will be automatically called after each test call
-        # This removes all the loaded models to save memory space.
-        cls.removeAllModels()
+        # This removes the loaded models to save memory space, except those the next class uses.
+        cls.removeAllModels(keep=cls._models_to_keep)
         if cls.indexes_to_delete:
             cls.delete_indexes(cls.indexes_to_delete)
+        if cls.leased_indexes:
+            cls.get_index_pool().release(cls.leased_indexes)
 
     def setUp(self) -> None:
-        if self.indexes_to_delete:
-            self.clear_indexes(self.indexes_to_delete)
+        if self.indexes_to_delete or self.leased_indexes:
+            self.clear_indexes(self.indexes_to_delete + self.leased_indexes)
+
+    @classmethod
+    def get_session(cls) -> PooledSession:
+        """Returns the session shared by all test classes, creating it on first use."""
+        if MarqoTestCase._session is None:
+            MarqoTestCase._session = PooledSession.from_env()
+        return MarqoTestCase._session
+
+    @classmethod
+    def get_index_pool(cls) -> IndexPool:
+        """Returns the index pool shared by all test classes, creating it on first use."""
+        if MarqoTestCase._index_pool is None:
+            MarqoTestCase._index_pool = IndexPool(
+                create_indexes=MarqoTestCase.create_indexes,
+                delete_indexes=MarqoTestCase.delete_indexes,
+                clear_indexes=MarqoTestCase.clear_indexes
+            )
+        return MarqoTestCase._index_pool
 
     @classmethod
     def create_indexes(cls, index_settings_with_name: List[Dict]):
@@ -47,16 +107,18 @@ class MarqoTestCase(unittest.TestCase):
          Use camelCase for the keys.
         """
 
-        r = requests.post(f"{cls._MARQO_URL}/batch/indexes/create", data=json.dumps(index_settings_with_name))
+        r = cls.get_session().post(f"{cls._MARQO_URL}/batch/indexes/create",
+                                   data=json.dumps(index_settings_with_name))
 
         try:
             r.raise_for_status()
         except requests.exceptions.HTTPError as e:
             raise MarqoWebError(e)
+        cls.dirty_index_tracker.mark_clean([settings["indexName"] for settings in index_settings_with_name])
 
     @classmethod
     def delete_indexes(cls, index_names: List[str]):
-        r = requests.post(f"{cls._MARQO_URL}/batch/indexes/delete", data=json.dumps(index_names))
+        r = cls.get_session().post(f"{cls._MARQO_URL}/batch/indexes/delete", data=json.dumps(index_names))
 
         try:
             r.raise_for_status()
@@ -65,26 +127,85 @@ class MarqoTestCase(unittest.TestCase):
 
     @classmethod
     def clear_indexes(cls, index_names: List[str]):
-        for index_name in index_names:
-            r = requests.delete(f"{cls._MARQO_URL}/indexes/{index_name}/documents/delete-all")
+        """Deletes all documents in the given indexes, concurrently. Indexes that the client has not written
+        to since they were created or last cleared are skipped."""
+        dirty_index_names = [name for name in dict.fromkeys(index_names)
+                             if not cls.dirty_index_tracker.is_clean(name)]
+        if not dirty_index_names:
+            return
+
+        def clear_index(index_name: str):
+            r = cls.get_session().delete(f"{cls._MARQO_URL}/indexes/{index_name}/documents/delete-all")
             try:
                 r.raise_for_status()
             except requests.exceptions.HTTPError as e:
                 raise MarqoWebError(e)
+            cls.dirty_index_tracker.mark_clean([index_name])
 
+        with ThreadPoolExecutor(max_workers=min(cls._CLEAR_INDEXES_MAX_WORKERS, len(dirty_index_names))) as executor:
+            futures = [executor.submit(clear_index, index_name) for index_name in dirty_index_names]
+        for future in futures:
+            # Re-raises the first error, after every index has been attempted
+            future.result()
 
     @classmethod
-    def removeAllModels(cls) -> None:
-        # A function that can be called to remove loaded models in Marqo.
-        # Use it whenever you think there is a risk of OOM problem.
-        # E.g., add it into the `tearDown` function to remove models between test cases.
+    def removeAllModels(cls, keep: Sequence[str] = ()) -> Dict[str, Any]:
+        """A function that can be called to remove loaded models in Marqo.
+        Use it whenever you think there is a risk of OOM problem.
+        E.g., add it into the `tearDown` function to remove models between test cases.
+
+        Models are cached globally, so the loaded models are fetched once and each (model_name, model_device)
+        pair is ejected once, concurrently. Ejections that fail are retried one at a time, as a concurrent
+        request may have been holding the model cache.
+
+        Args:
+            keep: the names of models that are not ejected
+
+        Returns:
+            A summary with the ejected and failed models, the time spent and the memory freed in GB
+            (None if Marqo did not report memory usage).
+        """
+        start_time = time.time()
+        summary = {"models_ejected": [], "models_failed": [], "time_spent_s": 0.0, "memory_freed_gb": None}
         client = Client(**cls.client_settings)
         index_names_list: List[str] = [item["indexName"] for item in client.get_indexes()["results"]]
-        for index_name in index_names_list:
-            loaded_models = client.index(index_name).get_loaded_models().get("models", [])
-            for model in loaded_models:
-                try:
-                    client.index(index_name).eject_model(model_name=model["model_name"], model_device=model["model_device"])
-                except MarqoWebError:
-                    pass
+        if not index_names_list:
+            return summary
 
+        # Any index can be used, the models and device endpoints are not index specific
+        index = client.index(index_names_list[0])
+        memory_before = cls._memory_used_gb(index)
+        loaded_models = index.get_loaded_models().get("models", [])
+        models_to_eject = list(dict.fromkeys((model["model_name"], model["model_device"]) for model in loaded_models
+                                             if model["model_name"] not in keep))
+
+        def eject(model: Tuple[str, str]) -> bool:
+            try:
+                index.eject_model(model_name=model[0], model_device=model[1])
+                return True
+            except MarqoWebError:
+                return False
+
+        if models_to_eject:
+            with ThreadPoolExecutor(max_workers=min(cls._EJECT_MODELS_MAX_WORKERS, len(models_to_eject))) as executor:
+                ejected = list(executor.map(eject, models_to_eject))
+            for model, is_ejected in zip(models_to_eject, ejected):
+                if is_ejected or eject(model):
+                    summary["models_ejected"].append(model)
+                else:
+                    summary["models_failed"].append(model)
+
+            memory_after = cls._memory_used_gb(index)
+            if memory_before is not None and memory_after is not None:
+                summary["memory_freed_gb"] = round(memory_before - memory_after, 3)
+
+        summary["time_spent_s"] = round(time.time() - start_time, 3)
+        return summary
+
+    @staticmethod
+    def _memory_used_gb(index) -> Optional[float]:
+        """Returns the memory used by Marqo in GB, or None if it is not reported as a number."""
+        try:
+            return float(str(index.get_cpu_info()["memory_used_gb"]).replace("GB", "").strip())
+        except (MarqoWebError, KeyError, ValueError):
+            return None
@@ -0,0 +1,160 @@
+"""Orders test classes so that classes using the same models run next to each other.
+
+Marqo keeps a limited number of models in memory (the suite runs with MARQO_MAX_CPU_MODEL_MEMORY=1.6), so
+interleaving classes that use different models forces repeated ejections and cold reloads from disk.
+The models a class uses are read from its `pooled_indexes` settings and its `index_models` declaration.
+
+A test class ejects the loaded models when it finishes, except (with --model-affinity-order) the models of the
+next class that declares models, see `models_to_keep`. The model cache is estimated as an LRU cache holding
+`cache_size` models, emptied of the other models after each class. Classes are scheduled greedily: the next
+class is the one that needs the fewest models not already in the estimated cache, ties broken by the most
+models shared with the cache and then by collection order. Classes that declare no models, and pytest items
+outside of a test class, keep their position in the collection order.
+"""
+from collections import OrderedDict
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# The model Marqo uses for an index that does not set "model"
+DEFAULT_MODEL = "hf/e5-base-v2"
+
+
+def class_models(test_class) -> Tuple[str, ...]:
+    """Returns the models declared by a test class, in declaration order."""
+    models = [settings.get("model", DEFAULT_MODEL)
+              for settings in getattr(test_class, "pooled_indexes", {}).values()]
+    models += list(getattr(test_class, "index_models", []))
+    return tuple(dict.fromkeys(models))
+
+
+class ModelCacheEstimate:
+    """An LRU estimate of the models Marqo holds in memory."""
+
+    def __init__(self, cache_size: int):
+        self.cache_size = cache_size
+        self._models: OrderedDict = OrderedDict()
+        self.loads = 0
+
+    def new_models(self, models: Sequence[str]) -> int:
+        return sum(1 for model in models if model not in self._models)
+
+    def shared_models(self, models: Sequence[str]) -> int:
+        return sum(1 for model in models if model in self._models)
+
+    def use(self, models: Sequence[str]) -> None:
+        for model in models:
+            if model in self._models:
+                self._models.move_to_end(model)
+            else:
+                self.loads += 1
+                self._models[model] = True
+                if len(self._models) > self.cache_size:
+                    self._models.popitem(last=False)
+
+    def retain(self, models: Sequence[str]) -> None:
+        """Evicts the models that are not in `models`, as a class does when it finishes."""
+        for model in list(self._models):
+            if model not in models:
+                del self._models[model]
+
+
+def estimate_model_loads(model_sequence: Sequence[Sequence[str]], cache_size: int,
+                         keep_next_models: bool = True) -> int:
+    """Returns the estimated number of model loads for classes running in the given order. Each class ejects
+    every model when it finishes, except the models of the next class if keep_next_models is True."""
+    cache = ModelCacheEstimate(cache_size)
+    for position, models in enumerate(model_sequence):
+        cache.use(models)
+        is_last = position + 1 == len(model_sequence)
+        cache.retain(model_sequence[position + 1] if keep_next_models and not is_last else ())
+    return cache.loads
+
+
+def order_by_model_affinity(model_sequence: Sequence[Sequence[str]], cache_size: int) -> List[int]:
+    """Returns the positions of model_sequence in the order that the classes should run."""
+    cache = ModelCacheEstimate(cache_size)
+    remaining = list(range(len(model_sequence)))
+    order = []
+    while remaining:
+        next_position = min(remaining, key=lambda position: (
+            cache.new_models(model_sequence[position]),
+            -cache.shared_models(model_sequence[position]),
+            position
+        ))
+        remaining.remove(next_position)
+        order.append(next_position)
+        cache.retain(model_sequence[next_position])
+        cache.use(model_sequence[next_position])
+    return order
+
+
+def _class_blocks(items: list) -> List[list]:
+    """Splits pytest items into blocks of consecutive items from the same class."""
+    blocks: List[list] = []
+    for item in items:
+        test_class = getattr(item, "cls", None)
+        if blocks and test_class is not None and getattr(blocks[-1][0], "cls", None) is test_class:
+            blocks[-1].append(item)
+        else:
+            blocks.append([item])
+    return blocks
+
+
+def _block_models(block: list, is_skipped: Callable[[object], bool]) -> Tuple[str, ...]:
+    test_class = getattr(block[0], "cls", None)
+    if test_class is None or all(is_skipped(item) for item in block):
+        return ()
+    return class_models(test_class)
+
+
+def reorder_items(items: list, cache_size: int,
+                  is_skipped: Callable[[object], bool] = lambda item: False) -> Tuple[list, int, int]:
+    """Reorders pytest items by model affinity, keeping the items of each test class together.
+
+    Args:
+        items: the collected pytest items
+        cache_size: the number of models the estimated cache holds
+        is_skipped: returns True for an item that will not run. A class whose items are all skipped does
+            not load any model.
+
+    Returns:
+        The reordered items, and the estimated model loads before and after reordering. The loads before are
+        estimated with every model ejected after each class, and the loads after with the models of the next
+        class kept (see `models_to_keep`).
+    """
+    blocks = _class_blocks(items)
+
+    def block_models(block: list) -> Tuple[str, ...]:
+        return _block_models(block, is_skipped)
+
+    movable_positions = [position for position, block in enumerate(blocks) if block_models(block)]
+    movable_models = [block_models(blocks[position]) for position in movable_positions]
+    order = order_by_model_affinity(movable_models, cache_size)
+
+    loads_before = estimate_model_loads(movable_models, cache_size, keep_next_models=False)
+    loads_in_collection_order = estimate_model_loads(movable_models, cache_size)
+    loads_after = estimate_model_loads([movable_models[position] for position in order], cache_size)
+    if loads_after > loads_in_collection_order:
+        # The greedy order is not guaranteed to be better than the collection order
+        return list(items), loads_before, loads_in_collection_order
+
+    reordered_blocks = list(blocks)
+    for slot, position in zip(movable_positions, order):
+        reordered_blocks[slot] = blocks[movable_positions[position]]
+    return [item for block in reordered_blocks for item in block], loads_before, loads_after
+
+
+def models_to_keep(items: list,
+                   is_skipped: Callable[[object], bool] = lambda item: False) -> Dict[type, Tuple[str, ...]]:
+    """Returns the models each test class of items should not eject when it finishes: the models of the next
+    class that declares models and will run. Classes that declare no models keep them too, so that the
+    models stay loaded across the classes that run in between."""
+    keep: Dict[type, Tuple[str, ...]] = {}
+    next_models: Tuple[str, ...] = ()
+    for block in reversed(_class_blocks(items)):
+        test_class = getattr(block[0], "cls", None)
+        if test_class is None:
+            continue
+        # A class split into several blocks finishes after its last block
+        keep.setdefault(test_class, next_models)
+        next_models = _block_models(block, is_skipped) or next_models
+    return keep
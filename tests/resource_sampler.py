@@ -0,0 +1,175 @@
+"""Samples Marqo's resource usage in the background while the tests run.
+
+ResourceSampler polls the device and models endpoints (`get_cpu_info`, `get_loaded_models`) and, when docker is
+available, `docker stats` for the marqo and vespa containers, and keeps each metric as a time series. A window of
+the series (a test, a benchmark case) is summarized with its first, last, peak and mean values, so the operations
+that drive memory up, such as model loads, stand out.
+
+It is enabled with `pytest --sample-resources` (see conftest.py), which attaches a summary to every test and
+benchmark case. The endpoints are polled with urllib rather than requests, so that the polls are not seen by the
+trace recorder or counted by the harness session.
+"""
+import bisect
+import json
+import re
+import shutil
+import subprocess
+import threading
+import time
+import urllib.request
+from typing import Dict, List, Optional, Sequence, Tuple
+
+_NUMBER = re.compile(r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?")
+_MEMORY_UNITS_GB = {"b": 1e-9, "kb": 1e-6, "kib": 1024 / 1e9, "mb": 1e-3, "mib": 1024 ** 2 / 1e9, "gb": 1.0,
+                    "gib": 1024 ** 3 / 1e9, "tb": 1e3, "tib": 1024 ** 4 / 1e9}
+
+
+def parse_number(value) -> Optional[float]:
+    """The first number in a value such as "12.5 %" or "3.2 GB", or None."""
+    match = _NUMBER.search(str(value))
+    return float(match.group()) if match else None
+
+
+def parse_memory_gb(value: str) -> Optional[float]:
+    """Converts a docker memory size such as "1.5GiB" or "512MiB" to GB."""
+    match = re.match(r"\s*([\d.]+)\s*([a-zA-Z]+)", value)
+    if not match or match.group(2).lower() not in _MEMORY_UNITS_GB:
+        return None
+    return float(match.group(1)) * _MEMORY_UNITS_GB[match.group(2).lower()]
+
+
+class ResourceSampler:
+    """Polls resource metrics every interval_s seconds in background threads.
+
+    Args:
+        url: the Marqo URL
+        interval_s: the time between two polls of each source
+        containers: the containers to sample with `docker stats`, when they are running
+        use_docker: whether to sample containers. Defaults to whether the docker command is available.
+    """
+
+    def __init__(self, url: str, interval_s: float = 1.0, containers: Sequence[str] = ("marqo", "vespa"),
+                 use_docker: Optional[bool] = None):
+        self.url = url.rstrip("/")
+        self.interval_s = interval_s
+        self.containers = tuple(containers)
+        self.use_docker = shutil.which("docker") is not None if use_docker is None else use_docker
+        # Each metric's sample times (time.monotonic) and values, in time order
+        self._series: Dict[str, Tuple[List[float], List[float]]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    @staticmethod
+    def now() -> float:
+        return time.monotonic()
+
+    def _add(self, sample_time: float, metrics: Dict[str, Optional[float]]) -> None:
+        with self._lock:
+            for metric, value in metrics.items():
+                if value is None:
+                    continue
+                times, values = self._series.setdefault(metric, ([], []))
+                # Sources are polled from different threads, so keep each series sorted
+                position = bisect.bisect_right(times, sample_time)
+                times.insert(position, sample_time)
+                values.insert(position, value)
+
+    def _get(self, path: str) -> Dict:
+        with urllib.request.urlopen(f"{self.url}{path}", timeout=max(5.0, self.interval_s)) as response:
+            return json.loads(response.read())
+
+    def sample_marqo(self) -> Dict[str, Optional[float]]:
+        """Polls the device and models endpoints once and records the sample."""
+        sample_time = self.now()
+        metrics: Dict[str, Optional[float]] = {}
+        try:
+            cpu_info = self._get("/device/cpu")
+            metrics["marqo_cpu_percent"] = parse_number(cpu_info.get("cpu_usage_percent"))
+            metrics["marqo_memory_gb"] = parse_number(cpu_info.get("memory_used_gb"))
+            metrics["marqo_memory_percent"] = parse_number(cpu_info.get("memory_used_percent"))
+            metrics["loaded_models"] = float(len(self._get("/models").get("models", [])))
+        except (OSError, ValueError, AttributeError):
+            # Marqo may be restarting, e.g. in the tests that restart it with other settings
+            pass
+        self._add(sample_time, metrics)
+        return metrics
+
+    def sample_docker(self) -> Dict[str, Optional[float]]:
+        """Runs `docker stats` once for the running containers and records the sample."""
+        sample_time = self.now()
+        try:
+            output = subprocess.run(["docker", "stats", "--no-stream", "--format", "{{json .}}"],
+                                    capture_output=True, text=True, timeout=30, check=True).stdout
+        except (OSError, subprocess.SubprocessError):
+            return {}
+        metrics: Dict[str, Optional[float]] = {}
+        for line in output.splitlines():
+            try:
+                stats = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            name = stats.get("Name", "")
+            if name not in self.containers:
+                continue
+            metrics[f"{name}_container_cpu_percent"] = parse_number(stats.get("CPUPerc"))
+            metrics[f"{name}_container_memory_gb"] = parse_memory_gb(stats.get("MemUsage", "").split("/")[0])
+        self._add(sample_time, metrics)
+        return metrics
+
+    def _poll(self, sample) -> None:
+        while not self._stop.is_set():
+            started = self.now()
+            sample()
+            self._stop.wait(max(0.0, self.interval_s - (self.now() - started)))
+
+    def start(self) -> "ResourceSampler":
+        self._stop.clear()
+        sources = [self.sample_marqo] + ([self.sample_docker] if self.use_docker else [])
+        # One thread per source, as `docker stats --no-stream` takes a second or two
+        self._threads = [threading.Thread(target=self._poll, args=(source,), daemon=True,
+                                          name=f"resource-sampler-{source.__name__}") for source in sources]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=35)
+        self._threads = []
+
+    def series(self, start: float, end: float) -> Dict[str, List[Tuple[float, float]]]:
+        """The (seconds since start, value) samples of each metric between start and end (time.monotonic)."""
+        with self._lock:
+            result = {}
+            for metric, (times, values) in self._series.items():
+                first, last = bisect.bisect_left(times, start), bisect.bisect_right(times, end)
+                if first < last:
+                    result[metric] = [(round(times[i] - start, 3), values[i]) for i in range(first, last)]
+            return result
+
+    def summarize(self, start: float, end: float) -> Dict[str, Dict[str, float]]:
+        """The first, last, peak and mean value and the number of samples of each metric between start and end.
+
+        "before" is the last value sampled before start, if any, so that a window shorter than the interval still
+        shows how a metric changed.
+        """
+        with self._lock:
+            summary = {}
+            for metric, (times, values) in self._series.items():
+                first, last = bisect.bisect_left(times, start), bisect.bisect_right(times, end)
+                if first >= last:
+                    continue
+                window = values[first:last]
+                summary[metric] = {"first": window[0], "last": window[-1], "peak": max(window),
+                                   "mean": round(sum(window) / len(window), 3), "count": len(window)}
+                if first > 0:
+                    summary[metric]["before"] = values[first - 1]
+            return summary
+
+    def __enter__(self) -> "ResourceSampler":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()